@@ -12,6 +12,15 @@ from gtts import gTTS
 import pygame
 import re
 from datetime import datetime
+from deepgram_streaming import DeepgramStreamingTranscriber
+from voice_activity import VADRecorder
+from wake_word import WakeWordSpotter
+from audio_buffer import AudioBuffer
+from tts_cache import TTSCache
+from pipelined_speaker import PipelinedSpeaker
+from conversation_engine import ConversationEngine, Utterance
+from phrase_bank import (PhraseBank, SLOW_EMOTIONS, EMOTION_GREETINGS, EMOTION_GOODBYES,
+                         ADVANCED_WELCOME, ADVANCED_ERROR)
 
 warnings.filterwarnings('ignore')
 
@@ -218,6 +227,69 @@ class AdvancedEmotionDetector:
         
         return detected_emotion, confidence, emotion_analysis
 
+# Recommendation scoring (points added to a movie's score)
+TARGET_GENRE_BONUS = 6       # per genre matching the emotion's target genres
+AVOID_GENRE_PENALTY = 3      # per genre the emotion should avoid
+EMOTION_BONUS = 4            # once, for the emotion's extra keywords below
+REQUESTED_GENRE_BONUS = 5    # per genre the user named
+MIN_RECOMMENDATION_SCORE = 2
+
+# Extra boost for some emotions: (reason shown, genre keywords)
+EMOTION_BONUS_KEYWORDS = {
+    'sad': ('Mood-lifting', ['comedy', 'family', 'animation', 'musical']),
+    'excited': ('High-energy', ['action', 'adventure', 'thriller', 'sci-fi']),
+    'angry': ('Calming', ['comedy', 'family', 'romance', 'animation']),
+    'stressed': ('Calming', ['comedy', 'family', 'romance', 'animation']),
+}
+
+# Emotion-to-recommendation mapping: which genres to favour and avoid for each mood
+EMOTION_MOVIE_STRATEGIES = {
+    'sad': {
+        'primary_approach': 'uplift',
+        'target_genres': ['comedy', 'family', 'animation', 'musical', 'romance'],
+        'avoid_genres': ['horror', 'thriller', 'war'],
+        'therapeutic_message': "I've selected uplifting movies to help brighten your mood"
+    },
+    'happy': {
+        'primary_approach': 'amplify',
+        'target_genres': ['comedy', 'adventure', 'family', 'musical', 'animation'],
+        'therapeutic_message': "These joyful movies will keep your positive energy flowing"
+    },
+    'excited': {
+        'primary_approach': 'channel',
+        'target_genres': ['action', 'adventure', 'thriller', 'sci-fi', 'fantasy'],
+        'therapeutic_message': "These high-energy movies match your enthusiastic mood"
+    },
+    'angry': {
+        'primary_approach': 'soothe',
+        'target_genres': ['comedy', 'family', 'animation', 'romance'],
+        'avoid_genres': ['action', 'thriller', 'horror', 'crime'],
+        'therapeutic_message': "These calming movies can help ease tension and frustration"
+    },
+    'calm': {
+        'primary_approach': 'maintain',
+        'target_genres': ['drama', 'romance', 'documentary', 'biography'],
+        'therapeutic_message': "These thoughtful movies complement your peaceful state"
+    },
+    'tired': {
+        'primary_approach': 'comfort',
+        'target_genres': ['comedy', 'family', 'animation', 'romance'],
+        'avoid_genres': ['thriller', 'horror', 'action'],
+        'therapeutic_message': "These easy-to-follow movies are perfect for low energy"
+    },
+    'stressed': {
+        'primary_approach': 'relax',
+        'target_genres': ['comedy', 'family', 'animation', 'documentary'],
+        'avoid_genres': ['thriller', 'horror', 'action', 'crime'],
+        'therapeutic_message': "These stress-free movies will help you unwind"
+    },
+    'neutral': {
+        'primary_approach': 'balance',
+        'target_genres': ['comedy', 'drama', 'adventure', 'romance'],
+        'therapeutic_message': "Here are some well-balanced movie recommendations"
+    }
+}
+
 class EmotionBasedMovieRecommender:
     """Advanced movie recommender with sophisticated emotion-based suggestions"""
     
@@ -245,57 +317,33 @@ class EmotionBasedMovieRecommender:
         self.channels = 1
         self.recording_duration = 6
         
+        # Voice activity detection - capture starts on speech and stops on silence
+        self.vad_recorder = VADRecorder(sample_rate=self.sample_rate, channels=self.channels)
+        
+        # Spoken phrases are synthesised once and replayed from disk
+        self.tts_cache = TTSCache()
+        
+        # Speaks long responses sentence by sentence, synthesising ahead of playback
+        self.speaker = PipelinedSpeaker(self.tts_cache, phrase_bank=PhraseBank())
+        
+        # Set while start_advanced_conversation is running; replies are queued to its TTS stage
+        self.engine = None
+        
+        # Streaming speech-to-text with endpointing
+        self.streaming_transcriber = DeepgramStreamingTranscriber(
+            api_key=DEEPGRAM_API_KEY,
+            sample_rate=self.sample_rate,
+            channels=self.channels
+        )
+        
         # Load movie database
         print("🎬 Loading comprehensive movie database...")
         self.load_movie_database()
         
-        # ENHANCED emotion-to-recommendation mapping (FIXED)
-        self.emotion_movie_strategies = {
-            'sad': {
-                'primary_approach': 'uplift',
-                'target_genres': ['comedy', 'family', 'animation', 'musical', 'romance'],
-                'avoid_genres': ['horror', 'thriller', 'war'],
-                'therapeutic_message': "I've selected uplifting movies to help brighten your mood"
-            },
-            'happy': {
-                'primary_approach': 'amplify',
-                'target_genres': ['comedy', 'adventure', 'family', 'musical', 'animation'],
-                'therapeutic_message': "These joyful movies will keep your positive energy flowing"
-            },
-            'excited': {
-                'primary_approach': 'channel',
-                'target_genres': ['action', 'adventure', 'thriller', 'sci-fi', 'fantasy'],
-                'therapeutic_message': "These high-energy movies match your enthusiastic mood"
-            },
-            'angry': {
-                'primary_approach': 'soothe',
-                'target_genres': ['comedy', 'family', 'animation', 'romance'],
-                'avoid_genres': ['action', 'thriller', 'horror', 'crime'],
-                'therapeutic_message': "These calming movies can help ease tension and frustration"
-            },
-            'calm': {
-                'primary_approach': 'maintain',
-                'target_genres': ['drama', 'romance', 'documentary', 'biography'],
-                'therapeutic_message': "These thoughtful movies complement your peaceful state"
-            },
-            'tired': {
-                'primary_approach': 'comfort',
-                'target_genres': ['comedy', 'family', 'animation', 'romance'],
-                'avoid_genres': ['thriller', 'horror', 'action'],
-                'therapeutic_message': "These easy-to-follow movies are perfect for low energy"
-            },
-            'stressed': {
-                'primary_approach': 'relax',
-                'target_genres': ['comedy', 'family', 'animation', 'documentary'],
-                'avoid_genres': ['thriller', 'horror', 'action', 'crime'],
-                'therapeutic_message': "These stress-free movies will help you unwind"
-            },
-            'neutral': {
-                'primary_approach': 'balance',
-                'target_genres': ['comedy', 'drama', 'adventure', 'romance'],
-                'therapeutic_message': "Here are some well-balanced movie recommendations"
-            }
-        }
+        self.emotion_movie_strategies = EMOTION_MOVIE_STRATEGIES
+        
+        # Every movie's score for each emotion, so a request only adds the genres it names
+        self._build_emotion_priors()
         
         # Conversation state
         self.wake_words = ["hey movie buddy", "movie buddy", "recommend", "suggest"]
@@ -304,6 +352,9 @@ class EmotionBasedMovieRecommender:
         self.last_activity = time.time()
         self.sleep_timeout = 45  # Longer timeout for deeper conversations
         
+        # On-device wake word spotting (active once templates are enrolled via wake_word.py)
+        self.wake_word_spotter = WakeWordSpotter(self.wake_words, sample_rate=self.sample_rate)
+        
     def load_movie_database(self):
         """Load and enrich movie database"""
         try:
@@ -390,128 +441,120 @@ class EmotionBasedMovieRecommender:
         except:
             return 0
     
-    def get_emotion_based_recommendations(self, user_input, n_recommendations=3):
-        """UPGRADED: Get sophisticated emotion-based movie recommendations with debugging"""
-        print(f"🎯 Getting recommendations for emotion: {self.user_emotion.upper()}")
+    def _strategy_for(self, emotion):
+        return self.emotion_movie_strategies.get(emotion, self.emotion_movie_strategies.get('neutral', {}))
+    
+    def _score_parts(self, movie, emotion, user_lower=None):
+        """Yield (points, reason, detail) for each part of a movie's score
+        
+        Without user_lower only the emotion's part is scored, which is what
+        the priors hold; reasons are only formatted for returned movies.
+        """
+        imdb_score = movie.get('imdb_score', 0)
+        if imdb_score > 7.5:
+            yield 5, "Excellent rating", None
+        elif imdb_score > 6.5:
+            yield 4, "Good rating", None
+        elif imdb_score > 5.5:
+            yield 3, "Decent rating", None
+        else:
+            yield 1, None, None  # Minimum score
         
-        strategy = self.emotion_movie_strategies.get(self.user_emotion, self.emotion_movie_strategies.get('neutral', {}))
+        strategy = self._strategy_for(emotion)
         target_genres = strategy.get('target_genres', ['comedy', 'drama'])
         avoid_genres = strategy.get('avoid_genres', [])
+        movie_genres = movie.get('genres', [])
+        for movie_genre in movie_genres:
+            # Case-insensitive, partial matching
+            genre_lower = movie_genre.lower()
+            if any(target.lower() in genre_lower for target in target_genres):
+                yield TARGET_GENRE_BONUS, "Target genre", movie_genre
+            if any(avoid.lower() in genre_lower for avoid in avoid_genres):
+                yield -AVOID_GENRE_PENALTY, "Avoided genre", movie_genre
+        
+        if emotion in EMOTION_BONUS_KEYWORDS:
+            reason, keywords = EMOTION_BONUS_KEYWORDS[emotion]
+            for keyword in keywords:
+                if any(keyword in genre.lower() for genre in movie_genres):
+                    yield EMOTION_BONUS, reason, keyword
+                    break
         
-        print(f"🎬 Target genres: {target_genres}")
-        print(f"❌ Avoiding genres: {avoid_genres}")
-        
-        scored_movies = []
-        movies_with_genres = 0
-        total_checked = 0
-        
-        for movie in self.movies:
-            total_checked += 1
-            score = 0
-            score_reasons = []
-            
-            # Get movie info
-            movie_genres = movie.get('genres', [])
-            imdb_score = movie.get('imdb_score', 0)
-            title = movie.get('title', 'Unknown')
-            
-            if movie_genres:
-                movies_with_genres += 1
-            
-            # Base score for all movies
-            if imdb_score > 7.5:
-                score += 5
-                score_reasons.append("Excellent rating")
-            elif imdb_score > 6.5:
-                score += 4
-                score_reasons.append("Good rating")
-            elif imdb_score > 5.5:
-                score += 3
-                score_reasons.append("Decent rating")
-            else:
-                score += 1  # Minimum score
-            
-            # IMPROVED: Genre matching logic
-            genre_bonus = 0
-            genre_penalty = 0
-            
-            for movie_genre in movie_genres:
-                # Target genre matching (case-insensitive, partial matching)
-                for target in target_genres:
-                    if target.lower() in movie_genre.lower():
-                        genre_bonus += 6
-                        score_reasons.append(f"Target genre: {movie_genre}")
-                        break
-                
-                # Avoid genre penalty
-                for avoid in avoid_genres:
-                    if avoid.lower() in movie_genre.lower():
-                        genre_penalty += 3
-                        score_reasons.append(f"Avoided genre: {movie_genre}")
-                        break
-            
-            score += genre_bonus - genre_penalty
-            
-            # EMOTION-SPECIFIC BONUSES
-            emotion_bonus = 0
-            
-            if self.user_emotion == 'sad':
-                # Extra boost for mood-lifting content
-                uplifting_keywords = ['comedy', 'family', 'animation', 'musical']
-                for keyword in uplifting_keywords:
-                    if any(keyword.lower() in genre.lower() for genre in movie_genres):
-                        emotion_bonus += 4
-                        score_reasons.append(f"Mood-lifting: {keyword}")
-                        break
-                        
-            elif self.user_emotion == 'excited':
-                # Extra boost for high-energy content
-                energy_keywords = ['action', 'adventure', 'thriller', 'sci-fi']
-                for keyword in energy_keywords:
-                    if any(keyword.lower() in genre.lower() for genre in movie_genres):
-                        emotion_bonus += 4
-                        score_reasons.append(f"High-energy: {keyword}")
-                        break
-                        
-            elif self.user_emotion in ['angry', 'stressed']:
-                # Extra boost for calming content
-                calming_keywords = ['comedy', 'family', 'romance', 'animation']
-                for keyword in calming_keywords:
-                    if any(keyword.lower() in genre.lower() for genre in movie_genres):
-                        emotion_bonus += 4
-                        score_reasons.append(f"Calming: {keyword}")
-                        break
-            
-            score += emotion_bonus
-            
-            # User input matching
-            user_lower = user_input.lower()
+        if user_lower is not None:
             for genre in movie_genres:
                 if genre.lower() in user_lower:
-                    score += 5
-                    score_reasons.append(f"User requested: {genre}")
-            
-            # Store if score is decent
-            if score > 2:  # Lower threshold to get more results
-                scored_movies.append((score, movie, score_reasons))
+                    yield REQUESTED_GENRE_BONUS, "User requested", genre
+    
+    def _emotion_prior(self, emotion):
+        """Every movie's score for an emotion, before the user's words (cached)"""
+        prior = self.emotion_priors.get(emotion)
+        if prior is None:
+            prior = np.array([sum(points for points, _, _ in self._score_parts(movie, emotion))
+                              for movie in self.movies], dtype=np.int64)
+            self.emotion_priors[emotion] = prior
+        return prior
+    
+    def _build_emotion_priors(self):
+        """Precompute per-emotion score vectors and a movie x genre count matrix"""
+        genre_lists = [[genre.lower() for genre in movie.get('genres', [])] for movie in self.movies]
+        self.genre_vocabulary = sorted({genre for genres in genre_lists for genre in genres})
+        column = {genre: i for i, genre in enumerate(self.genre_vocabulary)}
+        self.movie_genre_counts = np.zeros((len(self.movies), len(self.genre_vocabulary)), dtype=np.int64)
+        for row, genres in enumerate(genre_lists):
+            for genre in genres:
+                self.movie_genre_counts[row, column[genre]] += 1
+        self.movies_with_genres = sum(1 for genres in genre_lists if genres)
+        self.emotion_priors = {}
+        for emotion in self.emotion_movie_strategies:
+            self._emotion_prior(emotion)
+    
+    def _score_reasons(self, movie, emotion, user_lower):
+        return [f"{reason}: {detail}" if detail else reason
+                for _, reason, detail in self._score_parts(movie, emotion, user_lower) if reason]
+    
+    def get_emotion_based_recommendations(self, user_input, n_recommendations=3):
+        """UPGRADED: Get sophisticated emotion-based movie recommendations with debugging
         
-        # Debug info
-        print(f"📊 Processed {total_checked} movies, {movies_with_genres} had genres")
-        print(f"🏆 Found {len(scored_movies)} movies with decent scores")
+        A movie's score is its precomputed prior for the emotion plus a bonus
+        for each of its genres the user named; the best are picked with a
+        partial sort.
+        """
+        emotion = self.user_emotion
+        print(f"🎯 Getting recommendations for emotion: {emotion.upper()}")
         
-        # Sort by score
-        scored_movies.sort(key=lambda x: x[0], reverse=True)
+        strategy = self._strategy_for(emotion)
+        print(f"🎬 Target genres: {strategy.get('target_genres', ['comedy', 'drama'])}")
+        print(f"❌ Avoiding genres: {strategy.get('avoid_genres', [])}")
         
-        # Show top scoring movies for debugging
-        if scored_movies:
-            print(f"🥇 Top scoring movies:")
-            for i, (score, movie, reasons) in enumerate(scored_movies[:5]):
-                print(f"  {i+1}. {movie['title']} (Score: {score}) - {movie.get('genres', [])} - {reasons[:2]}")
-        else:
+        user_lower = user_input.lower()
+        scores = self._emotion_prior(emotion)
+        requested = np.array([genre in user_lower for genre in self.genre_vocabulary], dtype=bool)
+        if requested.any():
+            scores = scores + REQUESTED_GENRE_BONUS * self.movie_genre_counts[:, requested].sum(axis=1)
+        
+        candidates = np.flatnonzero(scores > MIN_RECOMMENDATION_SCORE)  # Lower threshold to get more results
+        
+        # Debug info
+        print(f"📊 Processed {len(self.movies)} movies, {self.movies_with_genres} had genres")
+        print(f"🏆 Found {len(candidates)} movies with decent scores")
+        
+        if not len(candidates):
             print("⚠️ No movies found with current criteria - using fallback")
             return self._get_fallback_recommendations(n_recommendations)
         
-        return [movie for score, movie, reasons in scored_movies[:n_recommendations]]
+        # Highest score first, ties in catalogue order: one unique integer key per movie
+        keys = scores[candidates] * len(self.movies) - candidates
+        k = min(max(n_recommendations, 5), len(candidates))
+        top = np.argpartition(-keys, k - 1)[:k]
+        top = candidates[top[np.argsort(-keys[top])]]
+        
+        # Show top scoring movies for debugging
+        print(f"🥇 Top scoring movies:")
+        for i, index in enumerate(top[:5]):
+            movie = self.movies[index]
+            reasons = self._score_reasons(movie, emotion, user_lower)
+            print(f"  {i+1}. {movie['title']} (Score: {scores[index]}) - {movie.get('genres', [])} - {reasons[:2]}")
+        
+        return [self.movies[index] for index in top[:n_recommendations]]
     
     def _get_fallback_recommendations(self, n_recommendations=3):
         """Enhanced fallback system when primary matching fails"""
@@ -570,28 +613,20 @@ class EmotionBasedMovieRecommender:
         print("💡 I'll analyze your voice tone to understand your emotional state")
         print("🗣️  Example: 'Hey Movie Buddy, I need something to cheer me up'")
         
-        recording = sd.rec(int(duration * self.sample_rate), 
-                          samplerate=self.sample_rate, 
-                          channels=self.channels, 
-                          dtype=np.int16)
-        sd.wait()
+        # Stops on trailing silence; None means nobody spoke
+        recording = self.vad_recorder.record(duration, dtype='int16')
+        if recording is None:
+            print("🔇 No speech detected")
+            return None, None
         
-        # Save to temporary file for transcription
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            temp_filename = temp_file.name
-            
-            import wave
-            with wave.open(temp_filename, 'wb') as wav_file:
-                wav_file.setnchannels(self.channels)
-                wav_file.setsampwidth(2)
-                wav_file.setframerate(self.sample_rate)
-                wav_file.writeframes(recording.tobytes())
+        # Kept in memory - the same samples feed emotion analysis and transcription
+        audio_buffer = AudioBuffer.from_array(recording.reshape(-1), self.sample_rate)
         
         print("✅ Audio captured. Analyzing emotion and transcribing...")
-        return temp_filename, recording.flatten()
+        return audio_buffer, audio_buffer.samples
     
-    def transcribe_audio(self, file_path):
-        """Transcribe audio using Deepgram API"""
+    def transcribe_audio(self, audio):
+        """Transcribe an in-memory AudioBuffer (or a WAV file path) using Deepgram API"""
         print("🔍 Transcribing speech...")
         
         try:
@@ -606,8 +641,13 @@ class EmotionBasedMovieRecommender:
                 "punctuate": "true"
             }
             
-            with open(file_path, "rb") as audio:
-                response = requests.post(url, headers=headers, params=params, data=audio.read())
+            if isinstance(audio, AudioBuffer):
+                audio_data = audio.to_wav_bytes()
+            else:
+                with open(audio, "rb") as audio_file:
+                    audio_data = audio_file.read()
+            
+            response = requests.post(url, headers=headers, params=params, data=audio_data)
             
             if response.status_code == 200:
                 data = response.json()
@@ -620,6 +660,21 @@ class EmotionBasedMovieRecommender:
             print(f"❌ Transcription error: {str(e)}")
             return None
     
+    def listen_and_transcribe(self, max_duration=6, on_speech_start=None):
+        """Stream microphone audio to Deepgram and return once speech ends"""
+        print(f"\n🎤 LISTENING FOR EMOTION ANALYSIS! Speak naturally for up to {max_duration} seconds...")
+        print("🗣️  Example: 'Hey Movie Buddy, I need something to cheer me up'")
+        transcript, audio_data = self.streaming_transcriber.listen(max_duration, on_speech_start=on_speech_start)
+        
+        if audio_data is None:
+            # Streaming unavailable - fall back to local recording + REST call
+            audio_buffer, audio_data = self.record_audio(max_duration)
+            if audio_buffer is None:
+                return None, None
+            transcript = self.transcribe_audio(audio_buffer)
+        
+        return transcript, audio_data
+    
     def analyze_user_emotion(self, audio_data):
         """Comprehensive emotion analysis"""
         print("🧠 Performing advanced emotion analysis...")
@@ -748,38 +803,59 @@ class EmotionBasedMovieRecommender:
         }
         return emotion_responses.get(self.user_emotion, emotion_responses['neutral'])
     
+    def capture_utterance(self):
+        """Capture one utterance for the conversation engine (None if nobody spoke)
+        
+        While awake the microphone is streamed to Deepgram as it records, and
+        the same int16 samples are kept for emotion analysis. While asleep the
+        utterance is only recorded, for on-device wake word spotting.
+        """
+        if self.is_awake and time.time() - self.last_activity > self.sleep_timeout:
+            self.is_awake = False
+            print("💤 Going to sleep due to inactivity. Say 'Hey Movie Buddy' to wake me up!")
+        
+        if not self.is_awake and self.wake_word_spotter.is_ready():
+            return self.vad_recorder.record(self.recording_duration, dtype='int16',
+                                            on_speech_start=self.engine.speech_started)
+        
+        transcript, audio_data = self.listen_and_transcribe(self.recording_duration, self.engine.speech_started)
+        if audio_data is None or not len(audio_data):
+            return None
+        if transcript and transcript.strip():
+            print(f"🗣️  You said: {transcript}")
+        else:
+            print("🔇 No speech detected - try speaking louder or closer to microphone")
+        return Utterance(audio_data, transcript)
+    
+    def transcribe_utterance(self, audio_data):
+        """Spot the wake word in an utterance recorded while asleep"""
+        phrase, distance = self.wake_word_spotter.detect(audio_data)
+        if phrase:
+            print(f"👂 Heard '{phrase}' (match distance: {distance:.2f})")
+        return phrase
+    
     def speak_text(self, text):
         """Text-to-speech with emotion-aware delivery"""
         if not text:
             return
         
         try:
-            self.is_speaking = True
             print(f"🔊 Responding with empathy...")
             
-            # Create temporary file for audio
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as fp:
-                temp_filename = fp.name
-            
             # Adjust speech based on detected emotion
-            slow_speech = self.user_emotion in ['sad', 'tired', 'stressed']
-            
-            # Generate speech using gTTS
-            tts = gTTS(text=text, lang='en', slow=slow_speech)
-            tts.save(temp_filename)
+            slow_speech = self.user_emotion in SLOW_EMOTIONS
             
-            # Play the audio
-            pygame.mixer.music.load(temp_filename)
-            pygame.mixer.music.set_volume(0.8 if self.user_emotion in ['tired', 'sad'] else 0.9)
-            pygame.mixer.music.play()
+            self.speaker.player.volume = 0.8 if self.user_emotion in ['tired', 'sad'] else 0.9
             
-            # Wait for playback to finish
-            while pygame.mixer.music.get_busy():
-                time.sleep(0.1)
+            if self.engine is not None and self.engine.is_running:
+                # The conversation engine speaks it while we keep listening
+                self.engine.say(text, slow=slow_speech)
+                return
             
-            # Clean up
-            pygame.mixer.music.unload()
-            os.unlink(temp_filename)
+            self.is_speaking = True
+            # Playback starts after the first sentence is ready; the rest is synthesised meanwhile
+            self.speaker.speak(text, slow=slow_speech)
+            self.speaker.wait()
             
         except Exception as e:
             print(f"❌ Speech error: {str(e)}")
@@ -805,19 +881,8 @@ class EmotionBasedMovieRecommender:
             if any(wake_word in user_input_clean for wake_word in self.wake_words):
                 self.is_awake = True
                 
-                # Emotion-aware greeting
-                greetings = {
-                    'sad': "Hello there. I can sense some sadness in your voice, and I'm here to help. I'm MovieBuddy AI with advanced emotion detection, and I specialize in finding movies that can help improve your mood. What would comfort you right now?",
-                    'happy': "Hello! Your positive energy is absolutely wonderful to hear! I'm MovieBuddy AI, and I love recommending movies that match and amplify great moods like yours. What kind of fantastic movie experience are you looking for?",
-                    'excited': "Hey there! I can feel your excitement through your voice! I'm MovieBuddy AI with emotion detection, and I'm thrilled to help you find movies that match your amazing energy. What adventure are you in the mood for?",
-                    'angry': "Hi there. I can detect some tension in your voice, and that's completely understandable. I'm MovieBuddy AI, and I specialize in recommending movies that can help you relax and feel better. What might help you unwind?",
-                    'calm': "Hello. I appreciate the peaceful energy in your voice. I'm MovieBuddy AI with emotion detection, and I love finding thoughtful movies for calm, reflective moods like yours. What kind of contemplative experience interests you?",
-                    'tired': "Hi there. You sound like you've had a long day. I'm MovieBuddy AI, and I understand when you need something gentle and easy to watch. What kind of comforting movie would help you relax?",
-                    'stressed': "Hello. I can hear some stress in your voice, and I want to help you find some relief. I'm MovieBuddy AI with emotion detection, and I specialize in stress-free entertainment. What would help you decompress?",
-                    'neutral': "Hello! I'm MovieBuddy AI with advanced emotion detection. I can analyze your voice to understand your mood and recommend perfect movies for exactly how you're feeling. What kind of movie experience are you looking for today?"
-                }
-                
-                response = greetings.get(self.user_emotion, greetings['neutral'])
+                # Emotion-aware greeting (pre-rendered in the phrase bank)
+                response = EMOTION_GREETINGS.get(self.user_emotion, EMOTION_GREETINGS['neutral'])
                 self.speak_text(response)
                 return
             else:
@@ -826,18 +891,7 @@ class EmotionBasedMovieRecommender:
         
         # Handle exit words
         if any(exit_word in user_input_clean for exit_word in self.exit_words):
-            goodbyes = {
-                'sad': "Take very good care of yourself. I hope the movies I recommended help bring some brightness to your day. Remember, tough times don't last, but resilient people like you do. Until next time, be gentle with yourself.",
-                'happy': "It's been absolutely delightful chatting with someone with such wonderful positive energy! Keep that beautiful spirit shining, and enjoy every moment of your movie experience!",
-                'excited': "What an incredibly energetic and fun conversation! Your enthusiasm is contagious! Have an absolutely amazing time with your movies, and keep that fantastic energy flowing!",
-                'angry': "I hope our conversation helped you feel a bit calmer. Take some time for yourself, enjoy those relaxing movies, and remember that it's okay to feel angry sometimes. Take care.",
-                'calm': "Thank you for such a peaceful and thoughtful conversation. Continue to embrace that beautiful tranquility, and enjoy your contemplative movie time.",
-                'tired': "Rest well, and I hope those gentle movies give you exactly the comfort and relaxation you need. Take care of yourself, and sweet dreams when the time comes.",
-                'stressed': "I hope I've helped reduce some of your stress today. Take some deep breaths, enjoy those calming movies, and remember that you deserve peace and relaxation.",
-                'neutral': "Thank you for this wonderful conversation! I hope my emotion-aware recommendations serve you well. Enjoy your movies, and remember I'm always here when you need mood-based suggestions!"
-            }
-            
-            response = goodbyes.get(self.user_emotion, goodbyes['neutral'])
+            response = EMOTION_GOODBYES.get(self.user_emotion, EMOTION_GOODBYES['neutral'])
             self.speak_text(response)
             self.conversation_active = False
             return
@@ -867,7 +921,7 @@ class EmotionBasedMovieRecommender:
             
         except Exception as e:
             print(f"❌ Error processing request: {str(e)}")
-            self.speak_text("I apologize, but I encountered an error while analyzing your emotional needs. Could you please try again?")
+            self.speak_text(ADVANCED_ERROR)
     
     def start_advanced_conversation(self):
         """Start the advanced emotion-aware conversation system"""
@@ -892,38 +946,18 @@ class EmotionBasedMovieRecommender:
             self.conversation_active = True
             
             # Initial greeting
-            greeting = "Welcome to the upgraded MovieBuddy AI! I now have enhanced emotion detection and FIXED recommendation algorithms. I can understand your feelings through your voice and suggest movies that truly match your emotional needs. Say 'Hey Movie Buddy' for personalized, therapeutic movie recommendations!"
-            self.speak_text(greeting)
-            
-            # Main conversation loop
-            while self.conversation_active:
-                # Check for sleep timeout
-                if self.is_awake and time.time() - self.last_activity > self.sleep_timeout:
-                    self.is_awake = False
-                    print("💤 Going to sleep due to inactivity. Say 'Hey Movie Buddy' to wake me up!")
-                
-                try:
-                    if not self.is_speaking:
-                        # Record and analyze audio
-                        audio_file, audio_data = self.record_audio(self.recording_duration)
-                        transcript = self.transcribe_audio(audio_file)
-                        
-                        if transcript and transcript.strip():
-                            print(f"🗣️  You said: {transcript}")
-                            self.process_user_input(transcript, audio_data)
-                        else:
-                            print("🔇 No speech detected - try speaking louder or closer to microphone")
-                        
-                        # Clean up
-                        if os.path.exists(audio_file):
-                            os.unlink(audio_file)
-                    
-                    time.sleep(0.5)
-                    
-                except Exception as e:
-                    print(f"❌ Loop error: {str(e)}")
-                    time.sleep(1)
-                
+            self.speak_text(ADVANCED_WELCOME)
+            
+            # Capture, STT, response and TTS run concurrently (barge-in with VOICE_BARGE_IN=1)
+            self.engine = ConversationEngine(
+                capture=self.capture_utterance,
+                transcribe=self.transcribe_utterance,
+                respond=self.process_user_input,
+                speaker=self.speaker,
+                is_active=lambda: self.conversation_active
+            )
+            asyncio.run(self.engine.run())
+            
         except KeyboardInterrupt:
             print("\n🛑 Shutting down Advanced MovieBuddy AI...")
         except Exception as e:
@@ -935,6 +969,7 @@ class EmotionBasedMovieRecommender:
         """Clean up resources"""
         try:
             self.conversation_active = False
+            self.engine = None
             if self.emotion_history:
                 print(f"\n📊 Session Summary: Detected {len(set(e['emotion'] for e in self.emotion_history))} different emotions")
             print("✅ Advanced MovieBuddy AI shutdown complete")
@@ -0,0 +1,244 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+from urllib.parse import quote
+
+# Optional build dependencies: without them the matching step is skipped
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+STATIC_DIR = 'static'
+ASSET_BUILD_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_NAME = 'manifest.json'
+
+# URL prefix the built assets are served under
+ASSETS_URL_PATH = '/assets'
+
+TEXT_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+# WebP widths generated for every image (posters are shown at card size, logos smaller)
+IMAGE_WIDTHS = (96, 342, 780)
+WEBP_QUALITY = 80
+
+# Files smaller than this aren't worth compressing
+MIN_COMPRESS_BYTES = 512
+
+# Fingerprinted files never change, so browsers may keep them for a year
+ASSET_MAX_AGE = 365 * 24 * 60 * 60
+
+# Preferred first when the browser accepts several
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def safe_stem(name):
+    """File stem usable in a URL without quoting ('Untitled design (2)' -> 'Untitled-design-2')"""
+    return re.sub(r'[^A-Za-z0-9_.-]+', '-', name).strip('-') or 'asset'
+
+
+def _compress(path, data):
+    """Write .gz (and .br when available) next to a text asset; returns the encodings written"""
+    encodings = []
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+        encodings.append('br')
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    encodings.append('gzip')
+    return encodings
+
+
+def _image_variants(source, out_dir, stem, digest, widths):
+    """Write resized WebP copies of an image; returns {width: filename}"""
+    variants = {}
+    with Image.open(source) as image:
+        image.load()
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        for width in widths:
+            if width >= image.width:
+                # Never upscale: the largest variant is the original size
+                width = image.width
+            if str(width) in variants:
+                continue
+            height = max(1, round(image.height * width / image.width))
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            name = f'{stem}.{digest}.w{width}.webp'
+            resized.save(os.path.join(out_dir, name), 'WEBP', quality=WEBP_QUALITY, method=6)
+            variants[str(width)] = name
+    return variants
+
+
+def build_assets(static_dir=STATIC_DIR, out_dir=ASSET_BUILD_DIR, widths=IMAGE_WIDTHS):
+    """Build every asset in static_dir into out_dir and write the manifest; returns it
+
+    Each file is copied under a content-hashed name. Text assets also get
+    .gz/.br siblings and images get resized WebP variants. A changed file
+    gets a new name, so the built files can be cached by browsers forever.
+    Run at deploy time with ``python assets.py`` (build.sh does).
+    """
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir)
+    out_name = os.path.relpath(out_dir, static_dir)
+
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        rel_root = os.path.relpath(root, static_dir)
+        # Don't descend into the build output itself
+        dirs[:] = sorted(d for d in dirs if os.path.normpath(os.path.join(rel_root, d)) != out_name)
+        for filename in sorted(files):
+            source = os.path.join(root, filename)
+            name = os.path.normpath(os.path.join(rel_root, filename)).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+
+            stem, ext = os.path.splitext(filename)
+            stem = safe_stem(stem)
+            digest = content_hash(data)
+            target_dir = os.path.join(out_dir, rel_root) if rel_root != '.' else out_dir
+            os.makedirs(target_dir, exist_ok=True)
+            built = f'{stem}.{digest}{ext.lower()}'
+            target = os.path.join(target_dir, built)
+            shutil.copyfile(source, target)
+
+            prefix = '' if rel_root == '.' else rel_root.replace(os.sep, '/') + '/'
+            entry = {'file': prefix + built}
+            if ext.lower() in TEXT_EXTENSIONS and len(data) >= MIN_COMPRESS_BYTES:
+                entry['encodings'] = _compress(target, data)
+            elif ext.lower() in IMAGE_EXTENSIONS and Image is not None:
+                try:
+                    variants = _image_variants(source, target_dir, stem, digest, widths)
+                    entry['variants'] = {width: prefix + file for width, file in variants.items()}
+                except Exception as e:
+                    print(f"⚠️ Couldn't resize {name}: {e}")
+            manifest[name] = entry
+
+    with open(os.path.join(out_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
+
+
+class AssetManifest:
+    """Maps source asset names to their built, fingerprinted URLs
+
+    Without a build (or with ``enabled=False``, as in development) every
+    name falls back to its plain /static/ URL, so templates work either way.
+    """
+
+    def __init__(self, build_dir=ASSET_BUILD_DIR, url_path=ASSETS_URL_PATH, enabled=True):
+        """Load the manifest from build_dir if there is one"""
+        self.build_dir = build_dir
+        self.url_path = url_path.rstrip('/')
+        self.entries = {}
+        if enabled:
+            try:
+                with open(os.path.join(build_dir, MANIFEST_NAME)) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                pass
+        # Built file -> (encodings available, content type of the original)
+        self.files = {}
+        for name, entry in self.entries.items():
+            self.files[entry['file']] = (tuple(entry.get('encodings', ())), mimetypes.guess_type(name)[0])
+            for variant in entry.get('variants', {}).values():
+                self.files[variant] = ((), 'image/webp')
+
+    def disable(self):
+        """Fall back to plain /static/ URLs (development serves the sources directly)"""
+        self.entries = {}
+        self.files = {}
+
+    @property
+    def enabled(self):
+        return bool(self.entries)
+
+    @staticmethod
+    def _name(name):
+        name = str(name)
+        for prefix in ('/static/', './static/', 'static/'):
+            if name.startswith(prefix):
+                return name[len(prefix):]
+        return name.lstrip('/')
+
+    def _plain_url(self, name):
+        return '/static/' + quote(name)
+
+    def url(self, name, width=None):
+        """URL of an asset; with ``width``, the smallest WebP variant at least that wide"""
+        name = self._name(name)
+        entry = self.entries.get(name)
+        if entry is None:
+            return self._plain_url(name)
+        variants = entry.get('variants')
+        if width and variants:
+            sizes = sorted(int(size) for size in variants)
+            size = next((size for size in sizes if size >= width), sizes[-1])
+            return f'{self.url_path}/{variants[str(size)]}'
+        return f'{self.url_path}/{entry["file"]}'
+
+    def srcset(self, name):
+        """srcset attribute value listing an image's WebP variants ('' when there are none)"""
+        entry = self.entries.get(self._name(name))
+        if not entry or not entry.get('variants'):
+            return ''
+        return ', '.join(f'{self.url_path}/{file} {size}w'
+                         for size, file in sorted(entry['variants'].items(), key=lambda item: int(item[0])))
+
+    def send(self, filename, request):
+        """Response for a built asset, precompressed if the browser accepts it
+
+        Returns None for names that aren't in the manifest.
+        """
+        from flask import send_from_directory
+
+        if filename not in self.files:
+            return None
+        encodings, mimetype = self.files[filename]
+        accepted = request.accept_encodings
+        path, encoding = filename, None
+        for name, suffix in ENCODINGS:
+            if name in encodings and accepted[name]:
+                path, encoding = filename + suffix, name
+                break
+        response = send_from_directory(self.build_dir, path, mimetype=mimetype or 'application/octet-stream',
+                                       max_age=ASSET_MAX_AGE, conditional=True)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if encodings:
+            response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+
+def main():
+    manifest = build_assets()
+    compressed = sum(1 for entry in manifest.values() if 'encodings' in entry)
+    resized = sum(1 for entry in manifest.values() if 'variants' in entry)
+    print(f"✅ Built {len(manifest)} assets into {ASSET_BUILD_DIR} "
+          f"({compressed} precompressed, {resized} with WebP variants)")
+    if brotli is None:
+        print("⚠️ brotli isn't installed - only gzip copies were written")
+    if Image is None:
+        print("⚠️ Pillow isn't installed - no WebP variants were written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import io
+import struct
+
+import numpy as np
+
+# WAVE_FORMAT_PCM from the RIFF spec
+WAVE_FORMAT_PCM = 1
+
+
+class AudioBuffer:
+    """Decoded audio held in memory as a NumPy array
+
+    Uploads are decoded straight from the request body. For 16-bit PCM WAV
+    (what the browser recorder and the assistants produce) the samples are a
+    view into the uploaded bytes, and the same bytes are sent to Deepgram, so
+    emotion analysis and speech-to-text share one buffer and nothing touches
+    the disk.
+    """
+
+    def __init__(self, samples, sample_rate, wav_bytes=None):
+        """Wrap an int16 or float array of shape (frames,) or (frames, channels)"""
+        self.samples = samples
+        self.sample_rate = int(sample_rate)
+        # Original RIFF bytes when the upload was already PCM16 WAV
+        self._wav_bytes = wav_bytes
+
+    @classmethod
+    def from_array(cls, audio_data, sample_rate):
+        """Wrap a recorded NumPy array"""
+        return cls(np.asarray(audio_data), sample_rate)
+
+    @classmethod
+    def from_upload(cls, file_storage):
+        """Decode a werkzeug FileStorage upload without saving it"""
+        return cls.from_stream(file_storage.stream)
+
+    @classmethod
+    def from_stream(cls, stream):
+        """Read a file-like object once and decode it"""
+        return cls.from_bytes(stream.read())
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Decode WAV bytes in place, or any other soundfile format from memory"""
+        data = bytes(data)
+        parsed = cls._parse_pcm16_wav(data)
+        if parsed is not None:
+            samples, sample_rate = parsed
+            return cls(samples, sample_rate, wav_bytes=data)
+
+        # Compressed or non-PCM16 formats - decode in memory with libsndfile
+        import soundfile as sf
+        samples, sample_rate = sf.read(io.BytesIO(data), dtype='float32')
+        return cls(samples, sample_rate)
+
+    @staticmethod
+    def _parse_pcm16_wav(data):
+        """Return (int16 view, sample_rate) for a PCM16 RIFF/WAVE file, else None"""
+        if len(data) < 12 or data[:4] != b'RIFF' or data[8:12] != b'WAVE':
+            return None
+
+        offset = 12
+        fmt = None
+        while offset + 8 <= len(data):
+            chunk_id, chunk_size = struct.unpack_from('<4sI', data, offset)
+            body = offset + 8
+            if chunk_id == b'fmt ':
+                fmt = struct.unpack_from('<HHIIHH', data, body)
+            elif chunk_id == b'data':
+                if fmt is None:
+                    return None
+                audio_format, channels, sample_rate, _, _, bits = fmt
+                if audio_format != WAVE_FORMAT_PCM or bits != 16:
+                    return None
+                # Browsers write 0/0xFFFFFFFF as the size while streaming
+                end = min(len(data), body + chunk_size) if chunk_size else len(data)
+                frames = (end - body) // (2 * channels)
+                samples = np.frombuffer(data, dtype='<i2', count=frames * channels, offset=body)
+                if channels > 1:
+                    samples = samples.reshape(frames, channels)
+                return samples, sample_rate
+            # Chunks are word aligned
+            offset = body + chunk_size + (chunk_size & 1)
+        return None
+
+    @property
+    def channels(self):
+        """Number of interleaved channels"""
+        return 1 if self.samples.ndim == 1 else self.samples.shape[1]
+
+    @property
+    def duration(self):
+        """Length in seconds"""
+        return len(self.samples) / self.sample_rate if self.sample_rate else 0.0
+
+    def __len__(self):
+        return len(self.samples)
+
+    def mono(self):
+        """First channel as a 1-D view (no copy)"""
+        return self.samples if self.samples.ndim == 1 else self.samples[:, 0]
+
+    def as_float(self):
+        """Mono float32 audio in [-1, 1] for feature extraction"""
+        mono = self.mono()
+        if mono.dtype == np.int16:
+            return mono.astype(np.float32) / 32768.0
+        return mono.astype(np.float32, copy=False)
+
+    def as_int16(self):
+        """Mono int16 audio"""
+        mono = self.mono()
+        if mono.dtype == np.int16:
+            return mono
+        return (np.clip(mono, -1.0, 1.0) * 32767).astype(np.int16)
+
+    def to_wav_bytes(self):
+        """Return a properly framed PCM16 WAV file built in memory"""
+        if self._wav_bytes is not None:
+            return self._wav_bytes
+
+        pcm = np.ascontiguousarray(self.as_int16(), dtype='<i2').tobytes()
+        header = struct.pack('<4sI4s4sIHHIIHH4sI',
+                             b'RIFF', 36 + len(pcm), b'WAVE',
+                             b'fmt ', 16, WAVE_FORMAT_PCM, 1, self.sample_rate,
+                             self.sample_rate * 2, 2, 16,
+                             b'data', len(pcm))
+        return header + pcm
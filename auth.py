@@ -0,0 +1,132 @@
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+# PBKDF2 cost for new hashes; raising it upgrades existing hashes at their next login
+PASSWORD_ITERATIONS = int(os.environ.get('PASSWORD_ITERATIONS', 100000))
+
+# Hashes computed at once, and how many more may wait before auth requests are refused
+HASH_WORKERS = int(os.environ.get('HASH_WORKERS', 2))
+HASH_QUEUE_LIMIT = int(os.environ.get('HASH_QUEUE_LIMIT', 16))
+
+# Longest a request waits for its hash
+HASH_TIMEOUT = 10.0
+
+ALGORITHM = 'pbkdf2_sha256'
+SALT_BYTES = 16
+
+# Hashes from before the algorithm was stored: 32-byte salt + digest, 100k iterations
+LEGACY_SALT_BYTES = 32
+LEGACY_ITERATIONS = 100000
+
+
+class AuthBusy(Exception):
+    """Raised when too many password hashes are queued or one waits past the timeout"""
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+def hash_password(password, iterations=None):
+    """Hash a password as 'pbkdf2_sha256$<iterations>$<salt>$<hash>'"""
+    iterations = iterations or PASSWORD_ITERATIONS
+    salt = os.urandom(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    return f'{ALGORITHM}${iterations}${_b64(salt)}${_b64(digest)}'
+
+
+def parse_hash(stored):
+    """Return (algorithm, iterations, salt, digest) for a stored hash, including legacy ones"""
+    if isinstance(stored, (bytes, bytearray, memoryview)):
+        stored = bytes(stored)
+        if not stored.startswith(ALGORITHM.encode('ascii')):
+            return 'legacy', LEGACY_ITERATIONS, stored[:LEGACY_SALT_BYTES], stored[LEGACY_SALT_BYTES:]
+        stored = stored.decode('ascii')
+    algorithm, iterations, salt, digest = stored.split('$')
+    return algorithm, int(iterations), base64.b64decode(salt), base64.b64decode(digest)
+
+
+def verify_password(stored, password):
+    """Check a password against a stored hash in constant time"""
+    try:
+        algorithm, iterations, salt, digest = parse_hash(stored)
+    except (ValueError, TypeError):
+        return False
+    if algorithm not in (ALGORITHM, 'legacy'):
+        return False
+    candidate = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    return hmac.compare_digest(candidate, digest)
+
+
+def needs_rehash(stored, iterations=None):
+    """True if a hash uses an old format or a different cost than the current setting"""
+    try:
+        algorithm, stored_iterations, _, _ = parse_hash(stored)
+    except (ValueError, TypeError):
+        return True
+    return algorithm != ALGORITHM or stored_iterations != (iterations or PASSWORD_ITERATIONS)
+
+
+class PasswordHasher:
+    """Caps how many password hashes the server computes at once
+
+    The calling request thread still waits for its hash; the pool only
+    bounds the CPU spent on hashing. At most ``workers`` hashes run at once
+    and ``queue_limit`` more wait; beyond that, or once a hash has waited
+    ``timeout`` seconds, AuthBusy is raised, so a login burst gets fast
+    refusals instead of tying up every server thread. A correct password
+    can therefore be refused while the pool is saturated.
+    """
+
+    def __init__(self, workers=HASH_WORKERS, queue_limit=HASH_QUEUE_LIMIT,
+                 iterations=PASSWORD_ITERATIONS, timeout=HASH_TIMEOUT):
+        """Initialize the hasher with its pool size, queue limit and cost"""
+        self.iterations = iterations
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+        # Verified when the account doesn't exist, so unknown emails take as long as wrong passwords
+        self._dummy_hash = hash_password('', iterations)
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise AuthBusy('Too many sign-in attempts right now - please try again shortly')
+
+        def task():
+            try:
+                return func(*args)
+            finally:
+                # Freed before the caller is woken, so it can hash again straight away
+                self._slots.release()
+
+        try:
+            future = self._executor.submit(task)
+        except Exception:
+            self._slots.release()
+            raise
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            # A hash that never started won't run task(), so free its slot here
+            if future.cancel():
+                self._slots.release()
+            raise AuthBusy('Sign-in is taking too long right now - please try again shortly') from None
+
+    def hash(self, password):
+        """Hash a new password at the configured cost"""
+        return self._run(hash_password, password, self.iterations)
+
+    def verify(self, stored, password):
+        """Check a password; returns (ok, new_hash) where new_hash is set if it should be upgraded"""
+        if stored is None:
+            self._run(verify_password, self._dummy_hash, password)
+            return False, None
+        if not self._run(verify_password, stored, password):
+            return False, None
+        if needs_rehash(stored, self.iterations):
+            return True, self.hash(password)
+        return True, None
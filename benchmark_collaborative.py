@@ -0,0 +1,69 @@
+"""Benchmark the item-item collaborative filter on synthetic rating loads
+
+    python benchmark_collaborative.py [n_ratings] [n_users] [n_items]
+
+Defaults to 1M ratings from 50k users over 10k movies, with movie popularity
+following a Zipf-like curve like real catalogues.
+"""
+import sys
+import time
+
+import numpy as np
+
+from collaborative import ItemItemCF, rating_weight
+
+
+def synthetic_ratings(n_ratings, n_users, n_items, seed=0):
+    """Yield (user, title, weight, source) with Zipf-distributed movie popularity"""
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, n_items + 1) ** 0.8
+    popularity /= popularity.sum()
+    users = rng.integers(0, n_users, n_ratings)
+    items = rng.choice(n_items, n_ratings, p=popularity)
+    stars = rng.integers(1, 6, n_ratings)
+    for user, item, rating in zip(users.tolist(), items.tolist(), stars.tolist()):
+        yield user, f'movie {item}', rating_weight(rating), 'rating'
+
+
+def percentiles(samples):
+    samples = np.array(samples) * 1000
+    return f"p50 {np.percentile(samples, 50):.3f} ms, p99 {np.percentile(samples, 99):.3f} ms, max {samples.max():.3f} ms"
+
+
+def main():
+    n_ratings = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    n_users = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    n_items = int(sys.argv[3]) if len(sys.argv) > 3 else 10000
+
+    print(f"🎬 {n_ratings:,} ratings, {n_users:,} users, {n_items:,} movies")
+    ratings = list(synthetic_ratings(n_ratings, n_users, n_items))
+
+    start = time.perf_counter()
+    model = ItemItemCF().fit(ratings)
+    print(f"📦 Batch fit: {time.perf_counter() - start:.2f} s "
+          f"({model.cooc.nnz:,} co-occurrence entries)")
+
+    rng = np.random.default_rng(1)
+    updates = list(synthetic_ratings(20000, n_users, n_items, seed=2))
+    timings = []
+    for row in updates:
+        start = time.perf_counter()
+        model.update(*row)
+        timings.append(time.perf_counter() - start)
+    print(f"✏️ Incremental update: {percentiles(timings)} (includes {model.compact_threshold:,}-entry compactions)")
+
+    start = time.perf_counter()
+    model.compact()
+    print(f"🗜️ Compaction: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    timings = []
+    queries = rng.integers(0, n_items, 2000)
+    for item in queries.tolist():
+        start = time.perf_counter()
+        model.similar(f'movie {item}')
+        timings.append(time.perf_counter() - start)
+    print(f"🔎 Query (top-50 neighbours): {percentiles(timings)}")
+
+
+if __name__ == "__main__":
+    main()
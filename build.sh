@@ -1 +1,5 @@
 export PYTHONUTF8=1
+python phrase_bank.py
+python assets.py
+python catalog_index.py
+python sentiment_model.py
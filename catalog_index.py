@@ -0,0 +1,119 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import normalize
+
+from model_store import MODEL_DIR, ModelStore, StringTable, save_store
+
+CATALOG_CSV = 'main_data.csv'
+CATALOG_INDEX_PATH = os.path.join(MODEL_DIR, 'catalog_index.npz')
+
+# Most similar movies kept per movie (recommendations show 10; the rest leave
+# room for collaborative-filtering blending to reorder them)
+CATALOG_TOP_K = int(os.environ.get('CATALOG_TOP_K', 50))
+
+# Rows of the similarity matrix computed at a time while building
+BUILD_CHUNK_ROWS = 512
+
+# Bump when the layout of the stored arrays changes
+INDEX_VERSION = 1
+
+
+def _source_stamp(csv_path):
+    stat = os.stat(csv_path)
+    return {'version': INDEX_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def build_catalog_index(csv_path=CATALOG_CSV, path=CATALOG_INDEX_PATH, top_k=CATALOG_TOP_K):
+    """Compute each movie's top-K content neighbours and write them to a model store
+
+    Same similarity as before (cosine over token counts of the 'comb'
+    column), but computed a block of rows at a time and cut down to the K
+    best per movie, so neither building nor serving ever holds the full
+    n x n matrix.
+    """
+    data = pd.read_csv(csv_path)
+    counts = CountVectorizer().fit_transform(data['comb'])
+    unit = normalize(counts.astype(np.float64), norm='l2', copy=False)
+    n = unit.shape[0]
+    k = min(top_k, n - 1)
+    topk_index = np.empty((n, k), dtype=np.int32)
+    topk_score = np.empty((n, k), dtype=np.float32)
+    for start in range(0, n, BUILD_CHUNK_ROWS):
+        stop = min(start + BUILD_CHUNK_ROWS, n)
+        block = (unit[start:stop] @ unit.T).toarray()
+        # A movie is never its own recommendation
+        block[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+        candidates = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(block, candidates, axis=1)
+        # Best first; ties in catalog order, as the old stable sort had them
+        order = np.lexsort((candidates, -scores), axis=1)
+        topk_index[start:stop] = np.take_along_axis(candidates, order, axis=1)
+        topk_score[start:stop] = np.take_along_axis(scores, order, axis=1)
+
+    arrays = {'topk_index': topk_index, 'topk_score': topk_score}
+    arrays.update(StringTable.build(data['movie_title']).arrays('titles'))
+    save_store(path, arrays, meta=dict(_source_stamp(csv_path), top_k=k))
+
+
+class CatalogIndex:
+    """Catalog titles and content neighbours, memory-mapped from a model store
+
+    Built by build_catalog_index(); every process (and every gunicorn
+    worker) maps the same file, so the catalog costs each of them a few
+    kilobytes of bookkeeping however many workers run.
+    """
+
+    def __init__(self, path=CATALOG_INDEX_PATH):
+        """Map the index at path"""
+        self.store = ModelStore(path)
+        self.titles = self.store.strings('titles')
+        self.topk_index = self.store['topk_index']
+        self.topk_score = self.store['topk_score']
+
+    @classmethod
+    def load(cls, csv_path=CATALOG_CSV, path=CATALOG_INDEX_PATH):
+        """Map the index, building it first if it's missing or older than the CSV"""
+        try:
+            index = cls(path)
+            if index.store.meta.get('top_k') == min(CATALOG_TOP_K, len(index.titles) - 1) and \
+                    all(index.store.meta.get(key) == value for key, value in _source_stamp(csv_path).items()):
+                return index
+        except (OSError, ValueError, KeyError):
+            pass
+        started = time.time()
+        build_catalog_index(csv_path, path)
+        print(f"🗂️ Built catalog index in {time.time() - started:.1f}s")
+        return cls(path)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def index_of(self, title):
+        """Position of a (lowercase) title, or None if it's not in the catalog"""
+        return self.titles.get(title)
+
+    def scores(self, index):
+        """Content-similarity row for one movie: its top-K neighbours, zero elsewhere"""
+        row = np.zeros(len(self.titles), dtype=np.float64)
+        row[self.topk_index[index]] = self.topk_score[index]
+        return row
+
+    def neighbours(self, index, count):
+        """Titles of the count movies most similar to one, best first"""
+        return [self.titles[int(i)] for i in self.topk_index[index][:count]]
+
+
+def main():
+    started = time.time()
+    build_catalog_index()
+    index = CatalogIndex()
+    print(f"✅ Built {CATALOG_INDEX_PATH}: {len(index)} movies, top {index.topk_index.shape[1]} neighbours each, "
+          f"{index.store.nbytes / 1e6:.1f} MB in {time.time() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
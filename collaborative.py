@@ -0,0 +1,230 @@
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+from scipy import sparse
+
+# Implicit-feedback weight of each signal (a user's weight for a movie is the strongest one)
+WATCHLIST_WEIGHT = 0.5
+
+# Share of the blended score that comes from collaborative filtering
+CF_BLEND_WEIGHT = 0.3
+
+# Pending co-occurrence updates folded into the compressed matrix once there are this many
+COMPACT_THRESHOLD = 200000
+
+# Neighbours considered when blending with the content similarity
+CF_NEIGHBOURS = 50
+
+# How often a worker picks up ratings stored by the other workers (seconds)
+CF_SYNC_INTERVAL = 60
+
+
+def normalise_title(title):
+    """Item key for a movie (matches the lower-cased titles in main_data.csv)"""
+    return str(title).strip().lower()
+
+
+def rating_weight(rating):
+    """Map a 1-5 star rating to an implicit weight (1-2 stars carry no signal)"""
+    return max(float(rating) - 2.0, 0.0) / 3.0
+
+
+class ItemItemCF:
+    """Item-item collaborative filter on a sparse co-occurrence matrix
+
+    The co-occurrence of items i and j is ``sum_u w[u,i] * w[u,j]`` over the
+    users who interacted with both, and their similarity is its cosine
+    normalisation. The bulk of the counts lives in a CSR matrix built in one
+    pass by fit(); each new rating or watchlist change only adds its deltas
+    against the user's other items (O(items the user has)) to a small
+    dict-of-dicts overlay, which is merged into the CSR matrix once it grows
+    past ``compact_threshold`` entries. Queries read one CSR row plus the
+    overlay row.
+    """
+
+    def __init__(self, compact_threshold=COMPACT_THRESHOLD):
+        """Initialize an empty model"""
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.item_ids = {}
+        self.items = []
+        self.user_items = defaultdict(dict)
+        self.signals = defaultdict(dict)
+        self.cooc = sparse.csr_matrix((0, 0), dtype=np.float64)
+        self.norms = np.zeros(0)
+        self.delta = defaultdict(lambda: defaultdict(float))
+        self.delta_size = 0
+        self.last_sync = 0.0
+
+    def __len__(self):
+        return len(self.items)
+
+    def _item_id(self, item):
+        item_id = self.item_ids.get(item)
+        if item_id is None:
+            item_id = len(self.items)
+            self.item_ids[item] = item_id
+            self.items.append(item)
+            if item_id >= len(self.norms):
+                self.norms = np.concatenate([self.norms, np.zeros(max(1024, len(self.norms)))])
+        return item_id
+
+    def fit(self, interactions):
+        """Build the model from scratch from (user, item, weight, source) tuples"""
+        with self._lock:
+            self._reset()
+            for user, item, weight, source in interactions:
+                self.signals[(user, self._item_id(normalise_title(item)))][source] = weight
+
+            rows, cols, values = [], [], []
+            user_index = {}
+            for (user, item_id), sources in self.signals.items():
+                weight = max(sources.values())
+                if weight <= 0:
+                    continue
+                self.user_items[user][item_id] = weight
+                rows.append(user_index.setdefault(user, len(user_index)))
+                cols.append(item_id)
+                values.append(weight)
+
+            matrix = sparse.csr_matrix((values, (rows, cols)), shape=(len(user_index), len(self.items)))
+            self.cooc = (matrix.T @ matrix).tocsr()
+            self.norms[:len(self.items)] = self.cooc.diagonal()
+            self.cooc.setdiag(0)
+            self.cooc.eliminate_zeros()
+        return self
+
+    def update(self, user, item, weight, source='rating'):
+        """Apply one signal change incrementally (weight 0 removes the signal)"""
+        with self._lock:
+            item_id = self._item_id(normalise_title(item))
+            sources = self.signals[(user, item_id)]
+            if weight > 0:
+                sources[source] = weight
+            else:
+                sources.pop(source, None)
+            new = max(sources.values()) if sources else 0.0
+            if not sources:
+                del self.signals[(user, item_id)]
+
+            user_items = self.user_items[user]
+            old = user_items.get(item_id, 0.0)
+            change = new - old
+            if change == 0:
+                return
+
+            for other_id, other_weight in user_items.items():
+                if other_id == item_id:
+                    continue
+                self.delta[item_id][other_id] += change * other_weight
+                self.delta[other_id][item_id] += change * other_weight
+                self.delta_size += 2
+            self.norms[item_id] += new * new - old * old
+
+            if new > 0:
+                user_items[item_id] = new
+            else:
+                user_items.pop(item_id, None)
+
+            if self.delta_size >= self.compact_threshold:
+                self.compact()
+
+    def compact(self):
+        """Merge the pending updates into the CSR matrix"""
+        with self._lock:
+            n = len(self.items)
+            rows, cols, values = [], [], []
+            for item_id, row in self.delta.items():
+                for other_id, value in row.items():
+                    rows.append(item_id)
+                    cols.append(other_id)
+                    values.append(value)
+            cooc = self.cooc
+            if cooc.shape != (n, n):
+                # Items first seen since the last compaction get their rows and columns now
+                cooc = cooc.copy()
+                cooc.resize((n, n))
+            self.cooc = (cooc + sparse.csr_matrix((values, (rows, cols)), shape=(n, n))).tocsr()
+            self.cooc.eliminate_zeros()
+            self.delta = defaultdict(lambda: defaultdict(float))
+            self.delta_size = 0
+
+    def similar(self, item, k=CF_NEIGHBOURS):
+        """Return up to k (item, cosine similarity) pairs, most similar first"""
+        with self._lock:
+            item_id = self.item_ids.get(normalise_title(item))
+            if item_id is None or self.norms[item_id] <= 0:
+                return []
+
+            # Scatter the CSR row and the pending updates into one dense row
+            scores = np.zeros(len(self.items))
+            if item_id < self.cooc.shape[0]:
+                start, end = self.cooc.indptr[item_id], self.cooc.indptr[item_id + 1]
+                scores[self.cooc.indices[start:end]] = self.cooc.data[start:end]
+            pending = self.delta.get(item_id)
+            if pending:
+                ids = np.fromiter(pending.keys(), dtype=np.int64, count=len(pending))
+                scores[ids] += np.fromiter(pending.values(), dtype=np.float64, count=len(pending))
+
+            ids = np.flatnonzero(scores > 1e-12)
+            if len(ids) == 0:
+                return []
+            cosine = scores[ids] / np.sqrt(self.norms[item_id] * np.maximum(self.norms[ids], 1e-12))
+            if len(ids) > k:
+                top = np.argpartition(-cosine, k)[:k]
+                ids, cosine = ids[top], cosine[top]
+            order = np.argsort(-cosine, kind='stable')
+            return [(self.items[ids[i]], float(cosine[i])) for i in order]
+
+    def load(self, user_store):
+        """Build the model from everything in the user store"""
+        started = time.time()
+        self.fit(signal_weights(user_store.interactions()))
+        self.last_sync = started
+        return self
+
+    def sync(self, user_store):
+        """Apply interactions other workers stored since the last sync
+
+        Re-applying this worker's own updates is a no-op, since update() sets
+        a weight rather than adding to it.
+        """
+        with self._lock:
+            since = self.last_sync
+            self.last_sync = time.time()
+            for user, item, weight, source in signal_weights(user_store.interactions(since=since)):
+                self.update(user, item, weight, source)
+
+    def maybe_sync(self, user_store, interval=CF_SYNC_INTERVAL):
+        """Sync if the last one was more than interval seconds ago"""
+        if time.time() - self.last_sync >= interval:
+            self.sync(user_store)
+
+
+def signal_weights(interactions):
+    """Turn stored (user, title, source, rating) rows into (user, title, weight, source)"""
+    for user, title, source, rating in interactions:
+        weight = rating_weight(rating) if source == 'rating' else WATCHLIST_WEIGHT
+        yield user, title, weight, source
+
+
+def blend_scores(content_scores, title_index, neighbours, weight=CF_BLEND_WEIGHT):
+    """Blend a content-similarity row with collaborative-filtering neighbours
+
+    ``content_scores`` is one row of the content similarity matrix,
+    ``title_index`` maps a normalised title to its position in that row and
+    ``neighbours`` is the output of ItemItemCF.similar().
+    """
+    if not neighbours or weight <= 0:
+        return content_scores
+    blended = np.asarray(content_scores, dtype=np.float64) * (1.0 - weight)
+    for title, score in neighbours:
+        index = title_index.get(title)
+        if index is not None:
+            blended[index] += weight * score
+    return blended
@@ -0,0 +1,186 @@
+import asyncio
+import collections
+import os
+
+# Let the user talk over a reply to stop it. Off by default: through speakers
+# the microphone hears the assistant's own voice, so only enable it with a headset
+BARGE_IN = os.environ.get('VOICE_BARGE_IN', '0') == '1'
+
+# What capture() returns when speech-to-text ran while it was listening
+Utterance = collections.namedtuple('Utterance', 'audio text')
+
+
+class ConversationEngine:
+    """Event-loop driven voice conversation with concurrent stages
+
+    Capture, speech-to-text, response generation and text-to-speech each run
+    as their own task, connected by asyncio queues::
+
+        capture -> audio_queue -> transcribe -> text_queue -> respond -> speech_queue -> speak
+
+    The blocking pieces (microphone, Deepgram, recommendation code, playback)
+    run in worker threads, so the microphone keeps listening while a reply is
+    being spoken and the next utterance can be transcribed while the previous
+    one is still being answered. Speech that starts while the assistant is
+    talking either cuts playback off as soon as it starts (barge-in) or, in
+    half-duplex mode, is dropped as a likely echo of the reply.
+
+    The stages are plain callables supplied by an assistant:
+
+    - ``capture()`` returns one utterance of audio, or None if nobody spoke;
+      a capture that streams to Deepgram returns an ``Utterance`` instead,
+      whose text is used as is. It should call ``speech_started()`` when it
+      detects speech onset
+    - ``transcribe(audio)`` returns text, or None to drop the utterance
+    - ``respond(text, audio)`` handles the turn and calls ``say()`` for replies
+    - ``is_active()`` returns False once the conversation should end
+    """
+
+    def __init__(self, capture, transcribe, respond, speaker, is_active, barge_in=BARGE_IN, queue_size=2):
+        """Initialize the engine with the stage callables and a PipelinedSpeaker"""
+        self.capture = capture
+        self.transcribe = transcribe
+        self.respond = respond
+        self.speaker = speaker
+        self.is_active = is_active
+        self.barge_in = barge_in
+        self.queue_size = queue_size
+        self.loop = None
+        self.audio_queue = None
+        self.text_queue = None
+        self.speech_queue = None
+        self._stopped = None
+        self._onset_over_reply = None
+
+    @property
+    def is_running(self):
+        """True while run() is in progress"""
+        return self.loop is not None
+
+    def say(self, text, **voice):
+        """Queue a reply (and speaker options such as slow=True) for the TTS stage
+
+        Safe to call from any thread.
+        """
+        if not text or self.loop is None:
+            return
+        self.loop.call_soon_threadsafe(self.speech_queue.put_nowait, (text, voice))
+
+    def speech_started(self):
+        """Tell the engine the user started talking (call from capture() at speech onset)
+
+        With barge-in, playback stops right away instead of once the whole
+        utterance has been recorded. Safe to call from any thread.
+        """
+        if self.loop is None:
+            return
+        self._onset_over_reply = self._replying()
+        if self._onset_over_reply and self.barge_in:
+            print("✋ Barge-in - stopping playback")
+            self.loop.call_soon_threadsafe(self._drop_queued_replies)
+            self.speaker.stop()
+
+    def _replying(self):
+        return self.speaker.is_speaking or not self.speech_queue.empty()
+
+    def _drop_queued_replies(self):
+        while not self.speech_queue.empty():
+            self.speech_queue.get_nowait()
+            self.speech_queue.task_done()
+
+    async def _interrupt_speech(self):
+        """Barge-in: drop replies that haven't started yet and stop playback"""
+        self._drop_queued_replies()
+        await self._in_thread(self.speaker.stop)
+
+    async def _in_thread(self, func, *args):
+        return await self.loop.run_in_executor(None, func, *args)
+
+    async def _capture_stage(self):
+        while not self._stopped.is_set():
+            self._onset_over_reply = None
+            try:
+                audio_data = await self._in_thread(self.capture)
+            except Exception as e:
+                print(f"❌ Capture error: {str(e)}")
+                await asyncio.sleep(1)
+                continue
+            if audio_data is None or self._stopped.is_set():
+                continue
+            over_reply = self._onset_over_reply
+            if over_reply is None:
+                # capture() didn't report the onset; judge by the state now
+                over_reply = self._replying()
+            if over_reply:
+                if not self.barge_in:
+                    # Half-duplex: ignore what the microphone heard while we talked
+                    continue
+                if self._replying():
+                    print("✋ Barge-in - stopping playback")
+                    await self._interrupt_speech()
+            await self.audio_queue.put(audio_data)
+
+    async def _transcribe_stage(self):
+        while True:
+            audio_data = await self.audio_queue.get()
+            try:
+                if isinstance(audio_data, Utterance):
+                    audio_data, text = audio_data
+                else:
+                    text = await self._in_thread(self.transcribe, audio_data)
+                if text and text.strip():
+                    await self.text_queue.put((text, audio_data))
+            except Exception as e:
+                print(f"❌ Transcription error: {str(e)}")
+            finally:
+                self.audio_queue.task_done()
+
+    async def _respond_stage(self):
+        while True:
+            text, audio_data = await self.text_queue.get()
+            try:
+                await self._in_thread(self.respond, text, audio_data)
+            except Exception as e:
+                print(f"❌ Error processing request: {str(e)}")
+            finally:
+                self.text_queue.task_done()
+            if not self.is_active():
+                self._stopped.set()
+
+    async def _speak_stage(self):
+        while True:
+            text, voice = await self.speech_queue.get()
+            try:
+                self.speaker.speak(text, **voice)
+                await self._in_thread(self.speaker.wait)
+            except Exception as e:
+                print(f"❌ Error speaking text: {str(e)}")
+            finally:
+                self.speech_queue.task_done()
+
+    async def run(self):
+        """Run the conversation until is_active() turns False"""
+        self.loop = asyncio.get_running_loop()
+        self.audio_queue = asyncio.Queue(self.queue_size)
+        self.text_queue = asyncio.Queue(self.queue_size)
+        self.speech_queue = asyncio.Queue()
+        self._stopped = asyncio.Event()
+
+        tasks = [asyncio.create_task(stage()) for stage in
+                 (self._capture_stage, self._transcribe_stage, self._respond_stage, self._speak_stage)]
+        try:
+            await self._stopped.wait()
+            # Let the last reply (e.g. the goodbye) finish playing
+            await self.speech_queue.join()
+            await self._in_thread(self.speaker.wait)
+        finally:
+            self._stopped.set()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.loop = None
+
+    def stop(self):
+        """Ask a running engine to finish (safe to call from any thread)"""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._stopped.set)
@@ -0,0 +1,286 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from user_store import USER_DB_PATH
+
+# Idle sessions are forgotten after this many seconds
+SESSION_TTL = 30 * 60
+
+# Upper bound on sessions held in memory (least recently used are dropped first)
+MAX_SESSIONS = 1000
+
+# Per-session history caps keep each session's memory bounded
+MAX_HISTORY = 20
+MAX_SESSION_RECOMMENDATIONS = 100
+
+# Shared conversations live in the same SQLite file as the accounts unless told otherwise
+CONVERSATION_DB_PATH = os.environ.get('CONVERSATION_DB_PATH', USER_DB_PATH)
+
+# Expired conversations are deleted at most this often (per process)
+SWEEP_INTERVAL = 10 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    sid TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    last_activity REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS conversations_last_activity ON conversations (last_activity);
+"""
+
+
+class ConversationState:
+    """Everything one voice user's conversation remembers between turns
+
+    The catalog, emotion profiles and models live on the shared assistant;
+    only this small, JSON-serialisable state is kept per session.
+    """
+
+    def __init__(self, is_awake=False, last_activity=None, conversation_history=None,
+                 session_recommendations=None, user_preferences=None, conversation_context=None):
+        self.is_awake = is_awake
+        self.last_activity = time.time() if last_activity is None else last_activity
+        self.conversation_history = conversation_history or []
+        # Titles already recommended this session (used to avoid repeats)
+        self.session_recommendations = session_recommendations or []
+        self.user_preferences = user_preferences or {}
+        self.conversation_context = conversation_context or {
+            'preferred_genres': [],
+            'disliked_genres': [],
+            'mood_history': [],
+            'last_recommendations': [],
+            'user_feedback': []
+        }
+        # Serialises concurrent requests from the same session
+        self.lock = threading.RLock()
+
+    def touch(self):
+        """Mark the session as active now"""
+        self.last_activity = time.time()
+
+    def record_turn(self, user_input, emotion, confidence, preferences, recommendations, response):
+        """Remember one turn, trimming history to its caps"""
+        titles = [movie['title'] for movie in recommendations]
+        context = self.conversation_context
+        context['mood_history'].append({'emotion': emotion, 'confidence': float(confidence), 'timestamp': time.time()})
+        del context['mood_history'][:-MAX_HISTORY]
+        if titles:
+            context['last_recommendations'] = titles
+            self.session_recommendations.extend(titles)
+            del self.session_recommendations[:-MAX_SESSION_RECOMMENDATIONS]
+
+        self.conversation_history.append({
+            'user': user_input,
+            'emotion': emotion,
+            'preferences': preferences,
+            'recommendations': titles,
+            'response': response,
+            'timestamp': time.time()
+        })
+        del self.conversation_history[:-MAX_HISTORY]
+        self.touch()
+
+    def to_dict(self):
+        """Plain-dict snapshot (JSON-serialisable)"""
+        return {
+            'is_awake': self.is_awake,
+            'last_activity': self.last_activity,
+            'conversation_history': self.conversation_history,
+            'session_recommendations': self.session_recommendations,
+            'user_preferences': self.user_preferences,
+            'conversation_context': self.conversation_context,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a state from to_dict() output"""
+        return cls(**data)
+
+    def to_json(self):
+        """Serialise the state to a JSON string"""
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls, text):
+        """Rebuild a state from to_json() output"""
+        return cls.from_dict(json.loads(text))
+
+
+class ConversationStore:
+    """Bounded, TTL-evicted map of session id -> ConversationState
+
+    Lets one shared assistant (catalog and models loaded once) serve many
+    concurrent voice users without their conversations leaking into each
+    other. Thread-safe; use ``with store.session(sid) as state:`` so two
+    requests from the same browser don't interleave.
+    """
+
+    def __init__(self, max_sessions=MAX_SESSIONS, ttl=SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+    def _expired(self, state, now):
+        return now - state.last_activity > self.ttl
+
+    def get(self, session_id):
+        """Return the state for session_id, creating a fresh one if it's new or expired"""
+        now = time.time()
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None or self._expired(state, now):
+                state = ConversationState()
+                self._sessions[session_id] = state
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+            return state
+
+    @contextmanager
+    def session(self, session_id):
+        """Yield the session's state with its lock held"""
+        state = self.get(session_id)
+        with state.lock:
+            try:
+                yield state
+            finally:
+                state.touch()
+
+    def put(self, session_id, state):
+        """Store a state (e.g. one restored from JSON)"""
+        with self._lock:
+            self._sessions[session_id] = state
+            self._sessions.move_to_end(session_id)
+            self._evict(time.time())
+
+    def discard(self, session_id):
+        """Forget a session"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _evict(self, now):
+        """Drop expired sessions, then the least recently used beyond max_sessions"""
+        # The oldest sessions are at the front, so stop at the first live one
+        while self._sessions:
+            session_id, state = next(iter(self._sessions.items()))
+            if not self._expired(state, now):
+                break
+            del self._sessions[session_id]
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def sweep(self):
+        """Remove expired sessions now"""
+        with self._lock:
+            self._evict(time.time())
+
+
+class SharedConversationStore:
+    """ConversationStore kept in SQLite, so every worker process sees the same conversations
+
+    gunicorn runs several workers and each runs a voice gateway on the shared
+    port, so a browser's WebSocket and its HTTP requests often reach different
+    processes. Each turn loads the session's row, runs with the state and
+    writes it back. Turns of one session are serialised within a process; if
+    two workers run a turn for the same session at the same moment, the one
+    that finishes last is the one kept.
+    """
+
+    def __init__(self, path=CONVERSATION_DB_PATH, ttl=SESSION_TTL, timeout=5.0, sweep_interval=SWEEP_INTERVAL):
+        """Initialize the store and create the schema if needed"""
+        self.path = path
+        self.ttl = ttl
+        self.timeout = timeout
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._session_locks = {}
+        self._last_sweep = 0.0
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+        self.sweep()
+
+    def connection(self):
+        """Return this thread's connection (reopened after a fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def __len__(self):
+        return self.connection().execute('SELECT COUNT(*) FROM conversations').fetchone()[0]
+
+    def __contains__(self, session_id):
+        return self._load(session_id) is not None
+
+    def _load(self, session_id):
+        row = self.connection().execute(
+            'SELECT data FROM conversations WHERE sid = ? AND last_activity > ?',
+            (session_id, time.time() - self.ttl)).fetchone()
+        return ConversationState.from_json(row[0]) if row else None
+
+    def get(self, session_id):
+        """Return the state for session_id, or a fresh one if it's new or expired"""
+        return self._load(session_id) or ConversationState()
+
+    @contextmanager
+    def _session_lock(self, session_id):
+        with self._lock:
+            entry = self._session_locks.setdefault(session_id, [threading.RLock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._session_locks[session_id]
+
+    @contextmanager
+    def session(self, session_id):
+        """Yield the session's state, then write it back"""
+        with self._session_lock(session_id):
+            state = self.get(session_id)
+            try:
+                yield state
+            finally:
+                state.touch()
+                self.put(session_id, state)
+
+    def put(self, session_id, state):
+        """Store a state"""
+        with self.connection() as conn:
+            conn.execute('INSERT INTO conversations (sid, data, last_activity) VALUES (?, ?, ?) '
+                         'ON CONFLICT (sid) DO UPDATE SET data = excluded.data, '
+                         'last_activity = excluded.last_activity',
+                         (session_id, state.to_json(), state.last_activity))
+        if time.time() - self._last_sweep >= self.sweep_interval:
+            self.sweep()
+
+    def discard(self, session_id):
+        """Forget a session"""
+        with self.connection() as conn:
+            conn.execute('DELETE FROM conversations WHERE sid = ?', (session_id,))
+
+    def sweep(self):
+        """Remove expired sessions now"""
+        with self.connection() as conn:
+            conn.execute('DELETE FROM conversations WHERE last_activity <= ?', (time.time() - self.ttl,))
+        self._last_sweep = time.time()
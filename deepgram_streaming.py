@@ -0,0 +1,218 @@
+import asyncio
+import json
+import os
+import queue
+import time
+from urllib.parse import urlencode
+
+import numpy as np
+import websockets
+
+from voice_activity import SpeechGate, VoiceActivityDetector
+
+# Deepgram live transcription endpoint
+DEEPGRAM_STREAMING_URL = "wss://api.deepgram.com/v1/listen"
+
+# Movie-related keywords for better recognition (same list the REST calls use)
+MOVIE_KEYWORDS = ['movie', 'film', 'action', 'comedy', 'drama', 'thriller', 'horror', 'romance',
+                  'adventure', 'fantasy', 'sci-fi', 'animation', 'documentary', 'musical', 'western',
+                  'crime', 'mystery', 'war', 'biography', 'sport', 'family']
+
+
+class DeepgramStreamingTranscriber:
+    """Streaming speech-to-text client for Deepgram's live WebSocket API
+
+    Audio is sent in small chunks while the user is still speaking. Deepgram's
+    endpointing marks the end of speech (``speech_final``) and the transcript is
+    returned straight away instead of waiting for a fixed-length recording.
+    """
+
+    def __init__(self, api_key=None, sample_rate=16000, channels=1, endpointing_ms=300,
+                 utterance_end_ms=1000, chunk_ms=100, model='nova-2', keywords=None,
+                 url=DEEPGRAM_STREAMING_URL, timeout=15):
+        """Initialize the streaming transcriber"""
+        self.api_key = api_key or os.environ.get('DEEPGRAM_API_KEY', '')
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.endpointing_ms = endpointing_ms
+        self.utterance_end_ms = utterance_end_ms
+        self.chunk_ms = chunk_ms
+        self.model = model
+        self.keywords = MOVIE_KEYWORDS if keywords is None else keywords
+        self.url = url
+        self.timeout = timeout
+
+    def build_url(self):
+        """Build the listen URL with the streaming query parameters"""
+        params = [
+            ('model', self.model),
+            ('language', 'en-US'),
+            ('encoding', 'linear16'),
+            ('sample_rate', self.sample_rate),
+            ('channels', self.channels),
+            ('smart_format', 'true'),
+            ('punctuate', 'true'),
+            ('interim_results', 'true'),
+            ('endpointing', self.endpointing_ms),
+            ('utterance_end_ms', self.utterance_end_ms),
+            ('vad_events', 'true'),
+        ]
+        params.extend(('keywords', keyword) for keyword in self.keywords)
+        return f"{self.url}?{urlencode(params)}"
+
+    def to_pcm16(self, audio_data):
+        """Convert an audio buffer to little-endian 16-bit PCM bytes"""
+        if isinstance(audio_data, (bytes, bytearray, memoryview)):
+            return bytes(audio_data)
+
+        audio_data = np.asarray(audio_data)
+        if audio_data.dtype != np.int16:
+            audio_data = (np.clip(audio_data, -1.0, 1.0) * 32767).astype(np.int16)
+        return audio_data.reshape(-1).astype('<i2', copy=False).tobytes()
+
+    def iter_chunks(self, audio_data):
+        """Split a recorded buffer into chunk_ms sized PCM chunks"""
+        pcm = self.to_pcm16(audio_data)
+        chunk_bytes = max(2, int(self.sample_rate * self.chunk_ms / 1000) * 2 * self.channels)
+        for start in range(0, len(pcm), chunk_bytes):
+            yield pcm[start:start + chunk_bytes]
+
+    async def _send_audio(self, ws, audio_chunks):
+        """Send audio chunks to Deepgram, then ask it to flush and close"""
+        try:
+            if hasattr(audio_chunks, '__aiter__'):
+                async for chunk in audio_chunks:
+                    await ws.send(self.to_pcm16(chunk))
+            else:
+                for chunk in audio_chunks:
+                    await ws.send(self.to_pcm16(chunk))
+                    # Give the receiver a chance to see endpointing results
+                    await asyncio.sleep(0)
+            await ws.send(json.dumps({'type': 'CloseStream'}))
+        except websockets.ConnectionClosed:
+            pass
+
+    async def transcribe_stream(self, audio_chunks, on_interim=None):
+        """Stream audio chunks and return the final transcript as soon as speech ends
+
+        ``audio_chunks`` may be a regular or async iterable of PCM bytes or
+        NumPy arrays. ``on_interim`` is called with each interim transcript.
+        """
+        final_parts = []
+
+        async with websockets.connect(self.build_url(), subprotocols=['token', self.api_key],
+                                      open_timeout=self.timeout) as ws:
+            sender = asyncio.create_task(self._send_audio(ws, audio_chunks))
+            try:
+                async for message in ws:
+                    if isinstance(message, bytes):
+                        continue
+                    data = json.loads(message)
+                    message_type = data.get('type')
+
+                    if message_type == 'UtteranceEnd':
+                        # Deepgram saw a gap in the words even without a speech_final
+                        if final_parts:
+                            break
+                        continue
+
+                    if message_type != 'Results':
+                        continue
+
+                    alternatives = data.get('channel', {}).get('alternatives', [])
+                    transcript = alternatives[0].get('transcript', '').strip() if alternatives else ''
+
+                    if data.get('is_final'):
+                        if transcript:
+                            final_parts.append(transcript)
+                        if data.get('speech_final') and final_parts:
+                            break
+                    elif transcript and on_interim:
+                        on_interim(' '.join(final_parts + [transcript]))
+            finally:
+                if not sender.done():
+                    sender.cancel()
+                try:
+                    await sender
+                except asyncio.CancelledError:
+                    pass
+
+        transcript = ' '.join(final_parts).strip()
+        return transcript or None
+
+    def transcribe(self, audio_data, on_interim=None):
+        """Transcribe an already recorded buffer over the streaming API"""
+        try:
+            return asyncio.run(asyncio.wait_for(
+                self.transcribe_stream(self.iter_chunks(audio_data), on_interim),
+                timeout=self.timeout))
+        except Exception as e:
+            print(f"❌ Streaming transcription error: {str(e)}")
+            return None
+
+    async def _listen(self, max_duration, on_interim, on_speech_start):
+        """Stream microphone audio until Deepgram reports the end of speech
+
+        Nothing is sent until the voice activity gate detects speech onset, so
+        silent listening windows never open a connection.
+        """
+        # Imported here so the client can be used without an audio device
+        import sounddevice as sd
+
+        audio_queue = queue.Queue()
+        captured = []
+        blocksize = int(self.sample_rate * self.chunk_ms / 1000)
+        gate = SpeechGate(VoiceActivityDetector(sample_rate=self.sample_rate), sample_rate=self.sample_rate)
+        deadline = time.time() + max_duration
+
+        def callback(indata, frames, time_info, status):
+            audio_queue.put(indata.copy())
+
+        async def gated_blocks():
+            """Yield utterance blocks from the gate until trailing silence or the deadline"""
+            while not gate.finished and time.time() < deadline:
+                try:
+                    block = audio_queue.get_nowait()
+                except queue.Empty:
+                    await asyncio.sleep(self.chunk_ms / 4000)
+                    continue
+                for emitted in gate.push(block):
+                    captured.append(emitted)
+                    yield emitted
+
+        with sd.InputStream(samplerate=self.sample_rate, channels=self.channels, dtype='int16',
+                            blocksize=blocksize, callback=callback):
+            blocks = gated_blocks()
+            try:
+                # Wait for speech onset before connecting to Deepgram
+                first_block = await blocks.__anext__()
+            except StopAsyncIteration:
+                return None, np.zeros(0, dtype=np.int16)
+            if on_speech_start:
+                on_speech_start()
+
+            async def utterance_chunks():
+                yield first_block
+                async for block in blocks:
+                    yield block
+
+            transcript = await self.transcribe_stream(utterance_chunks(), on_interim)
+
+        audio_data = np.concatenate(captured).reshape(-1)
+        return transcript, audio_data
+
+    def listen(self, max_duration=6, on_interim=None, on_speech_start=None):
+        """Capture from the microphone while streaming it to Deepgram
+
+        Returns ``(transcript, audio_data)`` where ``audio_data`` is the int16
+        audio that was sent, so callers can still run emotion analysis on it.
+        If nobody spoke, ``audio_data`` is empty and no request was made;
+        ``(None, None)`` means streaming itself failed. ``on_speech_start`` is
+        called once speech onset is detected, before anything is sent.
+        """
+        try:
+            return asyncio.run(asyncio.wait_for(self._listen(max_duration, on_interim, on_speech_start),
+                                                timeout=max_duration + self.timeout))
+        except Exception as e:
+            print(f"❌ Streaming transcription error: {str(e)}")
+            return None, None
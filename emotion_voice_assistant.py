@@ -12,6 +12,7 @@ from gtts import gTTS
 import pygame
 import re
 from datetime import datetime
+from tts_cache import TTSCache
 
 warnings.filterwarnings('ignore')
 
@@ -142,6 +143,9 @@ class EnhancedVoiceRecommender:
         self.channels = 1
         self.recording_duration = 6  # seconds - longer for better conversation
         
+        # Spoken phrases are synthesised once and replayed from disk
+        self.tts_cache = TTSCache()
+        
         # Load movie database
         print("Loading movie database...")
         self.load_movie_database()
@@ -353,16 +357,11 @@ class EnhancedVoiceRecommender:
             self.is_speaking = True
             print(f"🔊 Speaking: {text}")
             
-            # Create temporary file for audio
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as fp:
-                temp_filename = fp.name
-            
-            # Generate speech using gTTS
-            tts = gTTS(text=text, lang='en', slow=False)
-            tts.save(temp_filename)
+            # Reuse the cached clip when this phrase has been spoken before
+            audio_path = self.tts_cache.synthesize_path(text, lang='en', slow=False)
             
             # Play the audio
-            pygame.mixer.music.load(temp_filename)
+            pygame.mixer.music.load(audio_path)
             pygame.mixer.music.set_volume(0.9)
             pygame.mixer.music.play()
             
@@ -370,9 +369,8 @@ class EnhancedVoiceRecommender:
             while pygame.mixer.music.get_busy():
                 time.sleep(0.1)
             
-            # Clean up
+            # Release the cached file
             pygame.mixer.music.unload()
-            os.unlink(temp_filename)
             
         except Exception as e:
             print(f"Error in text-to-speech: {str(e)}")
@@ -16,6 +16,16 @@ import threading
 import queue
 from pathlib import Path
 import random
+from deepgram_streaming import DeepgramStreamingTranscriber
+from voice_activity import VADRecorder
+from wake_word import WakeWordSpotter
+from audio_buffer import AudioBuffer
+from tts_cache import TTSCache
+from pipelined_speaker import PipelinedSpeaker
+from conversation_engine import ConversationEngine, Utterance
+from conversation_store import ConversationState
+from phrase_bank import (PhraseBank, EMOTION_OPENINGS, FOLLOW_UPS, ENHANCED_INTRO, ENHANCED_AWAKE,
+                         ENHANCED_GOODBYE, ENHANCED_SLEEP)
 
 warnings.filterwarnings('ignore')
 
@@ -33,9 +43,8 @@ class EnhancedMovieBuddyAI:
         self.is_listening = False
         self.is_processing = False
         self.is_speaking = False
-        self.conversation_history = []
-        self.user_preferences = {}
-        self.session_recommendations = []
+        # Per-user conversation state; the web app passes a session's own state instead
+        self.state = ConversationState()
         
         # Initialize pygame for audio playback
         try:
@@ -48,6 +57,25 @@ class EnhancedMovieBuddyAI:
         self.channels = 1
         self.recording_duration = 6  # seconds
         
+        # Voice activity detection - capture starts on speech and stops on silence
+        self.vad_recorder = VADRecorder(sample_rate=self.sample_rate, channels=self.channels)
+        
+        # Spoken phrases are synthesised once and replayed from disk
+        self.tts_cache = TTSCache()
+        
+        # Speaks long responses sentence by sentence, synthesising ahead of playback
+        self.speaker = PipelinedSpeaker(self.tts_cache, tld='com', phrase_bank=PhraseBank(tld='com'))
+        
+        # Set while start_enhanced_conversation is running; replies are queued to its TTS stage
+        self.engine = None
+        
+        # Streaming speech-to-text (finishes as soon as the user stops talking)
+        self.streaming_transcriber = DeepgramStreamingTranscriber(
+            api_key=DEEPGRAM_API_KEY,
+            sample_rate=self.sample_rate,
+            channels=self.channels
+        )
+        
         # Advanced emotion detection system
         self.emotion_profiles = {
             'sad': {
@@ -98,14 +126,24 @@ class EnhancedMovieBuddyAI:
         self.last_activity = time.time()
         self.sleep_timeout = 45  # seconds
         
-        # Conversation context
-        self.conversation_context = {
-            'preferred_genres': [],
-            'disliked_genres': [],
-            'mood_history': [],
-            'last_recommendations': [],
-            'user_feedback': []
-        }
+        # On-device wake word spotting (active once templates are enrolled via wake_word.py)
+        self.wake_word_spotter = WakeWordSpotter(self.wake_words, sample_rate=self.sample_rate)
+    
+    @property
+    def conversation_history(self):
+        return self.state.conversation_history
+    
+    @property
+    def session_recommendations(self):
+        return self.state.session_recommendations
+    
+    @property
+    def user_preferences(self):
+        return self.state.user_preferences
+    
+    @property
+    def conversation_context(self):
+        return self.state.conversation_context
         
     def load_movie_database(self):
         """Load and enhance movie data from CSV file"""
@@ -319,23 +357,31 @@ class EnhancedMovieBuddyAI:
             print("💡 Try: 'Hey Movie Buddy, I want a funny movie to cheer me up'")
             print("🔊 " + "█" * 40)
             
-            audio = sd.rec(int(duration * self.sample_rate), 
-                          samplerate=self.sample_rate, 
-                          channels=self.channels)
-            sd.wait()
+            # Stops on trailing silence; None means nobody spoke
+            audio = self.vad_recorder.record(duration)
+            if audio is None:
+                return None
             
             print("✅ Recording finished. Processing your request...")
-            return audio.flatten()
+            return audio
             
         except Exception as e:
             print(f"❌ Error recording audio: {str(e)}")
             return None
     
     def transcribe_audio(self, audio_data):
-        """Transcribe audio using Deepgram API with enhanced processing"""
+        """Transcribe audio (NumPy array or AudioBuffer) using Deepgram API with enhanced processing"""
         try:
-            # Convert audio to bytes
-            audio_bytes = (audio_data * 32767).astype(np.int16).tobytes()
+            if not isinstance(audio_data, AudioBuffer):
+                audio_data = AudioBuffer.from_array(audio_data, self.sample_rate)
+            
+            # Don't pay for a remote call on a silent clip
+            if not self.vad_recorder.detector.contains_speech(audio_data.mono()):
+                print("🔇 No speech detected, skipping transcription")
+                return None
+            
+            # Properly framed WAV built in memory
+            audio_bytes = audio_data.to_wav_bytes()
             
             # Make request to Deepgram
             headers = {
@@ -379,30 +425,104 @@ class EnhancedMovieBuddyAI:
             print(f"❌ Error transcribing audio: {str(e)}")
             return None
     
+    def listen_and_transcribe(self, max_duration=6, on_speech_start=None):
+        """Stream microphone audio to Deepgram and stop as soon as speech ends"""
+        print(f"\n🎤 LISTENING NOW! Speak for up to {max_duration} seconds...")
+        print("💡 Try: 'Hey Movie Buddy, I want a funny movie to cheer me up'")
+        
+        transcript, audio_data = self.streaming_transcriber.listen(
+            max_duration,
+            on_interim=lambda text: print(f"   ✏️  {text}"),
+            on_speech_start=on_speech_start
+        )
+        
+        if audio_data is None:
+            # Streaming unavailable - fall back to local recording + REST call
+            audio_data = self.record_audio(max_duration)
+            if audio_data is None:
+                return None, None
+            return audio_data, self.transcribe_audio(audio_data)
+        
+        if not len(audio_data):
+            # Nobody spoke - nothing was sent to Deepgram
+            return None, None
+        
+        if transcript:
+            print(f"📝 Transcribed: '{transcript}'")
+        return audio_data, transcript
+    
+    def capture_utterance(self):
+        """Capture one utterance for the conversation engine (None if nobody spoke)
+        
+        While awake the microphone is streamed to Deepgram as it records, so
+        the transcript arrives with the audio. While asleep the utterance is
+        only recorded and the wake word is spotted on-device.
+        """
+        if self.is_awake and time.time() - self.last_activity > self.sleep_timeout:
+            self.is_awake = False
+            self.speak_text(ENHANCED_SLEEP)
+        
+        if not self.is_awake and self.wake_word_spotter.is_ready():
+            return self.vad_recorder.record(self.recording_duration, on_speech_start=self.engine.speech_started)
+        
+        audio_data, transcript = self.listen_and_transcribe(self.recording_duration, self.engine.speech_started)
+        if audio_data is None:
+            return None
+        if not transcript and self.is_awake:
+            print("🤔 I didn't catch that. Could you speak a bit louder or clearer?")
+        return Utterance(audio_data, transcript)
+    
+    def transcribe_utterance(self, audio_data):
+        """Spot the wake word in an utterance recorded while asleep"""
+        phrase, distance = self.wake_word_spotter.detect(audio_data)
+        if phrase:
+            print(f"👂 Heard '{phrase}' (match distance: {distance:.2f})")
+        return phrase
+    
+    def handle_turn(self, user_input, audio_data):
+        """Respond to one transcribed utterance"""
+        self.last_activity = time.time()
+        
+        # Check for wake word
+        if not self.is_awake:
+            if self.check_for_wake_word(user_input):
+                self.is_awake = True
+                self.speak_text(ENHANCED_AWAKE)
+            else:
+                print("💤 Sleeping... Say 'Hey Movie Buddy' to wake me up")
+            return
+        
+        # Check for exit
+        if self.check_for_exit_word(user_input):
+            self.speak_text(ENHANCED_GOODBYE)
+            self.conversation_active = False
+            return
+        
+        # Process the conversation
+        self.is_processing = True
+        try:
+            response = self.process_conversation_turn(user_input, audio_data)
+        finally:
+            self.is_processing = False
+        
+        # Speak the response
+        self.speak_text(response)
+    
     def speak_text(self, text):
         """Convert text to speech with enhanced audio quality"""
         try:
-            self.is_speaking = True
             print(f"\n🔊 MovieBuddy: {text}")
             
-            # Create TTS audio with optimized settings
-            tts = gTTS(text=text, lang='en', slow=False, tld='com')
+            if self.engine is not None and self.engine.is_running:
+                # The conversation engine speaks it while we keep listening
+                self.engine.say(text)
+                return
+            
+            self.is_speaking = True
+            # Playback starts after the first sentence is ready; the rest is synthesised meanwhile
+            self.speaker.speak(text)
+            self.speaker.wait()
             
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as tmp_file:
-                tts.save(tmp_file.name)
-                
-                # Play audio
-                pygame.mixer.music.load(tmp_file.name)
-                pygame.mixer.music.play()
-                
-                # Wait for playback to finish
-                while pygame.mixer.music.get_busy():
-                    time.sleep(0.1)
-                
-                # Clean up temporary file
-                os.unlink(tmp_file.name)
-                
         except Exception as e:
             print(f"❌ Error speaking text: {str(e)}")
         finally:
@@ -509,15 +629,21 @@ class EnhancedMovieBuddyAI:
         
         return score
     
-    def get_enhanced_recommendations(self, preferences, n_recommendations=3):
-        """Get enhanced movie recommendations with advanced scoring"""
+    def get_enhanced_recommendations(self, preferences, n_recommendations=3, state=None):
+        """Get enhanced movie recommendations with advanced scoring
+        
+        ``state`` is the ConversationState to read context from (defaults to
+        this assistant's own); the catalog itself is only read.
+        """
         if not self.movies:
             return []
         
+        state = state or self.state
+        
         # Score all movies
         scored_movies = []
         for movie in self.movies:
-            score = self.score_movie_match(movie, preferences, self.conversation_context)
+            score = self.score_movie_match(movie, preferences, state.conversation_context)
             scored_movies.append((movie, score))  # Include all movies, even with score 0
         
         # Sort by score and get top recommendations
@@ -537,8 +663,7 @@ class EnhancedMovieBuddyAI:
         used_directors = set()
         
         # Add previously recommended movies to avoid repetition
-        for prev_rec in self.session_recommendations:
-            used_titles.add(prev_rec['title'])
+        used_titles.update(state.session_recommendations)
         
         # Shuffle scored movies for more randomness
         import random
@@ -615,17 +740,8 @@ class EnhancedMovieBuddyAI:
         if not recommendations:
             return self._create_no_results_response(detected_emotion)
         
-        # Emotional opening based on detected emotion
-        emotion_openings = {
-            'sad': "I can sense you might be feeling a bit down. Let me suggest some movies that can help lift your spirits or provide the emotional connection you're looking for.",
-            'happy': "I love your positive energy! Here are some fantastic movies that will keep those good vibes flowing.",
-            'excited': "Your excitement is contagious! I've got some thrilling recommendations that will match your energy perfectly.",
-            'calm': "I appreciate your peaceful mood. Here are some wonderful films that will complement your serene state of mind.",
-            'stressed': "It sounds like you could use some relaxation. Let me recommend some movies that can help you unwind and escape.",
-            'neutral': "Great! I've analyzed your preferences and found some excellent movie recommendations for you."
-        }
-        
-        opening = emotion_openings.get(detected_emotion, emotion_openings['neutral'])
+        # Emotional opening based on detected emotion (pre-rendered in the phrase bank)
+        opening = EMOTION_OPENINGS.get(detected_emotion, EMOTION_OPENINGS['neutral'])
         
         response = f"{opening}\n\n"
         
@@ -657,14 +773,7 @@ class EnhancedMovieBuddyAI:
             response += "\n"
         
         # Add conversation continuers
-        follow_ups = [
-            "Would you like more details about any of these movies?",
-            "Should I suggest more options in a different genre?",
-            "Do any of these sound interesting to you?",
-            "Would you like me to find something more specific?"
-        ]
-        
-        response += f"\n{follow_ups[len(recommendations) % len(follow_ups)]}"
+        response += f"\n{FOLLOW_UPS[len(recommendations) % len(FOLLOW_UPS)]}"
         
         return response
     
@@ -696,47 +805,28 @@ class EnhancedMovieBuddyAI:
         text_lower = text.lower()
         return any(exit_word in text_lower for exit_word in self.exit_words)
     
-    def process_conversation_turn(self, user_input, audio_data):
+    def process_conversation_turn(self, user_input, audio_data, state=None):
         """Process a single conversation turn with emotion detection"""
+        state = state or self.state
         try:
             # Detect emotion from audio
             detected_emotion, confidence = self.detect_emotion_from_audio(audio_data)
             
             print(f"🧠 Detected emotion: {detected_emotion} (confidence: {confidence:.2f})")
             
-            # Store emotion in history
-            self.conversation_context['mood_history'].append({
-                'emotion': detected_emotion,
-                'confidence': confidence,
-                'timestamp': datetime.now()
-            })
-            
             # Extract preferences with emotion context
             preferences = self.extract_enhanced_preferences(user_input, detected_emotion)
             
             print(f"🎯 Extracted preferences: {preferences}")
             
             # Get recommendations
-            recommendations = self.get_enhanced_recommendations(preferences)
-            
-            # Update conversation context
-            if recommendations:
-                rec_titles = [movie['title'] for movie in recommendations]
-                self.conversation_context['last_recommendations'] = rec_titles
-                self.session_recommendations.extend(recommendations)
+            recommendations = self.get_enhanced_recommendations(preferences, state=state)
             
             # Format response
             response = self.format_empathetic_response(recommendations, preferences, detected_emotion)
             
-            # Store conversation
-            self.conversation_history.append({
-                'user': user_input,
-                'emotion': detected_emotion,
-                'preferences': preferences,
-                'recommendations': recommendations,
-                'response': response,
-                'timestamp': datetime.now()
-            })
+            # Store emotion, recommendations and the turn in the conversation state
+            state.record_turn(user_input, detected_emotion, confidence, preferences, recommendations, response)
             
             return response
             
@@ -757,65 +847,27 @@ class EnhancedMovieBuddyAI:
         print("="*60)
         
         try:
-            self.speak_text("Hello! I'm your enhanced MovieBuddy AI. I can detect your emotions and find perfect movies for you. Say 'Hey Movie Buddy' to start chatting!")
+            self.speak_text(ENHANCED_INTRO)
         except Exception as e:
             print(f"Initial greeting error: {e}")
         
         self.conversation_active = True
         self.last_activity = time.time()
         
-        while self.conversation_active:
-            try:
-                # Record audio
-                audio_data = self.record_audio(self.recording_duration)
-                
-                if audio_data is None:
-                    continue
-                
-                # Transcribe
-                user_input = self.transcribe_audio(audio_data)
-                
-                if not user_input:
-                    print("🤔 I didn't catch that. Could you speak a bit louder or clearer?")
-                    continue
-                
-                # Update activity time
-                self.last_activity = time.time()
-                
-                # Check for wake word or exit
-                if not self.is_awake:
-                    if self.check_for_wake_word(user_input):
-                        self.is_awake = True
-                        self.speak_text("Hi there! I'm awake and ready to help you find amazing movies. What are you in the mood for?")
-                        continue
-                    else:
-                        print("💤 Sleeping... Say 'Hey Movie Buddy' to wake me up")
-                        continue
-                
-                # Check for exit
-                if self.check_for_exit_word(user_input):
-                    self.speak_text("Thanks for chatting with me! I hope you find a great movie to watch. Goodbye!")
-                    break
-                
-                # Process the conversation
-                self.is_processing = True
-                response = self.process_conversation_turn(user_input, audio_data)
-                self.is_processing = False
-                
-                # Speak the response
-                self.speak_text(response)
-                
-                # Check for inactivity
-                if time.time() - self.last_activity > self.sleep_timeout:
-                    self.is_awake = False
-                    self.speak_text("I'm going to sleep now. Say 'Hey Movie Buddy' when you want to chat again!")
-                
-            except KeyboardInterrupt:
-                print("\n\n🛑 Conversation interrupted by user")
-                break
-            except Exception as e:
-                print(f"❌ Error in conversation loop: {str(e)}")
-                continue
+        # Capture, STT, response and TTS run concurrently (barge-in with VOICE_BARGE_IN=1)
+        self.engine = ConversationEngine(
+            capture=self.capture_utterance,
+            transcribe=self.transcribe_utterance,
+            respond=self.handle_turn,
+            speaker=self.speaker,
+            is_active=lambda: self.conversation_active
+        )
+        try:
+            asyncio.run(self.engine.run())
+        except KeyboardInterrupt:
+            print("\n\n🛑 Conversation interrupted by user")
+        finally:
+            self.engine = None
         
         self.conversation_active = False
         print("\n✅ Enhanced MovieBuddy AI session ended. Thanks for chatting!")
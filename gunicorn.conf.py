@@ -0,0 +1,78 @@
+import os
+
+# Concurrency model
+# -----------------
+# Almost every request spends its time waiting on TMDB, IMDB, Deepgram or
+# gTTS rather than computing, so each worker process runs a pool of threads
+# (gunicorn's gthread worker). A thread blocked on a socket releases the GIL,
+# so one worker serves ``threads`` slow-upstream requests at once instead of
+# one. Threads rather than gevent/asyncio because the app is thread-based
+# throughout: per-thread SQLite connections, lock-guarded caches, executor
+# pools for password hashing and details fetches, the voice gateway's event
+# loop thread and the multiprocessing voice worker pool, none of which
+# survive gevent's monkey-patching.
+#
+# - ``workers`` processes share nothing in memory; accounts, sessions and
+#   ratings live in SQLite (WAL), and the caches are rebuilt per process.
+# - Within a process, the details service fans each page out over its own
+#   fetch pool (DETAILS_FETCH_WORKERS), so upstream calls per process are
+#   capped however many requests are waiting.
+# - CPU-bound work (similarity, sentiment) still holds the GIL; add workers,
+#   not threads, for more of it.
+
+# Worker processes (one per core is a good start)
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+
+# Requests each worker serves concurrently
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', 32))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# A request slower than this (e.g. a stuck upstream) gets its worker restarted
+timeout = 60
+graceful_timeout = 30
+
+# Browsers fetch a page's assets over the same connection
+keepalive = 5
+
+# Warm-up
+# -------
+# The app is imported once in the master and workers are forked from it.
+# when_ready maps the catalog index and builds the assistant there first,
+# so no worker's first request pays for them. The catalog index is a
+# read-only memory-mapped file (model_store.py), so workers share its pages
+# through the OS page cache rather than copy-on-write pages that refcounting
+# would dirty. Set WARMUP_ENHANCED_AI=0 to leave the voice assistant to load
+# on first use.
+preload_app = True
+
+
+def when_ready(server):
+    """Build the shared read-only data in the master, before any worker is forked"""
+    import gc
+
+    import main
+
+    main.warm_up()
+    # Move everything loaded so far out of the collector's reach: a collection in a
+    # worker would otherwise write to (and so copy) every page holding these objects
+    gc.freeze()
+
+
+# Voice gateway
+# -------------
+# The full-duplex voice WebSocket (VOICE_WS_PORT, default 8765) runs in every
+# worker on the same port with SO_REUSEPORT, and the kernel spreads browser
+# connections across them. It has to start after the fork: its event loop
+# thread wouldn't survive it. Set VOICE_GATEWAY=0 to run without it (the
+# voice page then falls back to HTTP uploads).
+
+
+def post_worker_init(worker):
+    """Start this worker's voice WebSocket gateway"""
+    if os.environ.get('VOICE_GATEWAY', '1') == '0':
+        return
+    import main
+
+    main.start_voice_gateway(reuse_port=True)
@@ -1,33 +1,43 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, send_file, abort
 import pandas as pd
 import numpy as np
-import pickle
 import requests
 import time
 from bs4 import BeautifulSoup
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import json
 # Import the voice movie recommender
 from voice_movie_recommender import VoiceMovieRecommender
 from realtime_voice_recommender import RealTimeVoiceRecommender
 from enhanced_moviebuddy_ai import EnhancedMovieBuddyAI
+from audio_buffer import AudioBuffer
+from tts_cache import TTSCache
+from conversation_store import SharedConversationStore
+from user_store import UserStore
+from collaborative import ItemItemCF, WATCHLIST_WEIGHT, blend_scores, rating_weight
+from auth import PasswordHasher, AuthBusy
+from session_store import SessionStore, HybridSessionInterface
+from voice_gateway import VoiceGateway, VOICE_WS_PORT
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from voice_worker_pool import VoiceWorkerPool, VoicePoolFull
+from movie_details import MovieDetailsService, DetailsUnavailable
+from recommend_schema import SchemaError, decode_legacy_form, decode_recommend_request, dumps
+from page_cache import PageCache
+from assets import AssetManifest
+from catalog_index import CatalogIndex
+from sentiment_model import SentimentModel
 import os
-import hashlib
-import random
-import string
-from flask_session import Session
 from functools import wraps
 from datetime import datetime, timedelta
 import tempfile
 import asyncio
+import atexit
+import threading
+import uuid
 
-# Load NLP model and vectorizer for sentiment analysis
+# Load the sentiment model (TF-IDF + classifier arrays, memory-mapped from
+# models/sentiment.npz; exported from nlp_model.pkl/tranform.pkl if missing)
 try:
-    # load the nlp model and tfidf vectorizer from disk
-    filename = 'nlp_model.pkl'
-    clf = pickle.load(open(filename, 'rb'))
-    vectorizer = pickle.load(open('tranform.pkl', 'rb'))
+    sentiment_model = SentimentModel.load()
     sentiment_model_loaded = True
     print("Sentiment analysis model loaded successfully")
 except Exception as e:
@@ -49,17 +59,38 @@ voice_recommender = VoiceMovieRecommender()
 # Initialize the real-time voice recommender
 realtime_voice_recommender = None  # Will be initialized when needed
 
+# Warm real-time voice workers (started on the first launch request)
+voice_worker_pool = None
+voice_worker_pool_lock = threading.Lock()
+
 # Initialize the enhanced MovieBuddy AI
 enhanced_ai = None  # Will be initialized when needed
+enhanced_ai_lock = threading.Lock()
+
+# Per-session voice conversation state (the enhanced AI itself is shared read-only), kept in
+# SQLite so a browser's HTTP requests and its voice WebSocket share it whichever worker they reach
+conversation_store = SharedConversationStore()
+
+# Synthesised speech, cached on disk by content hash and served by URL
+tts_cache = TTSCache()
 
-def create_similarity():
-    data = pd.read_csv('main_data.csv')
-    # creating a count matrix
-    cv = CountVectorizer()
-    count_matrix = cv.fit_transform(data['comb'])
-    # creating a similarity score matrix
-    similarity = cosine_similarity(count_matrix)
-    return data, similarity
+# Catalog titles and their top content neighbours, memory-mapped from
+# models/catalog_index.npz (built from main_data.csv when missing or stale), so
+# every gunicorn worker shares one copy of it in the page cache
+catalog_index = None
+catalog_lock = threading.Lock()
+
+# Catalog titles for the search autocomplete
+suggestions = None
+
+def get_catalog_index():
+    """Return the CatalogIndex, mapping (and if needed building) it on first use"""
+    global catalog_index
+    if catalog_index is None:
+        with catalog_lock:
+            if catalog_index is None:
+                catalog_index = CatalogIndex.load()
+    return catalog_index
 
 
 def get_movies_by_mood(mood):
@@ -229,65 +260,102 @@ def get_movies_by_mood(mood):
 
 def rcmd(m):
     m = m.lower()
-    try:
-        data.head()
-        similarity.shape
-    except:
-        data, similarity = create_similarity()
-    if m not in data['movie_title'].unique():
+    index = get_catalog_index()
+    i = index.index_of(m)
+    if i is None:
         return (
             'Sorry! The movie you requested is not in our database. Please check the spelling or try with some other movies')
     else:
-        i = data.loc[data['movie_title'] == m].index[0]
-        lst = list(enumerate(similarity[i]))
-        lst = sorted(lst, key=lambda x: x[1], reverse=True)
-        lst = lst[1:11]  # excluding first item since it is the requested movie itself
-        l = []
-        for i in range(len(lst)):
-            a = lst[i][0]
-            l.append(data['movie_title'][a])
-        return l
+        # Blend in what users who liked this movie also rated or saved
+        item_cf.maybe_sync(user_store)
+        neighbours = item_cf.similar(m)
+        if not neighbours:
+            return index.neighbours(i, 10)
+        scores = blend_scores(index.scores(i), index.titles, neighbours)
+        scores[i] = -np.inf  # never the requested movie itself
+        top = np.argpartition(-scores, 10)[:10]
+        top = top[np.lexsort((top, -scores[top]))]
+        return [index.titles[a] for a in top]
 
 
-# converting list of string to list (eg. "["abc","def"]" to ["abc","def"])
-def convert_to_list(my_list):
-    my_list = my_list.split('","')
-    my_list[0] = my_list[0].replace('["', '')
-    my_list[-1] = my_list[-1].replace('"]', '')
-    return my_list
+def get_suggestions():
+    global suggestions
+    if suggestions is None:
+        suggestions = [title.capitalize() for title in get_catalog_index().titles]
+    return suggestions
 
 
-def get_suggestions():
-    data = pd.read_csv('main_data.csv')
-    return list(data['movie_title'].str.capitalize())
+def warm_up():
+    """Load everything requests would otherwise load lazily
+
+    Run by gunicorn in the master before it forks (preload_app), so workers
+    start with the catalog index mapped and the suggestions and assistant
+    already in memory. The sentiment model and mood dataset are loaded at
+    import.
+    """
+    started = time.time()
+    get_catalog_index()
+    get_suggestions()
+    if os.environ.get('WARMUP_ENHANCED_AI', '1') != '0':
+        get_enhanced_ai()
+    print(f"🔥 Warm-up finished in {time.time() - started:.1f}s")
 
 
 app = Flask(__name__)
-app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
-app.config['TEMPLATES_AUTO_RELOAD'] = True
-app.secret_key = os.environ.get('SECRET_KEY', ''.join(random.choice(string.ascii_letters + string.digits) for i in range(30)))
-app.config['SESSION_TYPE'] = 'filesystem'
-app.config['SESSION_PERMANENT'] = True
+# Development mode: templates reload on change and static files are never cached.
+# In production templates are compiled once and assets come from the fingerprinted build.
+DEV_MODE = os.environ.get('MOODFLIX_DEV') == '1' or os.environ.get('FLASK_DEBUG') == '1'
+
+def enable_dev_mode():
+    """Reload templates on change and serve plain, uncached /static/ files"""
+    app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
+    app.config['TEMPLATES_AUTO_RELOAD'] = True
+    app.jinja_env.auto_reload = True
+    asset_manifest.disable()
+
+# Fingerprinted, precompressed assets built by `python assets.py`
+asset_manifest = AssetManifest()
+app.jinja_env.globals.update(asset_url=asset_manifest.url, asset_srcset=asset_manifest.srcset)
+if DEV_MODE:
+    enable_dev_mode()
+# Anonymous sessions ride in a signed cookie; signed-in ones are rows in SQLite
+session_store = SessionStore()
+# Without SECRET_KEY, every worker uses one generated key kept in the session database
+app.secret_key = os.environ.get('SECRET_KEY') or session_store.shared_secret()
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=30)
-Session(app)
-
-# Simple user database simulation - in production, use a real database
-users_db = {}
-
-# User authentication
-def hash_password(password, salt=None):
-    """Hash a password with salt for secure storage"""
-    if salt is None:
-        salt = os.urandom(32)
-    pwdhash = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, 100000)
-    return salt + pwdhash
-
-def verify_password(stored_password, provided_password):
-    """Verify a stored password against one provided by user"""
-    salt = stored_password[:32]
-    stored_password = stored_password[32:]
-    pwdhash = hashlib.pbkdf2_hmac('sha256', provided_password.encode('utf-8'), salt, 100000)
-    return pwdhash == stored_password
+app.session_interface = HybridSessionInterface(
+    session_store, anonymous_cookies=os.environ.get('SESSION_ANONYMOUS_COOKIES', '1') != '0')
+
+# Accounts, watchlists and ratings (SQLite, shared by all workers)
+user_store = UserStore()
+
+# Item-item collaborative filter over the stored ratings and watchlists
+item_cf = ItemItemCF().load(user_store)
+
+def classify_reviews(reviews):
+    """Label review texts 'Good' or 'Bad' with the sentiment model (one batch)"""
+    if not sentiment_model_loaded:
+        return ['Unknown'] * len(reviews)
+    predictions = sentiment_model.predict(reviews)
+    return ['Good' if pred else 'Bad' for pred in predictions]
+
+# Details pages are assembled server-side from cached, concurrent TMDB/IMDB fetches
+movie_details_service = MovieDetailsService(rcmd, classify_reviews)
+
+# Rendered details and voice-results pages, validated with ETag/Last-Modified
+page_cache = PageCache(app.jinja_env)
+
+# User authentication - only a few hashes run at once; beyond that login bursts get 503s instead of tying up every thread
+password_hasher = PasswordHasher()
+
+def json_response(payload, status=200):
+    """JSON response encoded with the fast serialiser (handles the response dataclasses)"""
+    return app.response_class(dumps(payload), status=status, mimetype='application/json')
+
+def current_user():
+    """Return the logged-in user's account, or None"""
+    user_email = session.get('user_id')
+    return user_store.get_user(user_email) if user_email else None
 
 # Login required decorator
 def login_required(f):
@@ -369,6 +437,15 @@ def search_movie():
 @app.route("/recommend", methods=["POST"])
 def recommend():
     try:
+        # Typed JSON page model: validated once, answered with the model plus its reviews
+        if request.is_json:
+            try:
+                details = decode_recommend_request(request.get_data(cache=False))
+            except SchemaError as e:
+                return json_response({'success': False, 'error': str(e)}, 400)
+            details = details.with_reviews(movie_details_service.reviews(details.imdb_id))
+            return json_response({'success': True, 'movie': details})
+
         # Check if this is a direct search with just title
         if 'title' in request.form and len(request.form) == 1:
             title = request.form['title']
@@ -401,118 +478,15 @@ def recommend():
                                 error_message="Sorry! The movie you requested is not in our database. Please check the spelling or try with another movie.",
                                 suggestions=get_suggestions())
         
-        # Normal case (movie found) - existing code
-        # getting data from AJAX request
+        # Full page model posted as a form by older copies of recommend.js
         title = request.form.get('title', '')
-        
-        # Ensure all required fields are in the request
-        required_fields = ['cast_ids', 'cast_names', 'cast_chars', 'cast_bdays', 
-                           'cast_bios', 'cast_places', 'cast_profiles', 'imdb_id', 
-                           'poster', 'genres', 'overview', 'rating', 'vote_count', 
-                           'release_date', 'runtime', 'status', 'rec_movies', 'rec_posters']
-        
-        for field in required_fields:
-            if field not in request.form:
-                print(f"Missing required field in request: {field}")
-                return redirect(f'/?search={title}')
-        
-        # Continue with existing code - all fields present
-        cast_ids = request.form['cast_ids']
-        cast_names = request.form['cast_names']
-        cast_chars = request.form['cast_chars']
-        cast_bdays = request.form['cast_bdays']
-        cast_bios = request.form['cast_bios']
-        cast_places = request.form['cast_places']
-        cast_profiles = request.form['cast_profiles']
-        imdb_id = request.form['imdb_id']
-        poster = request.form['poster']
-        genres = request.form['genres']
-        overview = request.form['overview']
-        vote_average = request.form['rating']
-        vote_count = request.form['vote_count']
-        release_date = request.form['release_date']
-        runtime = request.form['runtime']
-        status = request.form['status']
-        rec_movies = request.form['rec_movies']
-        rec_posters = request.form['rec_posters']
-
-        # get movie suggestions for auto complete
-        suggestions = get_suggestions()
-
-        # call the convert_to_list function for every string that needs to be converted to list
-        rec_movies = convert_to_list(rec_movies)
-        rec_posters = convert_to_list(rec_posters)
-        cast_names = convert_to_list(cast_names)
-        cast_chars = convert_to_list(cast_chars)
-        cast_profiles = convert_to_list(cast_profiles)
-        cast_bdays = convert_to_list(cast_bdays)
-        cast_bios = convert_to_list(cast_bios)
-        cast_places = convert_to_list(cast_places)
-
-        # convert string to list (eg. "[1,2,3]" to [1,2,3])
-        cast_ids = cast_ids.split(',')
-        cast_ids[0] = cast_ids[0].replace("[", "")
-        cast_ids[-1] = cast_ids[-1].replace("]", "")
-
-        # rendering the string to python string
-        for i in range(len(cast_bios)):
-            cast_bios[i] = cast_bios[i].replace(r'\n', '\n').replace(r'\"', '\"')
-
-        # combining multiple lists as a dictionary which can be passed to the html file so that it can be processed easily and the order of information will be preserved
-        movie_cards = {rec_posters[i]: rec_movies[i] for i in range(len(rec_posters))}
-
-        casts = {cast_names[i]: [cast_ids[i], cast_chars[i], cast_profiles[i]] for i in range(len(cast_profiles))}
-
-        cast_details = {cast_names[i]: [cast_ids[i], cast_profiles[i], cast_bdays[i], cast_places[i], cast_bios[i]] for i in
-                        range(len(cast_places))}
-        print(f"calling imdb api: {'https://www.imdb.com/title/{}/reviews/?ref_=tt_ov_rt'.format(imdb_id)}")
-        # web scraping to get user reviews from IMDB site
-        url = f'https://www.imdb.com/title/{imdb_id}/reviews/?ref_=tt_ov_rt'
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/85.0.4183.83 Safari/537.36'}
-
-        response = requests.get(url, headers=headers)
-        print(response.status_code)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            soup_result = soup.find_all("div", {"class": "ipc-html-content-inner-div"})
-            print(soup_result)
-
-            reviews_list = []  # list of reviews
-            reviews_status = []  # list of comments (good or bad)
-            for reviews in soup_result:
-                if reviews.string:
-                    reviews_list.append(reviews.string)
-                    # passing the review to our model
-                    if sentiment_model_loaded:
-                        try:
-                            movie_review_list = np.array([reviews.string])
-                            movie_vector = vectorizer.transform(movie_review_list)
-                            pred = clf.predict(movie_vector)
-                            reviews_status.append('Good' if pred else 'Bad')
-                        except Exception as e:
-                            print(f"Error analyzing review: {e}")
-                            reviews_status.append('Unknown')
-                    else:
-                        # If model isn't loaded, just use a placeholder
-                        reviews_status.append('Unknown')
-
-            # combining reviews and comments into a dictionary
-            movie_reviews = {reviews_list[i]: reviews_status[i] for i in range(len(reviews_list))}
-
-            # passing all the data to the movie_details.html file
-            return render_template('movie_details.html', title=title, poster=poster, overview=overview,
-                               vote_average=vote_average,
-                               vote_count=vote_count, release_date=release_date, runtime=runtime, status=status,
-                               genres=genres,
-                               movie_cards=movie_cards, reviews=movie_reviews, casts=casts, cast_details=cast_details)
-        else:
-            print("Failed to retrieve reviews")
-            return render_template('movie_details.html', title=title, poster=poster, overview=overview,
-                               vote_average=vote_average,
-                               vote_count=vote_count, release_date=release_date, runtime=runtime, status=status,
-                               genres=genres,
-                               movie_cards=movie_cards, reviews={}, casts=casts, cast_details=cast_details)
+        try:
+            details = decode_legacy_form(request.form)
+        except SchemaError as e:
+            print(f"Invalid recommend form: {e}")
+            return redirect(f'/?search={title}')
+        details = details.with_reviews(movie_details_service.reviews(details.imdb_id))
+        return render_template('movie_details.html', **details.template_context())
     except Exception as e:
         print(f"Error in recommendation: {e}")
         return jsonify({'error': str(e)}), 500
@@ -529,155 +503,29 @@ def movie_details():
     title = request.args.get('title')
     print(f"Movie details requested for: '{title}'")
     
-    # Check if the movie exists in the database
-    print(f"Checking if movie '{title}' exists in database")
-    result = rcmd(title)
-    if isinstance(result, str) and "Sorry" in result:
-        print(f"Movie '{title}' not found in database")
-        # Movie not found - show error page
-        return render_template('recommend.html', 
-                              title=title,
-                              error_message="Sorry! The movie you requested is not in our database. Please check the spelling or try with another movie.",
-                              suggestions=get_suggestions())
-    
     try:
-        print(f"Movie '{title}' found, fetching details from TMDB API")
-        # Movie exists, get details using TMDB API
-        my_api_key = '3b9553fe71eb09a8552cecc1dfd02e92'
-        
-        # Step 1: Search for the movie to get its ID
-        search_url = f'https://api.themoviedb.org/3/search/movie?api_key={my_api_key}&query={title}'
-        print(f"Requesting movie search: {search_url}")
-        response = requests.get(search_url)
-        print(f"Search response status code: {response.status_code}")
-        
-        if response.status_code == 200 and response.json()['results']:
-            movie_data = response.json()['results'][0]
-            movie_id = movie_data['id']
-            print(f"Found movie ID: {movie_id}")
-            
-            # Step 2: Get detailed movie information
-            movie_url = f'https://api.themoviedb.org/3/movie/{movie_id}?api_key={my_api_key}'
-            movie_response = requests.get(movie_url)
-            
-            if movie_response.status_code == 200:
-                movie_details = movie_response.json()
-                
-                # Step 3: Get movie credits
-                credits_url = f'https://api.themoviedb.org/3/movie/{movie_id}/credits?api_key={my_api_key}'
-                credits_response = requests.get(credits_url)
-                
-                if credits_response.status_code == 200:
-                    credits_data = credits_response.json()
-                    
-                    # Process movie details
-                    imdb_id = movie_details.get('imdb_id', '')
-                    poster = f"https://image.tmdb.org/t/p/original{movie_details['poster_path']}" if movie_details.get('poster_path') else ""
-                    overview = movie_details.get('overview', '')
-                    genres = ", ".join([genre['name'] for genre in movie_details.get('genres', [])])
-                    vote_average = movie_details.get('vote_average', 0)
-                    vote_count = movie_details.get('vote_count', 0)
-                    release_date = movie_details.get('release_date', '')
-                    runtime = f"{movie_details.get('runtime', 0) // 60} hour(s) {movie_details.get('runtime', 0) % 60} min(s)"
-                    status = movie_details.get('status', '')
-                    
-                    # Process cast data
-                    cast_data = credits_data.get('cast', [])[:10]  # Get top 10 cast members
-                    cast_names = []
-                    cast_chars = []
-                    cast_profiles = []
-                    cast_ids = []
-                    
-                    for cast in cast_data:
-                        cast_names.append(cast['name'])
-                        cast_chars.append(cast['character'])
-                        profile_path = cast.get('profile_path', '')
-                        if profile_path:
-                            cast_profiles.append(f"https://image.tmdb.org/t/p/original{profile_path}")
-                        else:
-                            cast_profiles.append("https://via.placeholder.com/200x300")
-                        cast_ids.append(str(cast['id']))
-                    
-                    # Get similar movies
-                    similar_url = f'https://api.themoviedb.org/3/movie/{movie_id}/similar?api_key={my_api_key}'
-                    similar_response = requests.get(similar_url)
-                    
-                    rec_movies = []
-                    rec_posters = []
-                    
-                    if similar_response.status_code == 200:
-                        similar_data = similar_response.json()['results'][:10]
-                        for movie in similar_data:
-                            rec_movies.append(movie['title'])
-                            poster_path = movie.get('poster_path', '')
-                            if poster_path:
-                                rec_posters.append(f"https://image.tmdb.org/t/p/original{poster_path}")
-                            else:
-                                rec_posters.append("https://via.placeholder.com/200x300")
-                    
-                    # Create movie cards dictionary
-                    movie_cards = {rec_posters[i]: rec_movies[i] for i in range(len(rec_posters))}
-                    
-                    # Create casts dictionary
-                    casts = {cast_names[i]: [cast_ids[i], cast_chars[i], cast_profiles[i]] for i in range(len(cast_profiles))}
-                    
-                    # Get placeholder data for missing information
-                    cast_bdays = ["Not Available"] * len(cast_names)
-                    cast_bios = ["Biography not available"] * len(cast_names)
-                    cast_places = ["Not Available"] * len(cast_names)
-                    
-                    # Create cast_details dictionary
-                    cast_details = {cast_names[i]: [cast_ids[i], cast_profiles[i], cast_bdays[i], cast_places[i], cast_bios[i]] for i in range(len(cast_names))}
-                    
-                    # Get reviews if imdb_id is available
-                    reviews = {}
-                    
-                    if imdb_id:
-                        url = f'https://www.imdb.com/title/{imdb_id}/reviews/?ref_=tt_ov_rt'
-                        headers = {
-                            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/85.0.4183.83 Safari/537.36'
-                        }
-                        
-                        try:
-                            response = requests.get(url, headers=headers)
-                            if response.status_code == 200:
-                                soup = BeautifulSoup(response.content, 'html.parser')
-                                soup_result = soup.find_all("div", {"class": "ipc-html-content-inner-div"})
-                                
-                                reviews_list = []
-                                reviews_status = []
-                                
-                                for review in soup_result:
-                                    if review.string:
-                                        reviews_list.append(review.string)
-                                        reviews_status.append('Unknown')  # Simplified - skip sentiment analysis
-                                
-                                reviews = {reviews_list[i]: reviews_status[i] for i in range(len(reviews_list))}
-                        except Exception as e:
-                            print(f"Error fetching reviews: {e}")
-                    
-                    # Render the movie_details.html template with all the data
-                    return render_template('movie_details.html',
-                                       title=title,
-                                       poster=poster,
-                                       overview=overview,
-                                       vote_average=vote_average,
-                                       vote_count=vote_count,
-                                       release_date=release_date,
-                                       runtime=runtime,
-                                       status=status,
-                                       genres=genres,
-                                       movie_cards=movie_cards,
-                                       reviews=reviews,
-                                       casts=casts,
-                                       cast_details=cast_details)
-        
-        # If any API call fails, redirect to error
+        # Popular titles are served from the rendered-page cache (or answered with 304)
+        cache_key = page_cache.key('movie_details.html', title)
+        page = page_cache.get(cache_key)
+        if page is not None:
+            return page_cache.respond(page, request, app.response_class)
+
+        model = movie_details_service.page_model(title)
+        if model is None:
+            print(f"Movie '{title}' not found in database")
+            # Movie not found - show error page
+            return render_template('recommend.html', 
+                                  title=title,
+                                  error_message="Sorry! The movie you requested is not in our database. Please check the spelling or try with another movie.",
+                                  suggestions=get_suggestions())
+        page = page_cache.put(cache_key, render_template('movie_details.html', **model.template_context()))
+        return page_cache.respond(page, request, app.response_class)
+    except DetailsUnavailable as e:
+        print(f"Error in movie_details: {e}")
         return render_template('recommend.html',
                            title=title,
                            error_message="Sorry! We couldn't fetch the details for this movie. Please try another one.",
                            suggestions=get_suggestions())
-    
     except Exception as e:
         print(f"Error in movie_details: {e}")
         return render_template('recommend.html',
@@ -686,15 +534,39 @@ def movie_details():
                            suggestions=get_suggestions())
 
 
+@app.route("/api/movie_details", methods=["GET"])
+def api_movie_details():
+    """Return the whole details page model for a title in one response"""
+    title = request.args.get('title', '').strip()
+    if not title:
+        return jsonify({'success': False, 'error': 'No title provided'}), 400
+    try:
+        model = movie_details_service.page_model(title)
+    except DetailsUnavailable as e:
+        return jsonify({'success': False, 'error': str(e)}), 502
+    except Exception as e:
+        print(f"Error in api_movie_details: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+    if model is None:
+        return jsonify({'success': False, 'error': 'Sorry! The movie you requested is not in our database. '
+                                                   'Please check the spelling or try with another movie.'}), 404
+    return json_response({'success': True, 'movie': model, 'url': url_for('movie_details', title=title)})
+
+
 @app.route("/recommend", methods=["GET"])
 def recommend_redirect():
     # Check if this is a voice recommendation request
     if request.args.get('voice') == 'true':
-        print("Voice recommendation request - rendering recommend template with voice data")
-        return render_template('recommend.html', 
-                            title="Voice Recommendations",
-                            voice_recommendations=True,  # Flag to indicate voice recommendations
-                            suggestions=get_suggestions())
+        # The page is the same for everyone (the recommendations are filled in from sessionStorage)
+        cache_key = page_cache.key('recommend.html', 'voice recommendations')
+        page = page_cache.get(cache_key)
+        if page is None:
+            print("Voice recommendation request - rendering recommend template with voice data")
+            page = page_cache.put(cache_key, render_template('recommend.html', 
+                                title="Voice Recommendations",
+                                voice_recommendations=True,  # Flag to indicate voice recommendations
+                                suggestions=get_suggestions()))
+        return page_cache.respond(page, request, app.response_class)
     
     # For regular GET requests, render the recommend.html template with default content
     print("GET request to /recommend route - rendering recommend template")
@@ -725,40 +597,24 @@ def mood_recommendations():
                 'message': f"No movies found for mood: {mood}"
             })
         
+        # Posters for every movie are looked up at once (and cached), not one request after another
+        titles = list(mood_movies['movie_title'])
+        try:
+            results = movie_details_service.search_many(titles)
+        except Exception as e:
+            print(f"Error fetching TMDB data for {mood} movies: {e}")
+            results = [None] * len(titles)
+
         # Prepare movie data for response
         movies_data = []
-        for idx, movie in mood_movies.iterrows():
-            # Get poster and additional details if possible
-            movie_title = movie['movie_title']
-            movie_genres = movie['genres']
-            
-            # Call TMDB API to get movie poster
-            try:
-                my_api_key = '3b9553fe71eb09a8552cecc1dfd02e92'
-                tmdb_info = requests.get(f'https://api.themoviedb.org/3/search/movie?api_key={my_api_key}&query={movie_title}').json()
-                
-                if tmdb_info['results'] and len(tmdb_info['results']) > 0:
-                    poster_path = tmdb_info['results'][0]['poster_path']
-                    poster = f'https://image.tmdb.org/t/p/w500{poster_path}' if poster_path else '/static/default_poster.jpg'
-                    
-                    # Get movie id for linking
-                    movie_id = tmdb_info['results'][0]['id']
-                    
-                    movies_data.append({
-                        'title': movie_title,
-                        'poster': poster,
-                        'genres': movie_genres,
-                        'id': movie_id
-                    })
-            except Exception as e:
-                print(f"Error fetching TMDB data for {movie_title}: {e}")
-                # Still include the movie even without poster
-                movies_data.append({
-                    'title': movie_title,
-                    'poster': '/static/default_poster.jpg',
-                    'genres': movie_genres,
-                    'id': None
-                })
+        for (idx, movie), found in zip(mood_movies.iterrows(), results):
+            poster_path = found.get('poster_path') if found else None
+            movies_data.append({
+                'title': movie['movie_title'],
+                'poster': f'https://image.tmdb.org/t/p/w500{poster_path}' if poster_path else '/static/default_poster.jpg',
+                'genres': movie['genres'],
+                'id': found['id'] if found else None
+            })
         
         return render_template('recommend.html',
                            title=f"{mood} Movies",
@@ -791,34 +647,20 @@ def voice_recommend():
                 'error': 'Empty audio file'
             }), 400
             
-        # Save audio file temporarily
-        temp_dir = tempfile.mkdtemp()
-        temp_path = os.path.join(temp_dir, 'recording.wav')
-        audio_file.save(temp_path)
+        # Decode the upload in memory and transcribe it directly
+        audio_buffer = AudioBuffer.from_upload(audio_file)
+        transcript = voice_recommender.transcribe_audio(audio_buffer)
         
-        try:
-            # Process voice input and get recommendations
-            result = voice_recommender.voice_interaction()
-            
-            # Clean up temporary file
-            os.unlink(temp_path)
-            os.rmdir(temp_dir)
-            
-            if not result:
-                return jsonify({
-                    'success': False,
-                    'error': 'Could not process voice input'
-                }), 400
-                
-            return jsonify(result)
-            
-        except Exception as e:
-            # Clean up temporary file in case of error
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
-            if os.path.exists(temp_dir):
-                os.rmdir(temp_dir)
-            raise e
+        if not transcript:
+            return jsonify({
+                'success': False,
+                'error': 'Could not process voice input'
+            }), 400
+        
+        # Process the transcribed request and get recommendations
+        result = voice_recommender.handle_web_request('process_input', {'text': transcript})
+        result['transcript'] = transcript
+        return jsonify(result)
             
     except Exception as e:
         print(f"Error in voice_recommend: {str(e)}")
@@ -839,11 +681,18 @@ def login():
     email = request.form.get('email')
     password = request.form.get('password')
     
-    if email in users_db:
-        if verify_password(users_db[email]['password'], password):
-            session['user_id'] = email
-            session['user_name'] = users_db[email]['name']
-            return jsonify({'success': True, 'redirect': url_for('profile')})
+    user = user_store.get_user(email)
+    try:
+        valid, new_hash = password_hasher.verify(user['password'] if user else None, password or '')
+    except AuthBusy as e:
+        return jsonify({'success': False, 'message': str(e)}), 503
+    if valid:
+        # Upgrade hashes made with an older format or cost
+        if new_hash:
+            user_store.update_password(user['id'], new_hash)
+        session['user_id'] = email
+        session['user_name'] = user['name']
+        return jsonify({'success': True, 'redirect': url_for('profile')})
     return jsonify({'success': False, 'message': 'Invalid email or password'})
 
 @app.route('/register', methods=['POST'])
@@ -852,18 +701,17 @@ def register():
     password = request.form.get('password')
     name = request.form.get('name')
     
-    if email in users_db:
+    # Skip the expensive hash for emails that are already taken
+    if user_store.get_user(email):
         return jsonify({'success': False, 'message': 'Email already registered'})
     
     # Create new user with secure password hashing
-    users_db[email] = {
-        'name': name,
-        'password': hash_password(password),
-        'created_at': datetime.now(),
-        'watchlist': [],
-        'watched': [],
-        'ratings': {}
-    }
+    try:
+        password_hash = password_hasher.hash(password)
+    except AuthBusy as e:
+        return jsonify({'success': False, 'message': str(e)}), 503
+    if not user_store.create_user(email, name, password_hash):
+        return jsonify({'success': False, 'message': 'Email already registered'})
     
     session['user_id'] = email
     session['user_name'] = name
@@ -878,8 +726,8 @@ def logout():
 @login_required
 def profile():
     user_email = session.get('user_id')
-    if user_email and user_email in users_db:
-        user_data = users_db[user_email]
+    user_data = user_store.get_profile(user_email) if user_email else None
+    if user_data:
         return render_template('profile.html', user=user_data, email=user_email)
     return redirect(url_for('logout'))
 
@@ -888,19 +736,14 @@ def profile():
 @login_required
 def add_to_watchlist():
     movie_data = request.json
-    user_email = session.get('user_id')
+    user = current_user()
     
-    if not user_email or user_email not in users_db:
+    if not user:
         return jsonify({'success': False, 'message': 'User not found'})
     
-    # Initialize watchlist if it doesn't exist
-    if 'watchlist' not in users_db[user_email]:
-        users_db[user_email]['watchlist'] = []
-    
-    # Check if movie is already in watchlist
-    if not any(m.get('id') == movie_data.get('id') for m in users_db[user_email]['watchlist']):
-        movie_data['added_at'] = datetime.now()
-        users_db[user_email]['watchlist'].append(movie_data)
+    # The (user, movie) primary key rejects duplicates
+    if user_store.add_to_watchlist(user['id'], movie_data):
+        item_cf.update(user['id'], movie_data.get('title') or movie_data.get('id'), WATCHLIST_WEIGHT, 'watchlist')
         return jsonify({'success': True})
     return jsonify({'success': False, 'message': 'Movie already in watchlist'})
 
@@ -908,13 +751,14 @@ def add_to_watchlist():
 @login_required
 def remove_from_watchlist():
     movie_id = request.json.get('id')
-    user_email = session.get('user_id')
+    user = current_user()
     
-    if not user_email or user_email not in users_db:
+    if not user:
         return jsonify({'success': False, 'message': 'User not found'})
     
-    if 'watchlist' in users_db[user_email]:
-        users_db[user_email]['watchlist'] = [m for m in users_db[user_email]['watchlist'] if m.get('id') != movie_id]
+    removed = user_store.remove_from_watchlist(user['id'], movie_id)
+    if removed:
+        item_cf.update(user['id'], removed.get('title') or movie_id, 0, 'watchlist')
     return jsonify({'success': True})
 
 # Movie rating
@@ -923,19 +767,13 @@ def remove_from_watchlist():
 def rate_movie():
     movie_data = request.json
     rating = movie_data.pop('rating')
-    movie_id = movie_data.get('id')
-    user_email = session.get('user_id')
+    user = current_user()
     
-    if not user_email or user_email not in users_db:
+    if not user:
         return jsonify({'success': False, 'message': 'User not found'})
     
-    # Initialize ratings if it doesn't exist
-    if 'ratings' not in users_db[user_email]:
-        users_db[user_email]['ratings'] = {}
-    
-    movie_data['rating'] = rating
-    movie_data['rated_at'] = datetime.now()
-    users_db[user_email]['ratings'][movie_id] = movie_data
+    user_store.rate_movie(user['id'], movie_data, rating)
+    item_cf.update(user['id'], movie_data.get('title') or movie_data.get('id'), rating_weight(rating), 'rating')
     return jsonify({'success': True})
 
 # Mark movie as watched
@@ -944,8 +782,8 @@ def rate_movie():
 def mark_as_watched():
     """Mark a movie as watched for the current user"""
     try:
-        user_email = session.get('user_id')
-        if not user_email:
+        user = current_user()
+        if not user:
             return jsonify({'success': False, 'error': 'User not authenticated'}), 401
         
         data = request.get_json()
@@ -954,8 +792,11 @@ def mark_as_watched():
         if not movie_title:
             return jsonify({'success': False, 'error': 'Movie title is required'}), 400
         
-        # Here you would typically save to a database
-        # For now, we'll just return success
+        user_store.mark_watched(user['id'], {
+            'id': data.get('movie_id') or movie_title,
+            'title': movie_title,
+            'poster': data.get('poster', '')
+        })
         
         return jsonify({
             'success': True,
@@ -1013,21 +854,26 @@ def realtime_voice():
             'error': f'Error in real-time voice: {str(e)}'
         }), 500
 
+def get_voice_worker_pool():
+    """Return the shared voice worker pool, starting its warm workers on first use"""
+    global voice_worker_pool
+    if voice_worker_pool is None:
+        with voice_worker_pool_lock:
+            if voice_worker_pool is None:
+                voice_worker_pool = VoiceWorkerPool().start()
+                atexit.register(voice_worker_pool.stop)
+    return voice_worker_pool
+
 @app.route('/launch_realtime_voice')
 def launch_realtime_voice():
-    """Launch the real-time voice recommender as a separate process"""
+    """Hand a real-time voice conversation to a warm worker from the pool"""
     try:
-        import subprocess
-        import sys
-        
-        # Launch the real-time voice recommender in a separate process
-        process = subprocess.Popen([
-            sys.executable, 'test_realtime_voice.py'
-        ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        job_id = get_voice_worker_pool().submit()
         
         return jsonify({
             'success': True,
             'message': 'Real-time voice recommender launched!',
+            'job_id': job_id,
             'instructions': [
                 "Check your terminal/console for the voice interface",
                 "Say 'Hey Movie Buddy' to start chatting",
@@ -1035,12 +881,31 @@ def launch_realtime_voice():
             ]
         })
         
+    except VoicePoolFull as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
     except Exception as e:
         return jsonify({
             'success': False,
             'error': f'Error launching real-time voice: {str(e)}'
         }), 500
 
+@app.route('/realtime_voice_status')
+def realtime_voice_status():
+    """Report the voice worker pool and, with ?job=<id>, one conversation's state"""
+    pool = get_voice_worker_pool()
+    job_id = request.args.get('job')
+    job = pool.job(job_id) if job_id else None
+    if job_id and job is None:
+        return jsonify({'success': False, 'error': 'Unknown job'}), 404
+    return jsonify({
+        'success': True,
+        'pool': pool.status(),
+        'job': job
+    })
+
 @app.route('/voice_assistants')
 def voice_assistants():
     """Render the voice assistants page"""
@@ -1049,17 +914,47 @@ def voice_assistants():
 @app.route('/enhanced_voice')
 def enhanced_voice():
     """Render the enhanced voice interface"""
-    return render_template('enhanced_voice.html')
+    return render_template('enhanced_voice.html', voice_session_token=voice_session_token(), voice_ws_port=VOICE_WS_PORT)
+
+def get_enhanced_ai():
+    """Return the shared EnhancedMovieBuddyAI, loading it once on first use"""
+    global enhanced_ai
+    if enhanced_ai is None:
+        with enhanced_ai_lock:
+            if enhanced_ai is None:
+                enhanced_ai = EnhancedMovieBuddyAI()
+    return enhanced_ai
+
+def voice_session_id():
+    """Return this browser's voice conversation id, creating it on first use"""
+    if 'voice_session_id' not in session:
+        session['voice_session_id'] = uuid.uuid4().hex
+    return session['voice_session_id']
+
+# The voice WebSocket can't read the Flask session cookie, so the page hands it a
+# signed, expiring token naming this browser's voice session instead of the raw id
+VOICE_TOKEN_MAX_AGE = 24 * 60 * 60
+
+def voice_token_serializer():
+    return URLSafeTimedSerializer(app.secret_key, salt='voice-gateway-session')
+
+def voice_session_token():
+    """Signed token the voice gateway exchanges for this browser's voice session id"""
+    return voice_token_serializer().dumps(voice_session_id())
+
+def resolve_voice_token(token):
+    """Session id a voice token was issued for, or None if it is forged or expired"""
+    try:
+        return voice_token_serializer().loads(token, max_age=VOICE_TOKEN_MAX_AGE)
+    except BadSignature:
+        return None
 
 @app.route('/launch_enhanced_voice')
 def launch_enhanced_voice():
     """Initialize the enhanced MovieBuddy AI system for web interface"""
     try:
-        global enhanced_ai
-        
         # Initialize enhanced AI if not already done
-        if enhanced_ai is None:
-            enhanced_ai = EnhancedMovieBuddyAI()
+        get_enhanced_ai()
         
         return jsonify({
             'success': True,
@@ -1087,51 +982,148 @@ def launch_enhanced_voice():
             'message': 'Failed to initialize Enhanced MovieBuddy AI.'
         })
 
+def tts_audio_url(text):
+    """Return a URL for the spoken version of text, synthesising it only on a cache miss"""
+    key = tts_cache.synthesize_key(text)
+    return url_for('tts_audio', key=key)
+
+@app.route('/assets/<path:filename>')
+def built_asset(filename):
+    """Serve a fingerprinted asset with immutable cache headers (precompressed when accepted)"""
+    response = asset_manifest.send(filename, request)
+    if response is None:
+        abort(404)
+    return response
+
+
+@app.route('/tts/<key>.mp3')
+def tts_audio(key):
+    """Serve a cached TTS clip - the key is a content hash, so it never changes"""
+    if not TTSCache.is_valid_key(key):
+        abort(404)
+    path = tts_cache.get(key)
+    if path is None:
+        abort(404)
+    response = send_file(os.path.abspath(path), mimetype='audio/mpeg', conditional=True)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+def run_enhanced_turn(session_id, user_input, emotion, confidence):
+    """Answer one enhanced-voice turn in the session's own conversation state
+
+    Returns (preferences, recommendations, response). Shared by the HTTP API
+    and the voice WebSocket gateway.
+    """
+    enhanced_ai = get_enhanced_ai()
+    
+    # Each browser session has its own conversation state; the catalog and models are shared
+    with conversation_store.session(session_id) as state:
+        # Process the input with emotion context
+        preferences = enhanced_ai.extract_enhanced_preferences(user_input, emotion)
+        recommendations = enhanced_ai.get_enhanced_recommendations(preferences, n_recommendations=5, state=state)
+    
+        # If no recommendations found, get fallback recommendations
+        if not recommendations:
+            print("No specific matches found, getting popular movies...")
+            # Get some popular movies as fallback
+            fallback_preferences = {
+                'genres': ['Comedy', 'Action', 'Drama'],
+                'moods': ['entertaining', 'popular'],
+                'keywords': [],
+                'actors': [],
+                'directors': [],
+                'year_range': None,
+                'emotion': emotion,
+                'exclude': []
+            }
+            recommendations = enhanced_ai.get_enhanced_recommendations(fallback_preferences, n_recommendations=5, state=state)
+    
+        response = enhanced_ai.format_empathetic_response(recommendations, preferences, emotion)
+        state.record_turn(user_input, emotion, confidence, preferences, recommendations, response)
+    
+    return preferences, recommendations, response
+
+def format_recommendation_cards(recommendations, emotion):
+    """Format recommendations as the movie cards the voice page displays"""
+    formatted_recommendations = []
+    for movie in recommendations[:5]:  # Limit to top 5
+        # Format genres
+        genres = movie.get('genres', [])
+        if isinstance(genres, list):
+            genres_text = ', '.join(genres[:3])  # Top 3 genres
+        else:
+            genres_text = str(genres)
+        
+        # Format actors
+        actors = movie.get('actors', [])
+        if isinstance(actors, list):
+            actors_text = ', '.join(actors[:3])  # Top 3 actors
+        else:
+            actors_text = str(actors)
+        
+        # Format directors
+        directors = movie.get('directors', [])
+        if isinstance(directors, list):
+            directors_text = ', '.join(directors[:2])  # Top 2 directors
+        else:
+            directors_text = str(directors)
+        
+        formatted_recommendations.append({
+            'title': movie['title'],
+            'year': movie.get('year', 'N/A'),
+            'genres': genres_text or 'N/A',
+            'imdb_score': f"{movie.get('imdb_score', 0):.1f}" if movie.get('imdb_score') else 'N/A',
+            'actors': actors_text or 'N/A',
+            'directors': directors_text or 'N/A',
+            'mood': ', '.join(movie.get('mood', [])) if movie.get('mood') else 'N/A',
+            'description': f"Perfect for when you're feeling {emotion}!"
+        })
+    return formatted_recommendations
+
+def voice_gateway_respond(session_id, user_input, emotion, confidence):
+    """Turn handler for the voice WebSocket gateway: (cards, response)"""
+    preferences, recommendations, response = run_enhanced_turn(session_id, user_input, emotion, confidence)
+    return format_recommendation_cards(recommendations, emotion), response
+
+def voice_gateway_emotion(samples):
+    """Emotion detector for the voice WebSocket gateway"""
+    return get_enhanced_ai().detect_emotion_from_audio(samples)
+
+def start_voice_gateway(reuse_port=False):
+    """Serve full-duplex voice sessions over WebSocket next to the Flask app
+
+    Under gunicorn every worker runs one (see post_worker_init in
+    gunicorn.conf.py) on the shared VOICE_WS_PORT with ``reuse_port``.
+    """
+    gateway = VoiceGateway(voice_gateway_respond, detect_emotion=voice_gateway_emotion, tts_cache=tts_cache,
+                           resolve_session=resolve_voice_token, reuse_port=reuse_port)
+    gateway.start_in_thread()
+    return gateway
+
 @app.route('/api/enhanced_voice_recommend', methods=['POST'])
 def api_enhanced_voice_recommend():
     """API endpoint for enhanced voice recommendations with emotion detection"""
     try:
-        global enhanced_ai
-        
-        # Initialize enhanced AI if not already done
-        if enhanced_ai is None:
-            enhanced_ai = EnhancedMovieBuddyAI()
+        enhanced_ai = get_enhanced_ai()
+        confidence = 0.0
         
         # Check if it's a file upload (audio) or text input
         if 'audio' in request.files:
-            # Handle audio file upload
+            # Handle audio file upload - decoded in memory, no temp files
             audio_file = request.files['audio']
             
-            # Save the audio file temporarily
-            import tempfile
-            import soundfile as sf
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_audio:
-                audio_file.save(temp_audio.name)
+            try:
+                audio_buffer = AudioBuffer.from_upload(audio_file)
                 
-                # Process the audio file
-                try:
-                    # Load audio data as numpy array
-                    audio_data, sample_rate = sf.read(temp_audio.name)
-                    
-                    # Ensure audio is in the right format
-                    if len(audio_data.shape) > 1:
-                        audio_data = audio_data[:, 0]  # Take first channel if stereo
-                    
-                    # Extract emotion from audio features
-                    emotion, confidence = enhanced_ai.detect_emotion_from_audio(audio_data)
-                    
-                    # Transcribe the audio for text processing
-                    user_input = enhanced_ai.transcribe_audio(audio_data) or "I want a movie recommendation"
-                    
-                    # Clean up temp file
-                    os.unlink(temp_audio.name)
-                    
-                except Exception as audio_error:
-                    # Clean up temp file on error
-                    if os.path.exists(temp_audio.name):
-                        os.unlink(temp_audio.name)
-                    emotion = 'neutral'
-                    user_input = "I want a movie recommendation"
+                # Extract emotion from audio features
+                emotion, confidence = enhanced_ai.detect_emotion_from_audio(audio_buffer.as_float())
+                
+                # Transcribe the same buffer for text processing
+                user_input = enhanced_ai.transcribe_audio(audio_buffer) or "I want a movie recommendation"
+                
+            except Exception as audio_error:
+                emotion = 'neutral'
+                user_input = "I want a movie recommendation"
                     
         else:
             # Handle text input
@@ -1143,24 +1135,8 @@ def api_enhanced_voice_recommend():
             # Handle introduction request
             if user_input == 'introduction' and introduction_text:
                 try:
-                    # Generate audio for introduction only
-                    import tempfile
-                    from gtts import gTTS
-                    import base64
-                    
-                    tts = gTTS(text=introduction_text, lang='en', slow=False)
-                    
-                    with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as tmp_file:
-                        tts.save(tmp_file.name)
-                        
-                        # Read the audio file and encode as base64
-                        with open(tmp_file.name, 'rb') as audio_file:
-                            audio_data = audio_file.read()
-                            audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-                            audio_url = f"data:audio/mp3;base64,{audio_base64}"
-                        
-                        # Clean up temp file
-                        os.unlink(tmp_file.name)
+                    # Generate audio for introduction only (cached after the first request)
+                    audio_url = tts_audio_url(introduction_text)
                     
                     return jsonify({
                         'success': True,
@@ -1181,91 +1157,22 @@ def api_enhanced_voice_recommend():
                     'error': 'No input provided'
                 })
         
-        # Process the input with emotion context
-        preferences = enhanced_ai.extract_enhanced_preferences(user_input, emotion)
-        recommendations = enhanced_ai.get_enhanced_recommendations(preferences, n_recommendations=5)
-        
-        # If no recommendations found, get fallback recommendations
-        if not recommendations:
-            print("No specific matches found, getting popular movies...")
-            # Get some popular movies as fallback
-            fallback_preferences = {
-                'genres': ['Comedy', 'Action', 'Drama'],
-                'moods': ['entertaining', 'popular'],
-                'keywords': [],
-                'actors': [],
-                'directors': [],
-                'year_range': None,
-                'emotion': emotion,
-                'exclude': []
-            }
-            recommendations = enhanced_ai.get_enhanced_recommendations(fallback_preferences, n_recommendations=5)
-        
-        response = enhanced_ai.format_empathetic_response(recommendations, preferences, emotion)
+        preferences, recommendations, response = run_enhanced_turn(voice_session_id(), user_input, emotion, confidence)
         
         # Generate audio response
         audio_url = None
         try:
-            # Create TTS audio file for the response
-            import tempfile
-            from gtts import gTTS
-            import base64
-            
             # Create a shorter version for TTS
             tts_text = response[:200] + "..." if len(response) > 200 else response
             tts_text = tts_text.replace('**', '').replace('\n', ' ')  # Clean formatting
             
-            tts = gTTS(text=tts_text, lang='en', slow=False)
-            
-            with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as tmp_file:
-                tts.save(tmp_file.name)
-                
-                # Read the audio file and encode as base64
-                with open(tmp_file.name, 'rb') as audio_file:
-                    audio_data = audio_file.read()
-                    audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-                    audio_url = f"data:audio/mp3;base64,{audio_base64}"
-                
-                # Clean up temp file
-                os.unlink(tmp_file.name)
+            audio_url = tts_audio_url(tts_text)
                 
         except Exception as audio_error:
             print(f"Warning: Could not generate audio response: {audio_error}")
         
         # Format recommendations for web display
-        formatted_recommendations = []
-        for movie in recommendations[:5]:  # Limit to top 5
-            # Format genres
-            genres = movie.get('genres', [])
-            if isinstance(genres, list):
-                genres_text = ', '.join(genres[:3])  # Top 3 genres
-            else:
-                genres_text = str(genres)
-            
-            # Format actors
-            actors = movie.get('actors', [])
-            if isinstance(actors, list):
-                actors_text = ', '.join(actors[:3])  # Top 3 actors
-            else:
-                actors_text = str(actors)
-            
-            # Format directors
-            directors = movie.get('directors', [])
-            if isinstance(directors, list):
-                directors_text = ', '.join(directors[:2])  # Top 2 directors
-            else:
-                directors_text = str(directors)
-            
-            formatted_recommendations.append({
-                'title': movie['title'],
-                'year': movie.get('year', 'N/A'),
-                'genres': genres_text or 'N/A',
-                'imdb_score': f"{movie.get('imdb_score', 0):.1f}" if movie.get('imdb_score') else 'N/A',
-                'actors': actors_text or 'N/A',
-                'directors': directors_text or 'N/A',
-                'mood': ', '.join(movie.get('mood', [])) if movie.get('mood') else 'N/A',
-                'description': f"Perfect for when you're feeling {emotion}!"
-            })
+        formatted_recommendations = format_recommendation_cards(recommendations, emotion)
         
         return jsonify({
             'success': True,
@@ -1286,4 +1193,9 @@ def api_enhanced_voice_recommend():
         })
 
 if __name__ == '__main__':
+    enable_dev_mode()
+    # The debug reloader re-runs this file in a child process; only the child serves
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_voice_gateway()
+        get_voice_worker_pool()
     app.run(debug=True)
\ No newline at end of file
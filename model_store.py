@@ -0,0 +1,186 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import zipfile
+
+import numpy as np
+
+# Read-only model files (built at deploy time, memory-mapped by every worker)
+MODEL_DIR = os.environ.get('MODEL_DIR', 'models')
+
+META_KEY = '__meta__'
+
+# Zip local file header: signature ... name length, extra length
+_LOCAL_HEADER = struct.Struct('<4s22xHH')
+
+
+def save_store(path, arrays, meta=None):
+    """Write arrays (and JSON-able metadata) as an uncompressed .npz, atomically
+
+    Object arrays aren't allowed: everything must be plain numeric or byte
+    data so it can be used straight from the mapping.
+    """
+    arrays = dict(arrays)
+    for name, array in arrays.items():
+        if np.asarray(array).dtype.hasobject:
+            raise ValueError(f'{name} is an object array')
+    arrays[META_KEY] = np.frombuffer(json.dumps(meta or {}).encode('utf-8'), dtype=np.uint8)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.npz')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+        # mkstemp creates files only the owner can read; workers may run as another user
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class ModelStore:
+    """Read-only view of a store written by save_store(), backed by one mmap
+
+    The file is mapped once and every array is a NumPy view straight into
+    the mapping, so its pages live in the OS page cache: all worker
+    processes share one physical copy no matter how many there are or
+    whether they were forked, and nothing is copied into Python objects.
+    Only the small array headers are per process.
+    """
+
+    def __init__(self, path):
+        """Map a store file"""
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise
+        self.arrays = {}
+        with zipfile.ZipFile(self._file) as archive:
+            for info in archive.infolist():
+                if info.compress_type != zipfile.ZIP_STORED:
+                    raise ValueError(f'{info.filename} is compressed and cannot be mapped')
+                name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+                self.arrays[name] = self._view(info)
+        self.meta = json.loads(bytes(self.arrays.pop(META_KEY, b'{}')).decode('utf-8') or '{}')
+
+    def _view(self, info):
+        _, name_length, extra_length = _LOCAL_HEADER.unpack_from(self._map, info.header_offset)
+        start = info.header_offset + _LOCAL_HEADER.size + name_length + extra_length
+        self._file.seek(start)
+        version = np.lib.format.read_magic(self._file)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(self._file)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(self._file)
+        count = int(np.prod(shape))
+        array = np.frombuffer(self._map, dtype=dtype, count=count, offset=self._file.tell())
+        return array.reshape(shape, order='F' if fortran_order else 'C')
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def __contains__(self, name):
+        return name in self.arrays
+
+    def strings(self, name):
+        """The StringTable stored under a name"""
+        return StringTable.from_store(self, name)
+
+    @property
+    def nbytes(self):
+        return len(self._map)
+
+
+def string_hash(value):
+    """64-bit hash of a string, used to look strings up without a dict"""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class StringTable:
+    """A list of strings as flat arrays, with index lookups by value
+
+    Strings are one UTF-8 byte buffer plus offsets; lookups binary-search a
+    sorted array of 64-bit hashes. Neither needs a Python object per
+    string, so a table mapped from a ModelStore costs each process nothing
+    until a string is actually read.
+    """
+
+    def __init__(self, blob, offsets, hashes, order):
+        """Wrap the four arrays of a table (see build())"""
+        self.blob = blob
+        self.offsets = offsets
+        self.hashes = hashes
+        self.order = order
+
+    @classmethod
+    def build(cls, values):
+        """Build a table from an iterable of strings"""
+        encoded = [str(value).encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        hashes = np.array([string_hash(value.decode('utf-8')) for value in encoded], dtype=np.uint64)
+        order = np.argsort(hashes, kind='stable').astype(np.int32)
+        return cls(blob, offsets, hashes[order], order)
+
+    def arrays(self, name):
+        """Arrays to pass to save_store() for storing this table under a name"""
+        return {f'{name}.blob': self.blob, f'{name}.offsets': self.offsets,
+                f'{name}.hashes': self.hashes, f'{name}.order': self.order}
+
+    @classmethod
+    def from_store(cls, store, name):
+        return cls(store[f'{name}.blob'], store[f'{name}.offsets'], store[f'{name}.hashes'], store[f'{name}.order'])
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]]).decode('utf-8')
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def get(self, value, default=None):
+        """Index of the first entry equal to value, or default (same contract as dict.get)"""
+        target = np.uint64(string_hash(value))
+        position = int(np.searchsorted(self.hashes, target))
+        # Equal hashes are adjacent and in original order; check each in case of a collision
+        while position < len(self.hashes) and self.hashes[position] == target:
+            index = int(self.order[position])
+            if self[index] == value:
+                return index
+            position += 1
+        return default
+
+    def lookup(self, values):
+        """Indices of many strings at once, -1 for those not in the table
+
+        One vectorised search for the whole batch; only the hits are
+        decoded, to rule out hash collisions.
+        """
+        values = list(values)
+        result = np.full(len(values), -1, dtype=np.int64)
+        if not values or not len(self.hashes):
+            return result
+        targets = np.fromiter((string_hash(value) for value in values), dtype=np.uint64, count=len(values))
+        positions = np.minimum(np.searchsorted(self.hashes, targets), len(self.hashes) - 1)
+        for k in np.flatnonzero(self.hashes[positions] == targets):
+            index = int(self.order[positions[k]])
+            result[k] = index if self[index] == values[k] else self.get(values[k], -1)
+        return result
+
+    def __contains__(self, value):
+        return self.get(value) is not None
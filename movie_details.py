@@ -0,0 +1,262 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+from bs4 import BeautifulSoup
+
+from recommend_schema import NO_BIOGRAPHY, NOT_AVAILABLE, CastMember, MovieCard, MovieDetails, Review
+
+TMDB_API_KEY = os.environ.get('TMDB_API_KEY', '3b9553fe71eb09a8552cecc1dfd02e92')
+TMDB_API_URL = 'https://api.themoviedb.org/3'
+TMDB_IMAGE_URL = 'https://image.tmdb.org/t/p/original'
+PLACEHOLDER_IMAGE = 'https://via.placeholder.com/200x300'
+
+IMDB_REVIEWS_URL = 'https://www.imdb.com/title/{}/reviews/?ref_=tt_ov_rt'
+IMDB_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                  'Chrome/85.0.4183.83 Safari/537.36'}
+
+# Cast members shown on the details page
+MAX_CAST = 10
+
+# Upstream requests made at once while assembling a page, and how long each may take
+FETCH_WORKERS = int(os.environ.get('DETAILS_FETCH_WORKERS', 16))
+REQUEST_TIMEOUT = 10.0
+
+# Assembled pages and individual TMDB/IMDB responses are reused for this long
+DETAILS_CACHE_TTL = 6 * 60 * 60
+DETAILS_CACHE_SIZE = 512
+RESPONSE_CACHE_SIZE = 4096
+
+
+class DetailsUnavailable(Exception):
+    """Raised when the movie is in the catalog but its details couldn't be fetched"""
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ``ttl`` seconds"""
+
+    def __init__(self, max_size, ttl):
+        """Initialize an empty cache"""
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return a live value or None"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires <= time.time():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entries past max_size"""
+        with self._lock:
+            self._items[key] = (value, time.time() + self.ttl)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+def normalise_title(title):
+    """Cache key for a requested title"""
+    return ' '.join(str(title).split()).lower()
+
+
+def image_url(path):
+    """Full TMDB image URL, or the placeholder when there is no image"""
+    return f'{TMDB_IMAGE_URL}{path}' if path else PLACEHOLDER_IMAGE
+
+
+def format_date(value):
+    """'1999-03-31' -> 'Mar 31 1999' (as the page has always shown dates)"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%b %d %Y')
+    except (TypeError, ValueError):
+        return NOT_AVAILABLE
+
+
+def format_runtime(minutes):
+    """136 -> '2 hour(s) 16 min(s)'"""
+    minutes = int(minutes or 0)
+    hours, mins = divmod(minutes, 60)
+    return f'{hours} hour(s)' if mins == 0 else f'{hours} hour(s) {mins} min(s)'
+
+
+class MovieDetailsService:
+    """Assembles the movie details page model on the server
+
+    The page used to be built in the browser: a TMDB search, the /similarity
+    call, TMDB details, credits, one synchronous request per cast member and
+    one search per recommended movie, all then re-uploaded to /recommend as
+    a multi-KB form. Here the same data is fetched server-side with the
+    independent requests running concurrently, every TMDB/IMDB response is
+    cached, and the finished model is cached by normalised title, so a page
+    that was viewed recently costs no upstream requests at all.
+
+    ``recommend(title)`` returns the catalog recommendations (a list of
+    titles, or a string when the movie isn't in the catalog) and
+    ``classify_reviews(texts)`` returns 'Good'/'Bad' for each review.
+    """
+
+    def __init__(self, recommend, classify_reviews=None, api_key=TMDB_API_KEY, session=None,
+                 workers=FETCH_WORKERS, timeout=REQUEST_TIMEOUT, cache_ttl=DETAILS_CACHE_TTL):
+        """Initialize the service with the catalog recommender and optional sentiment classifier"""
+        self.recommend = recommend
+        self.classify_reviews = classify_reviews
+        self.api_key = api_key
+        if session is None:
+            session = requests.Session()
+            # One pooled keep-alive connection per fetch thread
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=workers)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self.session = session
+        self.timeout = timeout
+        self.pages = TTLCache(DETAILS_CACHE_SIZE, cache_ttl)
+        self.responses = TTLCache(RESPONSE_CACHE_SIZE, cache_ttl)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='movie-details')
+
+    # Upstream requests
+
+    def _fetch(self, url, params=None, headers=None, parse='json'):
+        """GET a URL through the response cache; returns the parsed body or None"""
+        key = (url, tuple(sorted((params or {}).items())))
+        cached = self.responses.get(key)
+        if cached is not None:
+            return cached
+        try:
+            response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"Error fetching {url}: {e}")
+            return None
+        if response.status_code != 200:
+            print(f"{url} returned {response.status_code}")
+            return None
+        body = response.json() if parse == 'json' else response.content
+        self.responses.set(key, body)
+        return body
+
+    def _tmdb(self, path, **params):
+        return self._fetch(f'{TMDB_API_URL}{path}', dict(params, api_key=self.api_key))
+
+    def search(self, title):
+        """Return the top TMDB search result for a title, or None"""
+        found = self._tmdb('/search/movie', query=title)
+        results = (found or {}).get('results') or []
+        return results[0] if results else None
+
+    def search_many(self, titles):
+        """Top TMDB search result for each title (None where there is none), fetched concurrently
+
+        Call from request threads only: it waits on the service's own pool.
+        """
+        jobs = [self._executor.submit(self.search, title) for title in titles]
+        return [job.result() for job in jobs]
+
+    def poster_for(self, title):
+        """Poster URL of a recommended movie"""
+        movie = self.search(title)
+        return image_url(movie.get('poster_path') if movie else None)
+
+    def person(self, cast):
+        """One cast member with the biography fields from their TMDB person record"""
+        person = self._tmdb(f"/person/{cast['id']}") or {}
+        return CastMember(
+            id=str(cast['id']),
+            name=cast.get('name', ''),
+            character=cast.get('character') or '',
+            profile=image_url(cast.get('profile_path')),
+            birthday=format_date(person.get('birthday')),
+            place_of_birth=person.get('place_of_birth') or NOT_AVAILABLE,
+            biography=person.get('biography') or NO_BIOGRAPHY,
+        )
+
+    def reviews(self, imdb_id):
+        """IMDB user reviews with their sentiment"""
+        if not imdb_id:
+            return []
+        page = self._fetch(IMDB_REVIEWS_URL.format(imdb_id), headers=IMDB_HEADERS, parse='content')
+        if page is None:
+            return []
+        soup = BeautifulSoup(page, 'html.parser')
+        texts = [str(div.string) for div in soup.find_all('div', {'class': 'ipc-html-content-inner-div'}) if div.string]
+        statuses = ['Unknown'] * len(texts)
+        if texts and self.classify_reviews is not None:
+            try:
+                statuses = list(self.classify_reviews(texts))
+            except Exception as e:
+                print(f"Error analyzing reviews: {e}")
+        return [Review(text, status) for text, status in zip(texts, statuses)]
+
+    # Page model
+
+    def page_model(self, title):
+        """Return the MovieDetails for a title, or None if it isn't in the catalog
+
+        Raises DetailsUnavailable if TMDB has no usable record for it.
+        """
+        key = normalise_title(title)
+        model = self.pages.get(key)
+        if model is not None:
+            return model
+
+        recommendations = self.recommend(title)
+        if isinstance(recommendations, str):
+            return None
+
+        # Recommendation posters don't depend on anything else, so they start first
+        posters = [self._executor.submit(self.poster_for, rec) for rec in recommendations]
+
+        movie = self.search(title)
+        if movie is None:
+            raise DetailsUnavailable(f"No TMDB record for '{title}'")
+        details_job = self._executor.submit(self._tmdb, f"/movie/{movie['id']}")
+        credits_job = self._executor.submit(self._tmdb, f"/movie/{movie['id']}/credits")
+        details = details_job.result()
+        if details is None:
+            raise DetailsUnavailable(f"Couldn't fetch TMDB details for '{title}'")
+
+        reviews_job = self._executor.submit(self.reviews, details.get('imdb_id'))
+        credits = credits_job.result() or {}
+        cast_jobs = [self._executor.submit(self.person, cast) for cast in credits.get('cast', [])[:MAX_CAST]]
+
+        model = MovieDetails(
+            title=details.get('title') or movie.get('title') or title,
+            imdb_id=details.get('imdb_id') or '',
+            poster=image_url(details.get('poster_path')),
+            overview=details.get('overview') or '',
+            genres=', '.join(genre['name'] for genre in details.get('genres', [])),
+            rating=float(details.get('vote_average') or 0),
+            vote_count=f"{details.get('vote_count') or 0:,}",
+            release_date=format_date(details.get('release_date')),
+            runtime=format_runtime(details.get('runtime')),
+            status=details.get('status') or '',
+            cast=tuple(job.result() for job in cast_jobs),
+            recommendations=tuple(MovieCard(rec, job.result()) for rec, job in zip(recommendations, posters)),
+            reviews=tuple(reviews_job.result()),
+        )
+        self.pages.set(key, model)
+        return model
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
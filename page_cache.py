@@ -0,0 +1,90 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from movie_details import TTLCache, normalise_title
+
+# Rendered pages kept in memory, and how long each is reused before it is rendered again
+PAGE_CACHE_SIZE = 256
+PAGE_CACHE_TTL = 60 * 60
+
+
+class CachedPage:
+    """A rendered page with its validators"""
+
+    __slots__ = ('body', 'etag', 'last_modified')
+
+    def __init__(self, body, etag, last_modified):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class PageCache:
+    """In-memory cache of rendered HTML with ETag / Last-Modified validators
+
+    Pages are keyed by their template, the template's version (a hash of its
+    source, recomputed only when Jinja reports the file changed) and the
+    normalised title, so editing a template retires its cached pages. A hit
+    skips the backend fetches and the Jinja render; a request whose
+    validators still match gets an empty ``304 Not Modified``. Only pages
+    that should be shared by every visitor belong here.
+    """
+
+    def __init__(self, jinja_env, max_size=PAGE_CACHE_SIZE, ttl=PAGE_CACHE_TTL):
+        """Initialize the cache for templates loaded by ``jinja_env``"""
+        self.jinja_env = jinja_env
+        self.pages = TTLCache(max_size, ttl)
+        self._versions = {}
+        self.hits = 0
+        self.misses = 0
+
+    def template_version(self, name):
+        """Short hash of a template's source"""
+        cached = self._versions.get(name)
+        if cached is not None and cached[1]():
+            return cached[0]
+        source, _, uptodate = self.jinja_env.loader.get_source(self.jinja_env, name)
+        version = hashlib.sha256(source.encode('utf-8')).hexdigest()[:12]
+        self._versions[name] = (version, uptodate or (lambda: True))
+        return version
+
+    def key(self, template, title=''):
+        """Cache key for a template rendered for a title"""
+        return template, self.template_version(template), normalise_title(title)
+
+    def get(self, key):
+        """Return the CachedPage for a key, or None"""
+        page = self.pages.get(key)
+        if page is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return page
+
+    def put(self, key, html):
+        """Store rendered HTML and return its CachedPage"""
+        body = html.encode('utf-8')
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        # Second resolution: HTTP dates can't carry more, and If-Modified-Since compares whole seconds
+        last_modified = datetime.fromtimestamp(int(time.time()), timezone.utc)
+        page = CachedPage(body, etag, last_modified)
+        self.pages.set(key, page)
+        return page
+
+    def clear(self):
+        self.pages.clear()
+
+    @staticmethod
+    def respond(page, request, response_class):
+        """Response for a cached page, or 304 if the client's copy is current
+
+        Browsers keep the page but revalidate it on each view (no-cache), so a
+        repeat view costs one conditional request and an empty 304.
+        """
+        response = response_class(page.body, mimetype='text/html')
+        response.set_etag(page.etag)
+        response.last_modified = page.last_modified
+        response.cache_control.public = True
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
@@ -0,0 +1,187 @@
+import json
+import os
+
+from pipelined_speaker import split_sentences
+from tts_cache import gtts_synthesize, normalise_text, tts_key
+
+# Pre-rendered speech for the assistants' fixed phrases (built by `python phrase_bank.py`)
+PHRASE_ASSETS_DIR = 'voice_assets'
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+# Emotions the advanced assistant answers with slower speech
+SLOW_EMOTIONS = ['sad', 'tired', 'stressed']
+
+# Emotion-aware wake greetings (advanced emotion recommender)
+EMOTION_GREETINGS = {
+    'sad': "Hello there. I can sense some sadness in your voice, and I'm here to help. I'm MovieBuddy AI with advanced emotion detection, and I specialize in finding movies that can help improve your mood. What would comfort you right now?",
+    'happy': "Hello! Your positive energy is absolutely wonderful to hear! I'm MovieBuddy AI, and I love recommending movies that match and amplify great moods like yours. What kind of fantastic movie experience are you looking for?",
+    'excited': "Hey there! I can feel your excitement through your voice! I'm MovieBuddy AI with emotion detection, and I'm thrilled to help you find movies that match your amazing energy. What adventure are you in the mood for?",
+    'angry': "Hi there. I can detect some tension in your voice, and that's completely understandable. I'm MovieBuddy AI, and I specialize in recommending movies that can help you relax and feel better. What might help you unwind?",
+    'calm': "Hello. I appreciate the peaceful energy in your voice. I'm MovieBuddy AI with emotion detection, and I love finding thoughtful movies for calm, reflective moods like yours. What kind of contemplative experience interests you?",
+    'tired': "Hi there. You sound like you've had a long day. I'm MovieBuddy AI, and I understand when you need something gentle and easy to watch. What kind of comforting movie would help you relax?",
+    'stressed': "Hello. I can hear some stress in your voice, and I want to help you find some relief. I'm MovieBuddy AI with emotion detection, and I specialize in stress-free entertainment. What would help you decompress?",
+    'neutral': "Hello! I'm MovieBuddy AI with advanced emotion detection. I can analyze your voice to understand your mood and recommend perfect movies for exactly how you're feeling. What kind of movie experience are you looking for today?"
+}
+
+# Emotion-aware goodbyes (advanced emotion recommender)
+EMOTION_GOODBYES = {
+    'sad': "Take very good care of yourself. I hope the movies I recommended help bring some brightness to your day. Remember, tough times don't last, but resilient people like you do. Until next time, be gentle with yourself.",
+    'happy': "It's been absolutely delightful chatting with someone with such wonderful positive energy! Keep that beautiful spirit shining, and enjoy every moment of your movie experience!",
+    'excited': "What an incredibly energetic and fun conversation! Your enthusiasm is contagious! Have an absolutely amazing time with your movies, and keep that fantastic energy flowing!",
+    'angry': "I hope our conversation helped you feel a bit calmer. Take some time for yourself, enjoy those relaxing movies, and remember that it's okay to feel angry sometimes. Take care.",
+    'calm': "Thank you for such a peaceful and thoughtful conversation. Continue to embrace that beautiful tranquility, and enjoy your contemplative movie time.",
+    'tired': "Rest well, and I hope those gentle movies give you exactly the comfort and relaxation you need. Take care of yourself, and sweet dreams when the time comes.",
+    'stressed': "I hope I've helped reduce some of your stress today. Take some deep breaths, enjoy those calming movies, and remember that you deserve peace and relaxation.",
+    'neutral': "Thank you for this wonderful conversation! I hope my emotion-aware recommendations serve you well. Enjoy your movies, and remember I'm always here when you need mood-based suggestions!"
+}
+
+ADVANCED_WELCOME = "Welcome to the upgraded MovieBuddy AI! I now have enhanced emotion detection and FIXED recommendation algorithms. I can understand your feelings through your voice and suggest movies that truly match your emotional needs. Say 'Hey Movie Buddy' for personalized, therapeutic movie recommendations!"
+ADVANCED_ERROR = "I apologize, but I encountered an error while analyzing your emotional needs. Could you please try again?"
+
+# Enhanced MovieBuddy AI
+ENHANCED_INTRO = "Hello! I'm your enhanced MovieBuddy AI. I can detect your emotions and find perfect movies for you. Say 'Hey Movie Buddy' to start chatting!"
+ENHANCED_AWAKE = "Hi there! I'm awake and ready to help you find amazing movies. What are you in the mood for?"
+ENHANCED_GOODBYE = "Thanks for chatting with me! I hope you find a great movie to watch. Goodbye!"
+ENHANCED_SLEEP = "I'm going to sleep now. Say 'Hey Movie Buddy' when you want to chat again!"
+
+# Openings and follow-ups that frame the (dynamic) movie list
+EMOTION_OPENINGS = {
+    'sad': "I can sense you might be feeling a bit down. Let me suggest some movies that can help lift your spirits or provide the emotional connection you're looking for.",
+    'happy': "I love your positive energy! Here are some fantastic movies that will keep those good vibes flowing.",
+    'excited': "Your excitement is contagious! I've got some thrilling recommendations that will match your energy perfectly.",
+    'calm': "I appreciate your peaceful mood. Here are some wonderful films that will complement your serene state of mind.",
+    'stressed': "It sounds like you could use some relaxation. Let me recommend some movies that can help you unwind and escape.",
+    'neutral': "Great! I've analyzed your preferences and found some excellent movie recommendations for you."
+}
+FOLLOW_UPS = [
+    "Would you like more details about any of these movies?",
+    "Should I suggest more options in a different genre?",
+    "Do any of these sound interesting to you?",
+    "Would you like me to find something more specific?"
+]
+
+# Real-time voice recommender
+REALTIME_INTRO = "Hello! I'm MovieBuddy AI. Say 'Hey Movie Buddy' to wake me up and get movie recommendations!"
+REALTIME_AWAKE = "Hi! I'm MovieBuddy AI. I'm ready to help you find the perfect movie. What kind of movie are you in the mood for?"
+REALTIME_GOODBYE = "Thanks for chatting with me! Enjoy your movies!"
+REALTIME_ERROR = "I'm sorry, I had trouble processing that. Could you try again?"
+
+
+def static_phrases():
+    """Return every fixed phrase as (text, slow) in the voice it is spoken with"""
+    phrases = []
+    for emotion, text in list(EMOTION_GREETINGS.items()) + list(EMOTION_GOODBYES.items()):
+        phrases.append((text, emotion in SLOW_EMOTIONS))
+    for text in [ADVANCED_WELCOME, ADVANCED_ERROR]:
+        phrases.append((text, False))
+        phrases.append((text, True))
+    for text in [ENHANCED_INTRO, ENHANCED_AWAKE, ENHANCED_GOODBYE, ENHANCED_SLEEP,
+                 REALTIME_INTRO, REALTIME_AWAKE, REALTIME_GOODBYE, REALTIME_ERROR]:
+        phrases.append((text, False))
+    phrases.extend((text, False) for text in EMOTION_OPENINGS.values())
+    phrases.extend((text, False) for text in FOLLOW_UPS)
+    return phrases
+
+
+class PhraseBank:
+    """Pre-rendered audio for the assistants' fixed vocabulary
+
+    Phrases are rendered per sentence (split exactly as the PipelinedSpeaker
+    splits what it is asked to say), so a response made of a static opening,
+    a dynamic movie list and a static follow-up plays the opening and
+    follow-up from disk and only synthesises the movie-specific sentences.
+    """
+
+    def __init__(self, assets_dir=PHRASE_ASSETS_DIR, lang='en', tld='com'):
+        """Initialize the bank and load its manifest if it has been built"""
+        self.assets_dir = assets_dir
+        self.lang = lang
+        self.tld = tld
+        self.entries = {}
+        self.load()
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.assets_dir, MANIFEST_NAME)
+
+    def load(self):
+        """Read the manifest into a key -> file lookup table"""
+        self.entries = {}
+        if not os.path.exists(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') != MANIFEST_VERSION:
+                print("⚠️ Voice asset manifest is out of date - run `python phrase_bank.py`")
+                return
+            for entry in manifest.get('phrases', []):
+                path = os.path.join(self.assets_dir, entry['file'])
+                if os.path.exists(path):
+                    self.entries[entry['key']] = path
+        except Exception as e:
+            print(f"❌ Error loading voice assets: {str(e)}")
+
+    def lookup(self, text, slow=False):
+        """Return the pre-rendered file for a sentence, or None if it is dynamic"""
+        return self.entries.get(tts_key(text, self.lang, slow, self.tld))
+
+    def build(self, phrases=None, synthesize=None, force=False):
+        """Render phrases (default: static_phrases()) and write the manifest
+
+        Existing assets are reused unless ``force`` is set, so rebuilding after
+        adding a phrase only synthesises the new sentences.
+        """
+        synthesize = synthesize or gtts_synthesize
+        os.makedirs(self.assets_dir, exist_ok=True)
+
+        entries = {}
+        for text, slow in (static_phrases() if phrases is None else phrases):
+            for sentence in split_sentences(text):
+                key = tts_key(sentence, self.lang, slow, self.tld)
+                if key in entries:
+                    continue
+                filename = f'{key}.mp3'
+                path = os.path.join(self.assets_dir, filename)
+                if force or not os.path.exists(path):
+                    print(f"🔊 Rendering: {sentence}")
+                    synthesize(normalise_text(sentence), path, lang=self.lang, slow=slow, tld=self.tld)
+                entries[key] = {
+                    'key': key,
+                    'text': sentence,
+                    'slow': slow,
+                    'file': filename,
+                    'bytes': os.path.getsize(path),
+                }
+
+        # Drop assets for phrases that no longer exist
+        for name in os.listdir(self.assets_dir):
+            if name.endswith('.mp3') and name[:-4] not in entries:
+                os.unlink(os.path.join(self.assets_dir, name))
+
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'lang': self.lang,
+            'tld': self.tld,
+            'phrases': sorted(entries.values(), key=lambda entry: entry['key']),
+        }
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+        self.load()
+        return manifest
+
+
+def main():
+    """Pre-render the static phrase bank (pass --force to re-synthesise everything)"""
+    import sys
+
+    bank = PhraseBank()
+    manifest = bank.build(force='--force' in sys.argv[1:])
+    total = sum(entry['bytes'] for entry in manifest['phrases'])
+    print(f"✅ {len(manifest['phrases'])} phrases ({total / 1024:.0f} KB) written to {bank.assets_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Sentence boundaries: ., ! or ? followed by whitespace, but not list numbers like "1. "
+SENTENCE_END = re.compile(r'(?<=[^\d\s][.!?])\s+')
+
+
+def split_sentences(text, min_chars=12):
+    """Split a response into speakable sentences
+
+    Markdown emphasis is dropped, every line is its own unit (the movie list
+    has one title per line) and very short fragments are merged into the
+    next sentence so each synthesis request is worth the round trip.
+    """
+    text = text.replace('**', '')
+    sentences = []
+    carry = ''
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        for part in SENTENCE_END.split(line):
+            part = f"{carry} {part}".strip() if carry else part.strip()
+            if not part:
+                continue
+            if len(part) < min_chars:
+                carry = part
+                continue
+            sentences.append(part)
+            carry = ''
+    if carry:
+        if sentences:
+            sentences[-1] = f"{sentences[-1]} {carry}"
+        else:
+            sentences.append(carry)
+    return sentences
+
+
+class PygamePlayer:
+    """Play an audio file on a pygame mixer channel and wait for it to end
+
+    The wait is a single timed Event wait for the clip's length rather than a
+    get_busy() polling loop, and stop() cuts playback short.
+    """
+
+    def __init__(self, volume=0.9):
+        self.volume = volume
+        self._stopped = threading.Event()
+        self._channel = None
+
+    def play(self, path):
+        """Play path to the end (or until stop() is called)"""
+        import pygame
+        sound = pygame.mixer.Sound(path)
+        sound.set_volume(self.volume)
+        self._stopped.clear()
+        self._channel = sound.play()
+        self._stopped.wait(sound.get_length())
+
+    def stop(self):
+        """Stop the clip that is currently playing"""
+        self._stopped.set()
+        if self._channel is not None:
+            self._channel.stop()
+
+
+class PipelinedSpeaker:
+    """Speak long responses sentence by sentence with synthesis overlapped
+
+    Sentence N+1 is synthesised (through the TTS cache) while sentence N is
+    playing, so the first audio starts after one sentence's synthesis rather
+    than the whole response's. Sentences found in the optional PhraseBank are
+    played from their pre-rendered assets without any synthesis. speak()
+    returns straight away; call wait() to block until everything has been
+    played.
+    """
+
+    def __init__(self, tts_cache, player=None, lang='en', tld='com', phrase_bank=None):
+        """Initialize the speaker with a TTSCache and a player (defaults to pygame)"""
+        self.tts_cache = tts_cache
+        self.phrase_bank = phrase_bank
+        self.player = player or PygamePlayer()
+        self.lang = lang
+        self.tld = tld
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._thread = None
+        self._cancelled = threading.Event()
+
+    @property
+    def is_speaking(self):
+        """True while an utterance is still being played"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def _synthesize(self, sentence, slow):
+        if self.phrase_bank is not None:
+            path = self.phrase_bank.lookup(sentence, slow)
+            if path:
+                return path
+        return self.tts_cache.synthesize_path(sentence, lang=self.lang, slow=slow, tld=self.tld)
+
+    def _run(self, sentences, slow):
+        """Play each sentence while the next one is being synthesised"""
+        next_clip = self._executor.submit(self._synthesize, sentences[0], slow)
+        for index in range(len(sentences)):
+            try:
+                path = next_clip.result()
+            except Exception as e:
+                print(f"❌ Error synthesising speech: {str(e)}")
+                return
+            if index + 1 < len(sentences):
+                next_clip = self._executor.submit(self._synthesize, sentences[index + 1], slow)
+            if self._cancelled.is_set():
+                return
+            try:
+                self.player.play(path)
+            except Exception as e:
+                print(f"❌ Error playing speech: {str(e)}")
+                return
+
+    def speak(self, text, slow=False):
+        """Start speaking text in the background, interrupting anything already playing"""
+        self.stop()
+        sentences = split_sentences(text)
+        if not sentences:
+            return
+        self._cancelled.clear()
+        self._thread = threading.Thread(target=self._run, args=(sentences, slow), daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout=None):
+        """Block until the current utterance has finished playing"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stop(self):
+        """Interrupt the current utterance (used for barge-in)"""
+        if self.is_speaking:
+            self._cancelled.set()
+            self.player.stop()
+            self._thread.join()
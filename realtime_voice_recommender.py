@@ -15,6 +15,13 @@ from gtts import gTTS
 import pygame
 import re
 from datetime import datetime
+from deepgram_streaming import DeepgramStreamingTranscriber
+from voice_activity import VADRecorder
+from wake_word import WakeWordSpotter
+from tts_cache import TTSCache
+from pipelined_speaker import PipelinedSpeaker
+from conversation_engine import ConversationEngine, Utterance
+from phrase_bank import PhraseBank, REALTIME_INTRO, REALTIME_AWAKE, REALTIME_GOODBYE, REALTIME_ERROR
 
 warnings.filterwarnings('ignore')
 
@@ -39,6 +46,25 @@ class RealTimeVoiceRecommender:
         self.channels = 1
         self.recording_duration = 6  # seconds - longer for better conversation
         
+        # Voice activity detection - capture starts on speech and stops on silence
+        self.vad_recorder = VADRecorder(sample_rate=self.sample_rate, channels=self.channels)
+        
+        # Spoken phrases are synthesised once and replayed from disk
+        self.tts_cache = TTSCache()
+        
+        # Speaks long responses sentence by sentence, synthesising ahead of playback
+        self.speaker = PipelinedSpeaker(self.tts_cache, phrase_bank=PhraseBank())
+        
+        # Set while start_conversation is running; replies are queued to its TTS stage
+        self.engine = None
+        
+        # Streaming speech-to-text with endpointing
+        self.streaming_transcriber = DeepgramStreamingTranscriber(
+            api_key=DEEPGRAM_API_KEY,
+            sample_rate=self.sample_rate,
+            channels=self.channels
+        )
+        
         # Load movie database
         print("Loading movie database...")
         self.load_movie_database()
@@ -59,6 +85,9 @@ class RealTimeVoiceRecommender:
         self.last_activity = time.time()
         self.sleep_timeout = 30  # seconds
         
+        # On-device wake word spotting (active once templates are enrolled via wake_word.py)
+        self.wake_word_spotter = WakeWordSpotter(self.wake_words, sample_rate=self.sample_rate)
+        
     def load_movie_database(self):
         """Load movie data from CSV file"""
         try:
@@ -131,12 +160,12 @@ class RealTimeVoiceRecommender:
         try:
             print(f"\n🎤 LISTENING NOW! Speak for up to {duration} seconds...")
             print("💡 Example: 'Hey Movie Buddy, I want a funny action movie'")
-            audio = sd.rec(int(duration * self.sample_rate), 
-                          samplerate=self.sample_rate, 
-                          channels=self.channels)
-            sd.wait()
+            # Stops on trailing silence; None means nobody spoke
+            audio = self.vad_recorder.record(duration)
+            if audio is None:
+                return None
             print("✅ Recording finished. Processing...")
-            return audio.flatten()
+            return audio
         except Exception as e:
             print(f"Error recording audio: {str(e)}")
             return None
@@ -144,6 +173,10 @@ class RealTimeVoiceRecommender:
     def transcribe_audio(self, audio_data):
         """Transcribe audio using Deepgram API"""
         try:
+            # Don't pay for a remote call on a silent clip
+            if not self.vad_recorder.detector.contains_speech(audio_data):
+                return None
+            
             # Convert audio to bytes
             audio_bytes = (audio_data * 32767).astype(np.int16).tobytes()
             
@@ -179,30 +212,57 @@ class RealTimeVoiceRecommender:
             print(f"Error transcribing audio: {str(e)}")
             return None
     
+    def listen_and_transcribe(self, max_duration=6, on_speech_start=None):
+        """Stream microphone audio to Deepgram and return once speech ends"""
+        print(f"\n🎤 LISTENING NOW! Speak for up to {max_duration} seconds...")
+        print("💡 Example: 'Hey Movie Buddy, I want a funny action movie'")
+        transcript, audio_data = self.streaming_transcriber.listen(max_duration, on_speech_start=on_speech_start)
+        
+        if audio_data is None:
+            # Streaming unavailable - fall back to local recording + REST call
+            audio_data = self.record_audio(max_duration)
+            if audio_data is None:
+                return None
+            return self.transcribe_audio(audio_data)
+        
+        return transcript
+    
+    def capture_utterance(self):
+        """Capture one utterance for the conversation engine (None if nobody spoke)
+        
+        While awake the microphone is streamed to Deepgram as it records;
+        while asleep the utterance is only recorded, for on-device wake word
+        spotting.
+        """
+        self.check_inactivity()
+        if not self.is_awake and self.wake_word_spotter.is_ready():
+            return self.vad_recorder.record(self.recording_duration, on_speech_start=self.engine.speech_started)
+        
+        transcript = self.listen_and_transcribe(self.recording_duration, self.engine.speech_started)
+        return Utterance(None, transcript) if transcript else None
+    
+    def transcribe_utterance(self, audio_data):
+        """Spot the wake word in an utterance recorded while asleep"""
+        phrase, distance = self.wake_word_spotter.detect(audio_data)
+        if phrase:
+            print(f"👂 Heard '{phrase}' (match distance: {distance:.2f})")
+        return phrase
+    
     def speak_text(self, text):
         """Convert text to speech and play it"""
         try:
-            self.is_speaking = True
             print(f"🔊 Speaking: {text}")
             
-            # Create TTS audio
-            tts = gTTS(text=text, lang='en', slow=False)
+            if self.engine is not None and self.engine.is_running:
+                # The conversation engine speaks it while we keep listening
+                self.engine.say(text)
+                return
+            
+            self.is_speaking = True
+            # Playback starts after the first sentence is ready; the rest is synthesised meanwhile
+            self.speaker.speak(text)
+            self.speaker.wait()
             
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as tmp_file:
-                tts.save(tmp_file.name)
-                
-                # Play audio
-                pygame.mixer.music.load(tmp_file.name)
-                pygame.mixer.music.play()
-                
-                # Wait for playback to finish
-                while pygame.mixer.music.get_busy():
-                    time.sleep(0.1)
-                
-                # Clean up
-                os.unlink(tmp_file.name)
-                
         except Exception as e:
             print(f"Error in text-to-speech: {str(e)}")
         finally:
@@ -223,14 +283,14 @@ class RealTimeVoiceRecommender:
         if not self.is_awake:
             if any(wake_word in user_input for wake_word in self.wake_words):
                 self.is_awake = True
-                self.speak_text("Hi! I'm MovieBuddy AI. I'm ready to help you find the perfect movie. What kind of movie are you in the mood for?")
+                self.speak_text(REALTIME_AWAKE)
                 return
             else:
                 return  # Ignore input when not awake
         
         # Check for exit words
         if any(exit_word in user_input for exit_word in self.exit_words):
-            self.speak_text("Thanks for chatting with me! Enjoy your movies!")
+            self.speak_text(REALTIME_GOODBYE)
             self.conversation_active = False
             return
         
@@ -249,7 +309,7 @@ class RealTimeVoiceRecommender:
             
         except Exception as e:
             print(f"Error processing user input: {str(e)}")
-            self.speak_text("I'm sorry, I had trouble processing that. Could you try again?")
+            self.speak_text(REALTIME_ERROR)
         finally:
             self.is_processing = False
     
@@ -365,38 +425,26 @@ class RealTimeVoiceRecommender:
             self.conversation_active = True
             
             # Initial greeting
-            self.speak_text("Hello! I'm MovieBuddy AI. Say 'Hey Movie Buddy' to wake me up and get movie recommendations!")
+            self.speak_text(REALTIME_INTRO)
+            
+            # Capture, STT, response and TTS run concurrently (barge-in with VOICE_BARGE_IN=1)
+            self.engine = ConversationEngine(
+                capture=self.capture_utterance,
+                transcribe=self.transcribe_utterance,
+                respond=lambda user_input, audio_data: self.process_user_input(user_input),
+                speaker=self.speaker,
+                is_active=lambda: self.conversation_active
+            )
+            try:
+                asyncio.run(self.engine.run())
+            except KeyboardInterrupt:
+                print("\n🛑 Shutting down...")
             
-            # Main conversation loop
-            while self.conversation_active:
-                try:
-                    # Check for inactivity
-                    self.check_inactivity()
-                    
-                    # Record audio
-                    audio_data = self.record_audio(self.recording_duration)
-                    if audio_data is None:
-                        continue
-                    
-                    # Transcribe audio
-                    transcript = self.transcribe_audio(audio_data)
-                    if transcript:
-                        self.process_user_input(transcript)
-                    
-                    # Small delay to prevent overwhelming the API
-                    time.sleep(0.5)
-                    
-                except KeyboardInterrupt:
-                    print("\n🛑 Shutting down...")
-                    break
-                except Exception as e:
-                    print(f"Error in conversation loop: {str(e)}")
-                    time.sleep(1)
-                    
         except Exception as e:
             print(f"❌ Error starting conversation: {str(e)}")
         finally:
             self.conversation_active = False
+            self.engine = None
             print("✅ Conversation ended")
 
 def main():
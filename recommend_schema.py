@@ -0,0 +1,226 @@
+from dataclasses import asdict, dataclass, replace
+
+try:
+    import orjson
+
+    def loads(data):
+        return orjson.loads(data)
+
+    def dumps(obj):
+        """Serialise to UTF-8 JSON bytes (orjson encodes dataclasses natively)"""
+        return orjson.dumps(obj)
+except ImportError:
+    import json
+
+    def loads(data):
+        return json.loads(data)
+
+    def dumps(obj):
+        """Serialise to UTF-8 JSON bytes"""
+        return json.dumps(obj, default=asdict, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+# Largest /recommend body accepted (a full cast with biographies is well under this)
+MAX_REQUEST_BYTES = 512 * 1024
+
+# Longest cast and recommendation lists accepted
+MAX_CAST = 50
+MAX_RECOMMENDATIONS = 50
+
+# What the page shows for cast details TMDB doesn't have
+NOT_AVAILABLE = 'Not Available'
+NO_BIOGRAPHY = 'Biography not available'
+
+
+class SchemaError(ValueError):
+    """Raised when a /recommend payload doesn't match the schema"""
+
+
+@dataclass(frozen=True, slots=True)
+class CastMember:
+    id: str
+    name: str
+    character: str = ''
+    profile: str = ''
+    birthday: str = NOT_AVAILABLE
+    place_of_birth: str = NOT_AVAILABLE
+    biography: str = NO_BIOGRAPHY
+
+
+@dataclass(frozen=True, slots=True)
+class MovieCard:
+    title: str
+    poster: str
+
+
+@dataclass(frozen=True, slots=True)
+class Review:
+    text: str
+    sentiment: str
+
+
+@dataclass(frozen=True, slots=True)
+class MovieDetails:
+    """The details page model: request body of /recommend and response of the JSON endpoints"""
+    title: str
+    imdb_id: str = ''
+    poster: str = ''
+    overview: str = ''
+    genres: str = ''
+    rating: float = 0.0
+    vote_count: str = '0'
+    release_date: str = ''
+    runtime: str = ''
+    status: str = ''
+    cast: tuple = ()
+    recommendations: tuple = ()
+    reviews: tuple = ()
+
+    def with_reviews(self, reviews):
+        """Copy of the model with its reviews replaced"""
+        return replace(self, reviews=tuple(reviews))
+
+    def template_context(self):
+        """Variables movie_details.html expects"""
+        return {
+            'title': self.title,
+            'poster': self.poster,
+            'overview': self.overview,
+            'vote_average': self.rating,
+            'vote_count': self.vote_count,
+            'release_date': self.release_date,
+            'runtime': self.runtime,
+            'status': self.status,
+            'genres': self.genres,
+            'movie_cards': {card.poster: card.title for card in self.recommendations},
+            'reviews': {review.text: review.sentiment for review in self.reviews},
+            'casts': {c.name: [c.id, c.character, c.profile] for c in self.cast},
+            'cast_details': {c.name: [c.id, c.profile, c.birthday, c.place_of_birth, c.biography]
+                             for c in self.cast},
+        }
+
+
+def _string(value, name, required=False):
+    if value is None:
+        if required:
+            raise SchemaError(f'{name} is required')
+        return ''
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise SchemaError(f'{name} must be a string')
+    value = str(value)
+    if required and not value.strip():
+        raise SchemaError(f'{name} is required')
+    return value
+
+
+def _number(value, name):
+    if value is None or value == '':
+        return 0.0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise SchemaError(f'{name} must be a number') from None
+
+
+def _list(value, name, limit):
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise SchemaError(f'{name} must be a list')
+    if len(value) > limit:
+        raise SchemaError(f'{name} has more than {limit} entries')
+    return value
+
+
+def _object(value, name):
+    if not isinstance(value, dict):
+        raise SchemaError(f'{name} must be an object')
+    return value
+
+
+def _cast_member(value, index):
+    value = _object(value, f'cast[{index}]')
+    return CastMember(
+        id=_string(value.get('id'), f'cast[{index}].id', required=True),
+        name=_string(value.get('name'), f'cast[{index}].name', required=True),
+        character=_string(value.get('character'), f'cast[{index}].character'),
+        profile=_string(value.get('profile'), f'cast[{index}].profile'),
+        birthday=_string(value.get('birthday'), f'cast[{index}].birthday') or NOT_AVAILABLE,
+        place_of_birth=_string(value.get('place_of_birth'), f'cast[{index}].place_of_birth') or NOT_AVAILABLE,
+        biography=_string(value.get('biography'), f'cast[{index}].biography') or NO_BIOGRAPHY,
+    )
+
+
+def _movie_card(value, index):
+    value = _object(value, f'recommendations[{index}]')
+    return MovieCard(title=_string(value.get('title'), f'recommendations[{index}].title', required=True),
+                     poster=_string(value.get('poster'), f'recommendations[{index}].poster'))
+
+
+def movie_details_from_dict(data):
+    """Validate a decoded payload and build the MovieDetails it describes
+
+    Fields a client may leave out get the same defaults the page has always
+    shown. Anything with the wrong type raises SchemaError naming the field.
+    """
+    data = _object(data, 'body')
+    return MovieDetails(
+        title=_string(data.get('title'), 'title', required=True),
+        imdb_id=_string(data.get('imdb_id'), 'imdb_id'),
+        poster=_string(data.get('poster'), 'poster'),
+        overview=_string(data.get('overview'), 'overview'),
+        genres=_string(data.get('genres'), 'genres'),
+        rating=_number(data.get('rating'), 'rating'),
+        vote_count=_string(data.get('vote_count'), 'vote_count') or '0',
+        release_date=_string(data.get('release_date'), 'release_date'),
+        runtime=_string(data.get('runtime'), 'runtime'),
+        status=_string(data.get('status'), 'status'),
+        cast=tuple(_cast_member(member, i) for i, member in enumerate(_list(data.get('cast'), 'cast', MAX_CAST))),
+        recommendations=tuple(_movie_card(card, i) for i, card in enumerate(
+            _list(data.get('recommendations'), 'recommendations', MAX_RECOMMENDATIONS))),
+    )
+
+
+def decode_recommend_request(body):
+    """Decode and validate a JSON /recommend body (bytes or str)"""
+    if len(body) > MAX_REQUEST_BYTES:
+        raise SchemaError('Request body is too large')
+    try:
+        data = loads(body)
+    except ValueError as e:
+        raise SchemaError(f'Invalid JSON: {e}') from None
+    return movie_details_from_dict(data)
+
+
+# Hidden-form fields posted by older copies of recommend.js: each list is a JSON array
+LEGACY_LIST_FIELDS = ('cast_ids', 'cast_names', 'cast_chars', 'cast_profiles', 'cast_bdays',
+                      'cast_bios', 'cast_places', 'rec_movies', 'rec_posters')
+
+
+def decode_legacy_form(form):
+    """Build MovieDetails from the old hidden-form POST
+
+    The list fields were produced with JSON.stringify, so they are decoded as
+    JSON rather than split on '","' (which broke on quotes, commas and
+    escapes in biographies).
+    """
+    lists = {}
+    for name in LEGACY_LIST_FIELDS:
+        if name not in form:
+            raise SchemaError(f'{name} is required')
+        try:
+            value = loads(form[name])
+        except ValueError:
+            raise SchemaError(f'{name} is not a JSON list') from None
+        lists[name] = _list(value, name, MAX_RECOMMENDATIONS if name.startswith('rec_') else MAX_CAST)
+
+    cast = [{'id': cast_id, 'name': name, 'character': character, 'profile': profile,
+             'birthday': birthday, 'place_of_birth': place, 'biography': bio}
+            for cast_id, name, character, profile, birthday, place, bio in zip(
+                lists['cast_ids'], lists['cast_names'], lists['cast_chars'], lists['cast_profiles'],
+                lists['cast_bdays'], lists['cast_places'], lists['cast_bios'])]
+    recommendations = [{'title': title, 'poster': poster}
+                       for title, poster in zip(lists['rec_movies'], lists['rec_posters'])]
+    data = {key: form.get(key) for key in ('title', 'imdb_id', 'poster', 'genres', 'overview', 'rating',
+                                           'vote_count', 'release_date', 'runtime', 'status')}
+    data.update(cast=cast, recommendations=recommendations)
+    return movie_details_from_dict(data)
@@ -0,0 +1,280 @@
+import os
+import re
+import time
+import unicodedata
+
+import numpy as np
+
+from model_store import MODEL_DIR, ModelStore, StringTable, save_store, string_hash
+
+SENTIMENT_MODEL_PATH = os.path.join(MODEL_DIR, 'sentiment.npz')
+
+# The pickled scikit-learn model the app used to load (exported by this module)
+LEGACY_CLASSIFIER = 'nlp_model.pkl'
+LEGACY_VECTORIZER = 'tranform.pkl'
+
+REVIEWS_DATASET = os.path.join('datasets', 'reviews.txt')
+
+MODEL_FORMAT = 'moodflix-sentiment'
+# Bump when the stored arrays or metadata change meaning
+MODEL_FORMAT_VERSION = 1
+
+
+def load_reviews(path=REVIEWS_DATASET):
+    """(texts, labels) from a file of 'label<TAB>text' lines"""
+    texts, labels = [], []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            label, _, text = line.rstrip('\n').partition('\t')
+            if label.strip().lstrip('-').isdigit() and text:
+                labels.append(int(label))
+                texts.append(text)
+    return texts, np.array(labels, dtype=np.int64)
+
+
+def strip_accents_ascii(text):
+    return unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
+
+
+class TextVectorizer:
+    """TF-IDF vectors of texts, tokenised like scikit-learn's TfidfVectorizer
+
+    Texts are lowercased, optionally ASCII accent-stripped and split with a
+    token regex. Tokens become feature columns by a vocabulary lookup
+    (a StringTable) or, without a vocabulary, by hashing into n_features
+    columns, which needs no stored vocabulary at all. The app and the
+    training script (train_sentiment.py) share this class, so a model is
+    always scored on exactly the features it was trained on.
+    """
+
+    def __init__(self, token_pattern, n_features, vocabulary=None, idf=None, lowercase=True,
+                 strip_accents=None, sublinear_tf=False, norm='l2'):
+        """Set up the tokeniser and weighting (idf=None and norm=None give raw counts)"""
+        self.token_pattern = re.compile(token_pattern)
+        self.n_features = n_features
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.lowercase = lowercase
+        self.strip_accents = strip_accents
+        self.sublinear_tf = sublinear_tf
+        self.norm = norm
+
+    def tokens(self, text):
+        if self.lowercase:
+            text = text.lower()
+        if self.strip_accents == 'ascii':
+            text = strip_accents_ascii(text)
+        return self.token_pattern.findall(text)
+
+    def columns(self, tokens):
+        """Feature column of each token, -1 for tokens not in the vocabulary"""
+        if self.vocabulary is not None:
+            return self.vocabulary.lookup(tokens)
+        hashes = np.fromiter((string_hash(token) for token in tokens), dtype=np.uint64, count=len(tokens))
+        return (hashes % np.uint64(self.n_features)).astype(np.int64)
+
+    def vectors(self, texts):
+        """TF-IDF vectors of a batch of texts in coordinate form: (rows, columns, values)
+
+        The whole batch is tokenised and looked up in one go, and the
+        weighting and normalisation are vectorised over every document.
+        """
+        tokens, rows = [], []
+        for row, text in enumerate(texts):
+            text_tokens = self.tokens(text)
+            tokens.extend(text_tokens)
+            rows.extend([row] * len(text_tokens))
+        columns = self.columns(tokens)
+        known = columns >= 0
+        keys = np.array(rows, dtype=np.int64)[known] * self.n_features + columns[known]
+        keys, counts = np.unique(keys, return_counts=True)
+        rows, columns = np.divmod(keys, self.n_features)
+        values = counts.astype(np.float64)
+        if self.sublinear_tf:
+            values = 1.0 + np.log(values)
+        if self.idf is not None:
+            values *= self.idf[columns]
+        if self.norm in ('l1', 'l2'):
+            magnitudes = np.abs(values) if self.norm == 'l1' else values * values
+            lengths = np.bincount(rows, weights=magnitudes, minlength=len(texts))
+            if self.norm == 'l2':
+                lengths = np.sqrt(lengths)
+            values /= lengths[rows]
+        return rows, columns, values
+
+    def vector(self, text):
+        """TF-IDF vector of one text as (columns, values)"""
+        _, columns, values = self.vectors([text])
+        return columns, values
+
+    def matrix(self, texts):
+        """TF-IDF vectors of texts as a scipy CSR matrix (for training)"""
+        from scipy.sparse import csr_matrix
+
+        rows, columns, values = self.vectors(texts)
+        return csr_matrix((values, (rows, columns)), shape=(len(texts), self.n_features))
+
+
+class SentimentModel:
+    """TF-IDF features and a linear classifier as plain arrays
+
+    Each document is vectorised by a TextVectorizer and scored with a
+    sparse dot product against the coefficient rows. The arrays are
+    memory-mapped from a model store, so loading is just mapping a file
+    and every worker shares the same pages.
+
+    Stored arrays: ``coef`` (classes x features, or 1 x features for a
+    binary model scored by sign), ``intercept``, ``classes``, optionally
+    ``idf``, and for vocabulary features a ``vocabulary`` string table.
+    """
+
+    def __init__(self, store):
+        """Wrap a ModelStore holding a sentiment model"""
+        meta = store.meta
+        if meta.get('format') != MODEL_FORMAT:
+            raise ValueError(f'{store.path} is not a sentiment model')
+        if meta.get('version') != MODEL_FORMAT_VERSION:
+            raise ValueError(f"{store.path} is format version {meta.get('version')}, "
+                             f"expected {MODEL_FORMAT_VERSION}; export or train it again")
+        self.store = store
+        self.meta = meta
+        self.coef = store['coef']
+        self.intercept = store['intercept']
+        self.classes = store['classes']
+        self.n_features = self.coef.shape[1]
+        self.vectorizer = TextVectorizer(
+            meta['token_pattern'], self.n_features,
+            vocabulary=store.strings('vocabulary') if meta['features'] == 'vocabulary' else None,
+            idf=store['idf'] if 'idf' in store else None, lowercase=meta['lowercase'],
+            strip_accents=meta['strip_accents'], sublinear_tf=meta['sublinear_tf'], norm=meta['norm'])
+
+    @classmethod
+    def load(cls, path=SENTIMENT_MODEL_PATH):
+        """Map a saved model, exporting the legacy pickles first if there isn't one"""
+        if not os.path.exists(path):
+            started = time.time()
+            export_legacy(path=path)
+            print(f"🧠 Exported sentiment model to {path} in {time.time() - started:.1f}s")
+        return cls(ModelStore(path))
+
+    def decision_function(self, texts):
+        """Class scores for each text (one column for a binary model)"""
+        rows, columns, values = self.vectorizer.vectors(texts)
+        scores = np.empty((len(texts), self.coef.shape[0]), dtype=np.float64)
+        for k, coef in enumerate(self.coef):
+            # Sparse dot product: each stored value times its coefficient, summed per document
+            scores[:, k] = np.bincount(rows, weights=coef[columns] * values, minlength=len(texts))
+        return scores + self.intercept
+
+    def predict(self, texts):
+        """Predicted class label for each text"""
+        texts = list(texts)
+        if not texts:
+            return self.classes[:0].copy()
+        scores = self.decision_function(texts)
+        if scores.shape[1] == 1:
+            return self.classes[(scores[:, 0] > 0).astype(np.int64)]
+        return self.classes[np.argmax(scores, axis=1)]
+
+
+def save_model(path, coef, intercept, classes, features, token_pattern, vocabulary=None, idf=None,
+               lowercase=True, strip_accents=None, sublinear_tf=False, norm='l2', **extra_meta):
+    """Write a sentiment model store (see SentimentModel for the arrays)"""
+    if features not in ('vocabulary', 'hashing'):
+        raise ValueError(f'unknown feature type {features!r}')
+    coef = np.atleast_2d(np.asarray(coef, dtype=np.float64))
+    arrays = {'coef': coef, 'intercept': np.asarray(intercept, dtype=np.float64).reshape(coef.shape[0]),
+              'classes': np.asarray(classes)}
+    if idf is not None:
+        arrays['idf'] = np.asarray(idf, dtype=np.float64).ravel()
+    if features == 'vocabulary':
+        terms = [None] * coef.shape[1]
+        for term, column in vocabulary.items():
+            terms[column] = term
+        if any(term is None for term in terms):
+            raise ValueError('vocabulary does not cover every coefficient column')
+        arrays.update(StringTable.build(terms).arrays('vocabulary'))
+    meta = dict(extra_meta, format=MODEL_FORMAT, version=MODEL_FORMAT_VERSION, features=features,
+                token_pattern=token_pattern, lowercase=lowercase, strip_accents=strip_accents,
+                sublinear_tf=sublinear_tf, norm=norm)
+    save_store(path, arrays, meta)
+
+
+def legacy_idf(vectorizer):
+    """IDF weights of a pickled TfidfVectorizer, from any scikit-learn version"""
+    tfidf = vectorizer._tfidf
+    if not tfidf.use_idf:
+        return None
+    if hasattr(tfidf, '_idf_diag'):
+        # Pickled by scikit-learn < 1.0, which kept the weights as a sparse diagonal
+        return np.asarray(tfidf._idf_diag.diagonal()).ravel()
+    return np.asarray(tfidf.idf_).ravel()
+
+
+def load_legacy(classifier_path=LEGACY_CLASSIFIER, vectorizer_path=LEGACY_VECTORIZER):
+    """Unpickle the legacy classifier and vectorizer (needs scikit-learn)
+
+    Vectorizers pickled by old scikit-learn versions refuse to transform
+    under new ones; their IDF weights are restored so they can still be
+    used as the reference when checking an export.
+    """
+    import pickle
+    import warnings
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        with open(classifier_path, 'rb') as f:
+            clf = pickle.load(f)
+        with open(vectorizer_path, 'rb') as f:
+            vectorizer = pickle.load(f)
+    idf = legacy_idf(vectorizer)
+    if idf is not None and not hasattr(vectorizer._tfidf, 'idf_'):
+        vectorizer._tfidf.idf_ = idf
+    return clf, vectorizer
+
+
+def export_legacy(classifier_path=LEGACY_CLASSIFIER, vectorizer_path=LEGACY_VECTORIZER, path=SENTIMENT_MODEL_PATH):
+    """Convert the pickled TfidfVectorizer and classifier into a sentiment model store"""
+    clf, vectorizer = load_legacy(classifier_path, vectorizer_path)
+    if vectorizer.analyzer != 'word' or vectorizer.ngram_range != (1, 1) or \
+            vectorizer.tokenizer is not None or vectorizer.preprocessor is not None:
+        raise ValueError('only word unigram vectorizers with the default tokenizer can be exported')
+    if vectorizer.strip_accents not in (None, 'ascii') or vectorizer.binary:
+        raise ValueError(f'unsupported vectorizer options in {vectorizer_path}')
+    if hasattr(clf, 'feature_log_prob_'):
+        # Naive Bayes: per-class log likelihoods plus log priors, highest wins
+        coef, intercept = clf.feature_log_prob_, clf.class_log_prior_
+    else:
+        coef, intercept = clf.coef_, clf.intercept_
+    tfidf = vectorizer._tfidf
+    # Stop words need no handling: they were dropped before the vocabulary was built
+    save_model(path, coef, intercept, clf.classes_, 'vocabulary', vectorizer.token_pattern,
+               vocabulary=vectorizer.vocabulary_, idf=legacy_idf(vectorizer),
+               lowercase=vectorizer.lowercase, strip_accents=vectorizer.strip_accents,
+               sublinear_tf=tfidf.sublinear_tf, norm=tfidf.norm,
+               source=f'{classifier_path} + {vectorizer_path}')
+
+
+def main():
+    started = time.time()
+    clf, vectorizer = load_legacy()
+    unpickle_time = time.time() - started
+    export_legacy()
+    started = time.time()
+    model = SentimentModel.load()
+    load_time = time.time() - started
+    print(f"✅ Exported {LEGACY_CLASSIFIER} + {LEGACY_VECTORIZER} to {SENTIMENT_MODEL_PATH} "
+          f"({model.store.nbytes / 1e3:.0f} KB, {model.n_features} features)")
+    print(f"   Load time: {load_time * 1000:.1f} ms (unpickling took {unpickle_time * 1000:.1f} ms)")
+
+    texts, _ = load_reviews()
+    expected = clf.predict(vectorizer.transform(texts))
+    predicted = model.predict(texts)
+    mismatches = int(np.count_nonzero(predicted != expected))
+    print(f"   Predictions on {REVIEWS_DATASET}: {len(texts) - mismatches}/{len(texts)} match clf.predict")
+    if mismatches:
+        raise SystemExit(f"❌ {mismatches} predictions differ from the pickled model")
+
+
+if __name__ == "__main__":
+    main()
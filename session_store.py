@@ -0,0 +1,248 @@
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from flask.sessions import SecureCookieSession, SessionInterface, session_json_serializer
+from itsdangerous import BadSignature, Signer, URLSafeTimedSerializer
+
+from user_store import USER_DB_PATH
+
+# Sessions live in the same SQLite file as the accounts unless told otherwise
+SESSION_DB_PATH = os.environ.get('SESSION_DB_PATH', USER_DB_PATH)
+
+# Expired rows are deleted at most this often (per process)
+SWEEP_INTERVAL = 10 * 60
+
+# Sessions holding any of these keys are kept server-side; others travel in a signed cookie
+SERVER_SIDE_KEYS = ('user_id',)
+
+# Cookie values that point at a server-side row start with this prefix
+SERVER_PREFIX = 'srv.'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    sid TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    expires REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class SessionStore:
+    """Indexed SQLite table of server-side sessions
+
+    Lookups and writes go through the sid primary key and expiry sweeps use
+    the index on ``expires``, so their cost doesn't grow with the number of
+    stored sessions the way a directory of pickle files does. The file is
+    shared by every worker on the host.
+    """
+
+    def __init__(self, path=SESSION_DB_PATH, timeout=5.0, sweep_interval=SWEEP_INTERVAL):
+        """Initialize the store and create the schema if needed"""
+        self.path = path
+        self.timeout = timeout
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._last_sweep = 0.0
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+        self.sweep()
+
+    def connection(self):
+        """Return this thread's connection (reopened after a fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def shared_secret(self):
+        """Return a secret key generated once and shared by every worker"""
+        with self.connection() as conn:
+            conn.execute('INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)',
+                         ('secret_key', secrets.token_hex(32)))
+            return conn.execute("SELECT value FROM settings WHERE key = 'secret_key'").fetchone()[0]
+
+    def load(self, sid):
+        """Return (data, expires) for a live session, or None"""
+        row = self.connection().execute(
+            'SELECT data, expires FROM sessions WHERE sid = ? AND expires > ?', (sid, time.time())).fetchone()
+        return row
+
+    def save(self, sid, data, expires):
+        """Insert or replace a session"""
+        with self.connection() as conn:
+            conn.execute('INSERT INTO sessions (sid, data, expires) VALUES (?, ?, ?) '
+                         'ON CONFLICT (sid) DO UPDATE SET data = excluded.data, expires = excluded.expires',
+                         (sid, data, expires))
+        self.maybe_sweep()
+
+    def touch(self, sid, expires):
+        """Extend a session's lifetime without rewriting its data"""
+        with self.connection() as conn:
+            conn.execute('UPDATE sessions SET expires = ? WHERE sid = ?', (expires, sid))
+
+    def delete(self, sid):
+        """Remove a session"""
+        with self.connection() as conn:
+            conn.execute('DELETE FROM sessions WHERE sid = ?', (sid,))
+
+    def sweep(self):
+        """Delete every expired session; returns how many were removed"""
+        with self.connection() as conn:
+            cursor = conn.execute('DELETE FROM sessions WHERE expires <= ?', (time.time(),))
+        self._last_sweep = time.time()
+        return cursor.rowcount
+
+    def maybe_sweep(self):
+        """Sweep if this process hasn't done so for sweep_interval seconds"""
+        if time.time() - self._last_sweep >= self.sweep_interval:
+            self.sweep()
+
+    def __len__(self):
+        return self.connection().execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+
+
+class HybridSession(SecureCookieSession):
+    """Session dict that remembers its server-side id (None for cookie sessions)
+
+    ``permanent`` is a plain attribute set by the interface rather than a key
+    in the data, so opening a session never marks it modified.
+    """
+
+    def __init__(self, initial=None, sid=None, expires=None):
+        super().__init__(initial)
+        self.sid = sid
+        self.expires = expires
+        self._permanent = False
+
+    @property
+    def permanent(self):
+        return self._permanent
+
+    @permanent.setter
+    def permanent(self, value):
+        self._permanent = bool(value)
+
+
+class HybridSessionInterface(SessionInterface):
+    """Signed cookies for anonymous visitors, SQLite rows for signed-in users
+
+    Most visitors never log in, and their small sessions (e.g. the voice
+    conversation id) are kept in a signed cookie, so serving them needs no
+    server I/O at all. Once a session holds a server-side key (``user_id``)
+    it moves to the SessionStore and the cookie carries only a signed session
+    id; a fresh id is issued at that point to avoid session fixation. With
+    ``anonymous_cookies=False`` every session is kept server-side.
+
+    Sessions are permanent by default: cookies carry an expiry of
+    ``PERMANENT_SESSION_LIFETIME`` and signed-in sessions are extended while
+    they are in use. With ``permanent=False`` they end with the browser.
+    """
+
+    serializer = session_json_serializer
+    session_class = HybridSession
+
+    def __init__(self, store, anonymous_cookies=True, server_side_keys=SERVER_SIDE_KEYS, permanent=True):
+        """Initialize the interface with a SessionStore"""
+        self.store = store
+        self.anonymous_cookies = anonymous_cookies
+        self.server_side_keys = server_side_keys
+        self.permanent = permanent
+
+    def _cookie_serializer(self, app):
+        return URLSafeTimedSerializer(app.secret_key, salt='cookie-session', serializer=self.serializer,
+                                      signer_kwargs={'key_derivation': 'hmac', 'digest_method': 'sha256'})
+
+    def _sid_signer(self, app):
+        return Signer(app.secret_key, salt='server-session', key_derivation='hmac')
+
+    def _server_side(self, session):
+        return not self.anonymous_cookies or any(key in session for key in self.server_side_keys)
+
+    def open_session(self, app, request):
+        session = self._load_session(app, request)
+        session.permanent = self.permanent
+        return session
+
+    def _load_session(self, app, request):
+        value = request.cookies.get(self.get_cookie_name(app))
+        if not value:
+            return self.session_class()
+        lifetime = int(app.permanent_session_lifetime.total_seconds())
+
+        if value.startswith(SERVER_PREFIX):
+            try:
+                sid = self._sid_signer(app).unsign(value[len(SERVER_PREFIX):]).decode('ascii')
+            except BadSignature:
+                return self.session_class()
+            row = self.store.load(sid)
+            if row is None:
+                return self.session_class()
+            return self.session_class(self.serializer.loads(row[0]), sid=sid, expires=row[1])
+
+        try:
+            return self.session_class(self._cookie_serializer(app).loads(value, max_age=lifetime))
+        except BadSignature:
+            return self.session_class()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.modified:
+                if session.sid:
+                    self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+            return
+
+        if not self.should_set_cookie(app, session):
+            return
+
+        now = time.time()
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        expires = self.get_expiration_time(app, session)
+
+        if self._server_side(session):
+            if session.sid is None:
+                # New (or just signed-in) session: always a fresh id
+                session.sid = secrets.token_urlsafe(32)
+                session.modified = True
+            if session.modified:
+                self.store.save(session.sid, self.serializer.dumps(dict(session)), now + lifetime)
+            elif session.expires is None or session.expires - now < lifetime / 2:
+                # Refresh the expiry only when half the lifetime has gone, not on every request
+                self.store.touch(session.sid, now + lifetime)
+            else:
+                return
+            value = SERVER_PREFIX + self._sid_signer(app).sign(session.sid).decode('ascii')
+        else:
+            if session.sid:
+                # Signed out but kept some anonymous data: the server row is no longer needed
+                self.store.delete(session.sid)
+                session.sid = None
+            value = self._cookie_serializer(app).dumps(dict(session))
+
+        response.set_cookie(name, value, expires=expires, httponly=httponly, domain=domain,
+                            path=path, secure=secure, samesite=samesite)
@@ -1,284 +1,55 @@
-// Function to handle movie search form submission
-function searchMovie(e) {
-  e.preventDefault();
-  var my_api_key = '3b9553fe71eb09a8552cecc1dfd02e92';
-  var title = $('#autoComplete').val();
-  if (title == "") {
-    $('.results').css('display','none');
-    $('.fail').css('display','block');
-  }
-  else {
-    load_details(my_api_key, title);
-  }
-  return false;
-}
-
-$(function() {
-  // Button will be disabled until we type anything inside the input field
-  const source = document.getElementById('autoComplete');
-  const inputHandler = function(e) {
-    if(e.target.value==""){
-      $('.movie-button').attr('disabled', true);
-    }
-    else{
-      $('.movie-button').attr('disabled', false);
-    }
-  }
-  source.addEventListener('input', inputHandler);
-
-  $('.movie-button').on('click',function(){
-    var my_api_key = '74e9324ddf26ffda8ad02ea8bf8e6853';
-    var title = $('.movie').val();
-    if (title=="") {
-      $('.results').css('display','none');
-      $('.fail').css('display','block');
-    }
-    else{
-      load_details(my_api_key,title);
-    }
-  });
-});
-
-// will be invoked when clicking on the recommended movies
-function recommendcard(e){
-  var my_api_key = '3b9553fe71eb09a8552cecc1dfd02e92';
-  var title = e.getAttribute('title');
-  load_details(my_api_key,title);
-}
-
-// get the basic details of the movie from the API (based on the name of the movie)
-function load_details(my_api_key,title){
-  $.ajax({
-    type: 'GET',
-    url:'https://api.themoviedb.org/3/search/movie?api_key='+my_api_key+'&query='+title,
-    timeout: 15000,
-    success: function(movie){
-      if(movie.results.length<1){
-        $('.fail').css('display','block');
-        $('.results').css('display','none');
-        $("#loader").delay(500).fadeOut();
-      }
-      else{
-        $("#loader").fadeIn();
-        $('.fail').css('display','none');
-        $('.results').delay(1000).css('display','block');
-        var movie_id = movie.results[0].id;
-        var movie_title = movie.results[0].original_title;
-        movie_recs(movie_title,movie_id,my_api_key);
-      }
-    },
-    error: function(jqXHR, textStatus, errorThrown){
-      console.log("Error details: ", textStatus, errorThrown);
-      alert('Error contacting movie database: ' + textStatus);
-      $("#loader").delay(500).fadeOut();
-    },
-  });
-}
-
-// Function to create and submit a form with the given data
-function submitFormWithData(action, data) {
-  console.log("Submitting form with data:", data);
-  
-  var form = document.createElement("form");
-  form.setAttribute("method", "post");
-  form.setAttribute("action", action);
-  
-  // Add all data fields as hidden inputs
-  for (var key in data) {
-    var field = document.createElement("input");
-    field.setAttribute("type", "hidden");
-    field.setAttribute("name", key);
-    field.setAttribute("value", data[key]);
-    form.appendChild(field);
-  }
-  
-  // Append to body and submit
-  document.body.appendChild(form);
-  form.submit();
-}
-
-// passing the movie name to get the similar movies from python's flask
-function movie_recs(movie_title,movie_id,my_api_key){
-  console.log("Searching for movie:", movie_title);
-  
-  $.ajax({
-    type:'POST',
-    url:"/similarity",
-    data:{'name':movie_title},
-    success: function(recs){
-      console.log("Similarity response:", recs);
-      
-      if(recs=="Sorry! The movie you requested is not in our database. Please check the spelling or try with some other movies"){
-        console.log("Movie not found, redirecting to recommend.html");
-        
-        // Redirect to recommend page with error data
-        submitFormWithData("/recommend", {
-          'title': movie_title,
-          'error_message': 'true',
-          'movie_id': movie_id
-        });
-      }
-      else {
-        $('.fail').css('display','none');
-        $('.results').css('display','block');
-        var movie_arr = recs.split('---');
-        var arr = [];
-        for(const movie in movie_arr){
-          arr.push(movie_arr[movie]);
-        }
-        get_movie_details(movie_id,my_api_key,arr,movie_title);
-      }
-    },
-    error: function(){
-      alert("error recs");
-      $("#loader").delay(500).fadeOut();
-    },
-  });
-}
-
-// get all the details of the movie using the movie id.
-function get_movie_details(movie_id,my_api_key,arr,movie_title) {
-  console.log("Getting details for movie:", movie_title);
-  
-  $.ajax({
-    type:'GET',
-    url:'https://api.themoviedb.org/3/movie/'+movie_id+'?api_key='+my_api_key,
-    success: function(movie_details){
-      show_details(movie_details,arr,movie_title,my_api_key,movie_id);
-    },
-    error: function(){
-      alert("API Error!");
-      $("#loader").delay(500).fadeOut();
-    },
-  });
-}
-
-// passing all the details to python's flask for displaying and scraping the movie reviews using imdb id
-function show_details(movie_details,arr,movie_title,my_api_key,movie_id){
-  var imdb_id = movie_details.imdb_id;
-  var poster = 'https://image.tmdb.org/t/p/original'+movie_details.poster_path;
-  var overview = movie_details.overview;
-  var genres = movie_details.genres;
-  var rating = movie_details.vote_average;
-  var vote_count = movie_details.vote_count;
-  var release_date = new Date(movie_details.release_date);
-  var runtime = parseInt(movie_details.runtime);
-  var status = movie_details.status;
-  var genre_list = []
-  for (var genre in genres){
-    genre_list.push(genres[genre].name);
-  }
-  var my_genre = genre_list.join(", ");
-  if(runtime%60==0){
-    runtime = Math.floor(runtime/60)+" hour(s)"
-  }
-  else {
-    runtime = Math.floor(runtime/60)+" hour(s) "+(runtime%60)+" min(s)"
-  }
-  arr_poster = get_movie_posters(arr,my_api_key);
-
-  movie_cast = get_movie_cast(movie_id,my_api_key);
-
-  ind_cast = get_individual_cast(movie_cast,my_api_key);
-
-  details = {
-    'title':movie_title,
-      'cast_ids':JSON.stringify(movie_cast.cast_ids),
-      'cast_names':JSON.stringify(movie_cast.cast_names),
-      'cast_chars':JSON.stringify(movie_cast.cast_chars),
-      'cast_profiles':JSON.stringify(movie_cast.cast_profiles),
-      'cast_bdays':JSON.stringify(ind_cast.cast_bdays),
-      'cast_bios':JSON.stringify(ind_cast.cast_bios),
-      'cast_places':JSON.stringify(ind_cast.cast_places),
-      'imdb_id':imdb_id,
-      'poster':poster,
-      'genres':my_genre,
-      'overview':overview,
-      'rating':rating,
-      'vote_count':vote_count.toLocaleString(),
-      'release_date':release_date.toDateString().split(' ').slice(1).join(' '),
-      'runtime':runtime,
-      'status':status,
-      'rec_movies':JSON.stringify(arr),
-      'rec_posters':JSON.stringify(arr_poster),
-  }
-
-  // Submit form to server for display in movie_details.html
-  console.log("Submitting movie details to server");
-  submitFormWithData("/recommend", details);
-}
-
-// get the details of individual cast
-function get_individual_cast(movie_cast,my_api_key) {
-    cast_bdays = [];
-    cast_bios = [];
-    cast_places = [];
-    for(var cast_id in movie_cast.cast_ids){
-      $.ajax({
-        type:'GET',
-        url:'https://api.themoviedb.org/3/person/'+movie_cast.cast_ids[cast_id]+'?api_key='+my_api_key,
-        async:false,
-        success: function(cast_details){
-          cast_bdays.push((new Date(cast_details.birthday)).toDateString().split(' ').slice(1).join(' '));
-          cast_bios.push(cast_details.biography);
-          cast_places.push(cast_details.place_of_birth);
-        }
-      });
-    }
-    return {cast_bdays:cast_bdays,cast_bios:cast_bios,cast_places:cast_places};
-  }
-
-// getting the details of the cast for the requested movie
-function get_movie_cast(movie_id,my_api_key){
-    cast_ids= [];
-    cast_names = [];
-    cast_chars = [];
-    cast_profiles = [];
-
-    top_10 = [0,1,2,3,4,5,6,7,8,9];
-    $.ajax({
-      type:'GET',
-      url:"https://api.themoviedb.org/3/movie/"+movie_id+"/credits?api_key="+my_api_key,
-      async:false,
-      success: function(my_movie){
-        if(my_movie.cast.length>=10){
-          top_cast = [0,1,2,3,4,5,6,7,8,9];
-        }
-        else {
-          top_cast = [0,1,2,3,4];
-        }
-        for(var my_cast in top_cast){
-          cast_ids.push(my_movie.cast[my_cast].id)
-          cast_names.push(my_movie.cast[my_cast].name);
-          cast_chars.push(my_movie.cast[my_cast].character);
-          cast_profiles.push("https://image.tmdb.org/t/p/original"+my_movie.cast[my_cast].profile_path);
-        }
-      },
-      error: function(){
-        alert("Invalid Request!");
-        $("#loader").delay(500).fadeOut();
-      }
-    });
-
-    return {cast_ids:cast_ids,cast_names:cast_names,cast_chars:cast_chars,cast_profiles:cast_profiles};
-  }
-
-// getting posters for all the recommended movies
-function get_movie_posters(arr,my_api_key){
-  var arr_poster_list = []
-  for(var m in arr) {
-    $.ajax({
-      type:'GET',
-      url:'https://api.themoviedb.org/3/search/movie?api_key='+my_api_key+'&query='+arr[m],
-      async: false,
-      success: function(m_data){
-        arr_poster_list.push('https://image.tmdb.org/t/p/original'+m_data.results[0].poster_path);
-      },
-      error: function(){
-        alert("Invalid Request!");
-        $("#loader").delay(500).fadeOut();
-      },
-    })
-  }
-  return arr_poster_list;
-}
+// Function to handle movie search form submission
+function searchMovie(e) {
+  e.preventDefault();
+  var title = $('#autoComplete').val();
+  if (title == "") {
+    $('.results').css('display','none');
+    $('.fail').css('display','block');
+  }
+  else {
+    load_details(title);
+  }
+  return false;
+}
+
+$(function() {
+  // Button will be disabled until we type anything inside the input field
+  const source = document.getElementById('autoComplete');
+  const inputHandler = function(e) {
+    if(e.target.value==""){
+      $('.movie-button').attr('disabled', true);
+    }
+    else{
+      $('.movie-button').attr('disabled', false);
+    }
+  }
+  if (source) {
+    source.addEventListener('input', inputHandler);
+  }
+
+  $('.movie-button').on('click',function(){
+    var title = $('.movie').val();
+    if (title=="") {
+      $('.results').css('display','none');
+      $('.fail').css('display','block');
+    }
+    else{
+      load_details(title);
+    }
+  });
+});
+
+// will be invoked when clicking on the recommended movies
+function recommendcard(e){
+  var title = e.getAttribute('title');
+  load_details(title);
+}
+
+// The server assembles the whole details page (TMDB details, cast, recommendations
+// and reviews) and caches the rendered page, so go straight to it; it shows its own
+// "not in our catalog" message
+function load_details(title){
+  $("#loader").fadeIn();
+  $('.fail').css('display','none');
+  window.location.href = '/movie_details?title=' + encodeURIComponent(title);
+}
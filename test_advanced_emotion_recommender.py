@@ -0,0 +1,68 @@
+import unittest
+
+from advanced_emotion_recommender import EMOTION_MOVIE_STRATEGIES, EmotionBasedMovieRecommender
+
+CATALOG = [
+    ('Paddington 2', ['Comedy', 'Family'], 7.8),
+    ('Hereditary', ['Horror', 'Thriller'], 7.3),
+    ('Mad Max: Fury Road', ['Action', 'Adventure', 'Sci-Fi'], 8.1),
+    ('Up', ['Animation', 'Adventure', 'Comedy'], 8.3),
+    ('The Notebook', ['Drama', 'Romance'], 7.8),
+    ('Saw', ['Horror'], 7.6),
+    ('Hot Fuzz', ['Action', 'Comedy', 'Crime'], 7.8),
+    ('Dunkirk', ['Drama', 'History', 'War'], 7.8),
+    ('Cats', ['Comedy', 'Drama', 'Family', 'Fantasy', 'Musical'], 2.8),
+]
+
+
+def make_recommender(catalog=CATALOG):
+    """Recommender over a small catalog, without the audio devices __init__ opens"""
+    recommender = EmotionBasedMovieRecommender.__new__(EmotionBasedMovieRecommender)
+    recommender.movies = [{'title': title, 'genres': genres, 'imdb_score': score}
+                          for title, genres, score in catalog]
+    recommender.emotion_movie_strategies = EMOTION_MOVIE_STRATEGIES
+    recommender.user_emotion = 'neutral'
+    recommender._build_emotion_priors()
+    return recommender
+
+
+def titles(recommender, emotion, user_input='', n_recommendations=3):
+    recommender.user_emotion = emotion
+    return [movie['title'] for movie in
+            recommender.get_emotion_based_recommendations(user_input, n_recommendations)]
+
+
+class TestEmotionBasedRecommendations(unittest.TestCase):
+    def setUp(self):
+        self.recommender = make_recommender()
+
+    def test_sad_favours_uplifting_genres(self):
+        """Test sad users get comedies and family films, ties kept in catalog order"""
+        self.assertEqual(titles(self.recommender, 'sad'), ['Cats', 'Paddington 2', 'Up'])
+        self.assertEqual(titles(self.recommender, 'sad', n_recommendations=1), ['Cats'])
+        self.assertNotIn('Hereditary', titles(self.recommender, 'sad', n_recommendations=10))
+
+    def test_excited_favours_high_energy_genres(self):
+        """Test excited users get action and thrillers"""
+        self.assertEqual(titles(self.recommender, 'excited', n_recommendations=5),
+                         ['Mad Max: Fury Road', 'Up', 'Hot Fuzz', 'Hereditary', 'Cats'])
+
+    def test_requested_genres_add_to_the_emotion_score(self):
+        """Test a genre the user names lifts matching movies"""
+        self.assertEqual(titles(self.recommender, 'sad', 'something with romance', n_recommendations=4),
+                         ['Cats', 'Paddington 2', 'Up', 'The Notebook'])
+
+    def test_unknown_emotion_uses_the_neutral_strategy(self):
+        """Test an emotion without a strategy is scored like neutral"""
+        self.assertEqual(titles(self.recommender, 'confused'), ['Up', 'The Notebook', 'Cats'])
+        self.assertEqual(titles(self.recommender, 'confused', n_recommendations=10),
+                         titles(self.recommender, 'neutral', n_recommendations=10))
+
+    def test_no_candidates_falls_back(self):
+        """Test a catalog with nothing suitable goes through the fallback"""
+        recommender = make_recommender([('Saw', ['Horror'], 7.6), ('Dunkirk', ['Drama', 'War'], 7.8)])
+        self.assertEqual(titles(recommender, 'sad'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask, abort, request
+
+import assets
+from assets import AssetManifest, build_assets
+
+STYLE = b'body { color: #e50914; }\n' * 100
+
+
+class TestAssetPipeline(unittest.TestCase):
+    def setUp(self):
+        self.static_dir = tempfile.mkdtemp()
+        self.out_dir = os.path.join(self.static_dir, 'dist')
+        with open(os.path.join(self.static_dir, 'style.css'), 'wb') as f:
+            f.write(STYLE)
+        with open(os.path.join(self.static_dir, 'tiny.js'), 'wb') as f:
+            f.write(b'var x = 1;')
+        with open(os.path.join(self.static_dir, 'Untitled design (2).gif'), 'wb') as f:
+            f.write(b'GIF89a')
+        self.manifest = build_assets(self.static_dir, self.out_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.static_dir)
+
+    def test_fingerprints_and_precompresses(self):
+        """Test files get content-hashed names and text assets get a gzip copy"""
+        entry = self.manifest['style.css']
+        self.assertRegex(entry['file'], r'^style\.[0-9a-f]{10}\.css$')
+        self.assertIn('gzip', entry['encodings'])
+        with open(os.path.join(self.out_dir, entry['file'] + '.gz'), 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), STYLE)
+        # Too small to be worth compressing
+        self.assertNotIn('encodings', self.manifest['tiny.js'])
+        self.assertRegex(self.manifest['Untitled design (2).gif']['file'], r'^Untitled-design-2\.[0-9a-f]{10}\.gif$')
+
+    def test_rebuild_is_stable_and_changes_with_content(self):
+        """Test unchanged files keep their name and edited ones get a new one"""
+        again = build_assets(self.static_dir, self.out_dir)
+        self.assertEqual(again['style.css']['file'], self.manifest['style.css']['file'])
+        with open(os.path.join(self.static_dir, 'style.css'), 'ab') as f:
+            f.write(b'a { color: white; }')
+        changed = build_assets(self.static_dir, self.out_dir)
+        self.assertNotEqual(changed['style.css']['file'], self.manifest['style.css']['file'])
+        self.assertNotIn('dist/manifest.json', changed)
+
+    def test_manifest_urls_and_fallback(self):
+        """Test templates get fingerprinted URLs, or plain /static/ ones without a build"""
+        manifest = AssetManifest(self.out_dir)
+        self.assertEqual(manifest.url('style.css'), '/assets/' + self.manifest['style.css']['file'])
+        self.assertEqual(manifest.url('/static/style.css'), manifest.url('style.css'))
+        self.assertEqual(manifest.url('missing.png'), '/static/missing.png')
+
+        manifest.disable()
+        self.assertEqual(manifest.url('Untitled design (2).gif'), '/static/Untitled%20design%20%282%29.gif')
+        self.assertEqual(manifest.srcset('style.css'), '')
+
+    def test_variant_selection(self):
+        """Test the smallest WebP variant at least as wide as asked for is chosen"""
+        manifest = AssetManifest(self.out_dir)
+        manifest.entries['poster.jpg'] = {'file': 'poster.1.jpg',
+                                          'variants': {'96': 'poster.1.w96.webp', '342': 'poster.1.w342.webp'}}
+        self.assertEqual(manifest.url('poster.jpg', width=200), '/assets/poster.1.w342.webp')
+        self.assertEqual(manifest.url('poster.jpg', width=1000), '/assets/poster.1.w342.webp')
+        self.assertEqual(manifest.url('poster.jpg'), '/assets/poster.1.jpg')
+        self.assertEqual(manifest.srcset('poster.jpg'), '/assets/poster.1.w96.webp 96w, /assets/poster.1.w342.webp 342w')
+
+    @unittest.skipIf(assets.Image is None, 'Pillow is not installed')
+    def test_image_variants(self):
+        """Test images get resized WebP variants without upscaling"""
+        from PIL import Image
+        Image.new('RGB', (500, 750), 'red').save(os.path.join(self.static_dir, 'poster.jpg'))
+        manifest = build_assets(self.static_dir, self.out_dir, widths=(96, 342, 780))
+        self.assertEqual(sorted(manifest['poster.jpg']['variants'], key=int), ['96', '342', '500'])
+        with Image.open(os.path.join(self.out_dir, manifest['poster.jpg']['variants']['342'])) as image:
+            self.assertEqual(image.size, (342, 513))
+
+    def test_served_with_immutable_headers_and_negotiated_encoding(self):
+        """Test built assets are served precompressed when accepted, and cached for a year"""
+        app = Flask(__name__)
+        manifest = AssetManifest(self.out_dir)
+
+        @app.route('/assets/<path:filename>')
+        def built_asset(filename):
+            response = manifest.send(filename, request)
+            if response is None:
+                abort(404)
+            return response
+
+        client = app.test_client()
+        url = manifest.url('style.css')
+        plain = client.get(url)
+        self.assertEqual(plain.data, STYLE)
+        self.assertIn('immutable', plain.headers['Cache-Control'])
+        self.assertIn('max-age=31536000', plain.headers['Cache-Control'])
+        self.assertEqual(plain.headers['Vary'], 'Accept-Encoding')
+        self.assertNotIn('Content-Encoding', plain.headers)
+
+        compressed = client.get(url, headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(compressed.headers['Content-Encoding'], 'gzip')
+        self.assertTrue(compressed.headers['Content-Type'].startswith('text/css'))
+        self.assertEqual(gzip.decompress(compressed.data), STYLE)
+
+        self.assertEqual(client.get('/assets/style.css').status_code, 404)
+        self.assertEqual(client.get('/assets/manifest.json').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import io
+import unittest
+import wave
+
+import numpy as np
+
+from audio_buffer import AudioBuffer
+
+SAMPLE_RATE = 16000
+
+
+def wav_bytes(samples, channels=1, sample_rate=SAMPLE_RATE):
+    """Write int16 samples as a WAV file with the standard library"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(samples.astype('<i2').tobytes())
+    return buffer.getvalue()
+
+
+class TestAudioBuffer(unittest.TestCase):
+    def setUp(self):
+        t = np.arange(SAMPLE_RATE // 2) / SAMPLE_RATE
+        self.samples = (8000 * np.sin(2 * np.pi * 220 * t)).astype(np.int16)
+
+    def test_pcm16_wav_is_decoded_without_copying(self):
+        """Test uploaded WAV samples are a view into the request bytes"""
+        data = wav_bytes(self.samples)
+        audio = AudioBuffer.from_bytes(data)
+        self.assertEqual(audio.sample_rate, SAMPLE_RATE)
+        np.testing.assert_array_equal(audio.samples, self.samples)
+        self.assertFalse(audio.samples.flags.owndata)
+        # The same bytes are forwarded to Deepgram
+        self.assertIs(audio.to_wav_bytes(), audio._wav_bytes)
+        self.assertEqual(audio.to_wav_bytes(), data)
+
+    def test_upload_stream_is_decoded(self):
+        """Test a file-like upload is read straight from memory"""
+        audio = AudioBuffer.from_stream(io.BytesIO(wav_bytes(self.samples)))
+        self.assertAlmostEqual(audio.duration, 0.5)
+        self.assertEqual(len(audio), len(self.samples))
+
+    def test_stereo_mono_is_a_view(self):
+        """Test the first channel of a stereo upload is taken without a copy"""
+        stereo = np.stack([self.samples, -self.samples], axis=1)
+        audio = AudioBuffer.from_bytes(wav_bytes(stereo.reshape(-1), channels=2))
+        self.assertEqual(audio.channels, 2)
+        mono = audio.mono()
+        np.testing.assert_array_equal(mono, self.samples)
+        self.assertTrue(np.shares_memory(mono, audio.samples))
+
+    def test_recorded_float_audio_builds_valid_wav(self):
+        """Test a float recording is framed as a readable PCM16 WAV"""
+        recording = self.samples.astype(np.float32) / 32768.0
+        audio = AudioBuffer.from_array(recording, SAMPLE_RATE)
+        with wave.open(io.BytesIO(audio.to_wav_bytes()), 'rb') as wav_file:
+            self.assertEqual(wav_file.getnchannels(), 1)
+            self.assertEqual(wav_file.getsampwidth(), 2)
+            self.assertEqual(wav_file.getframerate(), SAMPLE_RATE)
+            frames = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype='<i2')
+        np.testing.assert_allclose(frames, self.samples, atol=2)
+
+    def test_float_view_is_normalised(self):
+        """Test int16 audio is scaled into [-1, 1] for emotion features"""
+        audio = AudioBuffer.from_array(self.samples, SAMPLE_RATE)
+        features = audio.as_float()
+        self.assertEqual(features.dtype, np.float32)
+        self.assertLessEqual(np.abs(features).max(), 1.0)
+
+    def test_non_wav_is_not_parsed_as_pcm(self):
+        """Test arbitrary bytes are not mistaken for a PCM16 WAV"""
+        self.assertIsNone(AudioBuffer._parse_pcm16_wav(b'OggS' + b'\x00' * 40))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import hashlib
+import os
+import threading
+import time
+import unittest
+
+import auth
+from auth import AuthBusy, PasswordHasher, hash_password, needs_rehash, parse_hash, verify_password
+
+
+class TestPasswordHashing(unittest.TestCase):
+    def test_hash_records_algorithm_and_cost(self):
+        """Test the stored hash carries its algorithm and iteration count"""
+        stored = hash_password('secret', iterations=1000)
+        algorithm, iterations, salt, digest = parse_hash(stored)
+        self.assertEqual((algorithm, iterations), ('pbkdf2_sha256', 1000))
+        self.assertEqual(len(salt), auth.SALT_BYTES)
+        self.assertTrue(verify_password(stored, 'secret'))
+        self.assertFalse(verify_password(stored, 'Secret'))
+
+    def test_legacy_hashes_still_verify(self):
+        """Test hashes in the old salt+digest byte format are accepted"""
+        salt = os.urandom(32)
+        legacy = salt + hashlib.pbkdf2_hmac('sha256', b'secret', salt, 100000)
+        self.assertTrue(verify_password(legacy, 'secret'))
+        self.assertFalse(verify_password(legacy, 'wrong'))
+        self.assertTrue(needs_rehash(legacy))
+
+    def test_needs_rehash_when_cost_changes(self):
+        """Test a hash made at a different cost is flagged for upgrade"""
+        stored = hash_password('secret', iterations=1000)
+        self.assertFalse(needs_rehash(stored, iterations=1000))
+        self.assertTrue(needs_rehash(stored, iterations=2000))
+
+    def test_malformed_hash_rejected(self):
+        """Test garbage in the password column never verifies"""
+        self.assertFalse(verify_password('not-a-hash', 'secret'))
+        self.assertFalse(verify_password('md5$1$abc$def', 'secret'))
+
+
+class TestPasswordHasher(unittest.TestCase):
+    def test_verify_upgrades_old_hashes(self):
+        """Test a successful login returns a new hash when the cost has changed"""
+        hasher = PasswordHasher(workers=1, queue_limit=1, iterations=2000)
+        old = hash_password('secret', iterations=1000)
+        ok, new_hash = hasher.verify(old, 'secret')
+        self.assertTrue(ok)
+        self.assertEqual(parse_hash(new_hash)[1], 2000)
+        self.assertEqual(hasher.verify(new_hash, 'secret'), (True, None))
+        self.assertEqual(hasher.verify(new_hash, 'nope'), (False, None))
+
+    def test_unknown_user_is_rejected(self):
+        """Test a missing account fails after doing the same work as a real check"""
+        hasher = PasswordHasher(workers=1, queue_limit=1, iterations=1000)
+        self.assertEqual(hasher.verify(None, 'secret'), (False, None))
+
+    def test_queue_limit_refuses_bursts(self):
+        """Test requests beyond workers + queue_limit get AuthBusy instead of waiting"""
+        hasher = PasswordHasher(workers=1, queue_limit=1, iterations=1000)
+        release = threading.Event()
+        started = threading.Event()
+
+        def slow(_):
+            started.set()
+            release.wait(5)
+            return True
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(hasher._run(slow, None))) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        started.wait(5)
+        time.sleep(0.05)
+        with self.assertRaises(AuthBusy):
+            hasher.hash('secret')
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(results, [True, True])
+        # Slots are released once the burst is over
+        self.assertTrue(verify_password(hasher.hash('secret'), 'secret'))
+
+    def test_slow_hash_times_out_as_busy(self):
+        """Test a hash that waits past the timeout raises AuthBusy and gives back its slot"""
+        hasher = PasswordHasher(workers=1, queue_limit=1, iterations=1000, timeout=0.1)
+        release = threading.Event()
+
+        def slow(_):
+            release.wait(5)
+            return True
+
+        def block():
+            # Its own wait times out too, but the hash keeps its slot until it finishes
+            with self.assertRaises(AuthBusy):
+                hasher._run(slow, None)
+
+        blocker = threading.Thread(target=block, daemon=True)
+        blocker.start()
+        time.sleep(0.05)
+        # Queued behind the blocker and cancelled on timeout; a leaked slot would make
+        # the second attempt fail straight away with 'Too many sign-in attempts'
+        for _ in range(2):
+            with self.assertRaisesRegex(AuthBusy, 'too long'):
+                hasher.hash('secret')
+        release.set()
+        blocker.join(5)
+        self.assertTrue(verify_password(hasher.hash('secret'), 'secret'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from collaborative import ItemItemCF, blend_scores, rating_weight
+from user_store import UserStore
+
+
+def random_interactions(seed=0, users=40, items=25, per_user=6):
+    rng = random.Random(seed)
+    rows = []
+    for user in range(users):
+        for item in rng.sample(range(items), per_user):
+            rows.append((user, f'movie {item}', rng.choice([0.5, 1 / 3, 2 / 3, 1.0]), 'rating'))
+    return rows
+
+
+class TestItemItemCF(unittest.TestCase):
+    def assertSameNeighbours(self, left, right, item):
+        a = dict(left.similar(item, k=100))
+        b = dict(right.similar(item, k=100))
+        self.assertEqual(set(a), set(b))
+        for key in a:
+            self.assertAlmostEqual(a[key], b[key], places=9)
+
+    def test_incremental_updates_match_full_fit(self):
+        """Test applying ratings one by one gives the same model as a batch fit"""
+        rows = random_interactions()
+        batch = ItemItemCF().fit(rows)
+        incremental = ItemItemCF()
+        for row in rows:
+            incremental.update(*row)
+        for item in ['movie 0', 'movie 7', 'movie 19']:
+            self.assertSameNeighbours(batch, incremental, item)
+
+    def test_compaction_preserves_scores(self):
+        """Test folding pending updates into the CSR matrix doesn't change results"""
+        rows = random_interactions(seed=1)
+        compacting = ItemItemCF(compact_threshold=50).fit(rows[:100])
+        reference = ItemItemCF(compact_threshold=10 ** 9).fit(rows[:100])
+        for row in rows[100:]:
+            compacting.update(*row)
+            reference.update(*row)
+        self.assertLess(compacting.delta_size, 50)
+        for item in ['movie 3', 'movie 11']:
+            self.assertSameNeighbours(compacting, reference, item)
+
+    def test_changes_and_removals_update_incrementally(self):
+        """Test re-rating and removing signals matches a refit on the final state"""
+        rows = random_interactions(seed=2)
+        model = ItemItemCF().fit(rows)
+        model.update(0, rows[0][1], 0.0, 'rating')
+        model.update(1, rows[6][1], 1.0, 'rating')
+        model.update(2, 'movie 24', 0.5, 'watchlist')
+        model.update(2, 'movie 24', 0, 'watchlist')
+
+        final = [row for row in rows if row[:2] != (0, rows[0][1])]
+        final = [(u, i, 1.0 if (u, i) == (1, rows[6][1]) else w, s) for u, i, w, s in final]
+        expected = ItemItemCF().fit(final)
+        for item in [rows[0][1], rows[6][1], 'movie 24']:
+            self.assertSameNeighbours(model, expected, item)
+
+    def test_strongest_signal_wins(self):
+        """Test a watchlist entry doesn't lower a stronger rating for the same movie"""
+        model = ItemItemCF()
+        model.update('u', 'Heat', 1.0, 'rating')
+        model.update('u', 'Heat', 0.5, 'watchlist')
+        self.assertEqual(model.user_items['u'][model.item_ids['heat']], 1.0)
+        model.update('u', 'Heat', 0, 'rating')
+        self.assertEqual(model.user_items['u'][model.item_ids['heat']], 0.5)
+
+    def test_similar_ranks_co_rated_movies(self):
+        """Test the movie rated by the same users comes first"""
+        model = ItemItemCF()
+        for user in range(5):
+            model.update(user, 'Alien', 1.0)
+            model.update(user, 'Aliens', 1.0)
+        model.update(9, 'Alien', 1.0)
+        model.update(9, 'Amelie', 1.0)
+        neighbours = model.similar('ALIEN ')
+        self.assertEqual(neighbours[0][0], 'aliens')
+        self.assertGreater(neighbours[0][1], neighbours[1][1])
+        self.assertEqual(model.similar('unknown'), [])
+
+    def test_rating_weight(self):
+        """Test low ratings carry no signal and five stars carry full weight"""
+        self.assertEqual(rating_weight(2), 0.0)
+        self.assertEqual(rating_weight(5), 1.0)
+
+
+class TestBlendAndSync(unittest.TestCase):
+    def test_blend_scores(self):
+        """Test CF neighbours lift their content score by the blend weight"""
+        content = np.array([1.0, 0.2, 0.4])
+        blended = blend_scores(content, {'a': 0, 'b': 1, 'c': 2}, [('b', 1.0), ('zzz', 1.0)], weight=0.5)
+        np.testing.assert_allclose(blended, [0.5, 0.6, 0.2])
+        self.assertIs(blend_scores(content, {}, []), content)
+
+    def test_sync_picks_up_other_workers_ratings(self):
+        """Test sync() applies ratings and watchlist entries stored since the last sync"""
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            store = UserStore(os.path.join(tmp_dir, 'users.db'))
+            for email in ['a@x', 'b@x']:
+                store.create_user(email, email, b'h')
+            a, b = store.get_user('a@x')['id'], store.get_user('b@x')['id']
+            store.rate_movie(a, {'id': 1, 'title': 'Heat'}, 5)
+            model = ItemItemCF().load(store)
+            self.assertEqual(model.similar('heat'), [])
+
+            store.rate_movie(a, {'id': 2, 'title': 'Ronin'}, 5)
+            store.add_to_watchlist(b, {'id': 1, 'title': 'Heat'})
+            store.add_to_watchlist(b, {'id': 2, 'title': 'Ronin'})
+            model.sync(store)
+            self.assertEqual(model.similar('heat')[0][0], 'ronin')
+            store.close()
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from conversation_engine import ConversationEngine, Utterance
+
+
+class FakeSpeaker:
+    """Stands in for PipelinedSpeaker - each reply 'plays' for a fixed time"""
+
+    def __init__(self, duration=0.05):
+        self.duration = duration
+        self.spoken = []
+        self.interrupted = []
+        self._done = threading.Event()
+        self._done.set()
+        self._current = None
+
+    @property
+    def is_speaking(self):
+        return not self._done.is_set()
+
+    def speak(self, text, **voice):
+        self.spoken.append(text)
+        self._current = text
+        self._done.clear()
+        threading.Timer(self.duration, self._done.set).start()
+
+    def wait(self, timeout=None):
+        self._done.wait(timeout)
+
+    def stop(self):
+        if self.is_speaking:
+            self.interrupted.append(self._current)
+        self._done.set()
+
+
+class ScriptedConversation:
+    """Feeds scripted utterances through the engine's stages"""
+
+    def __init__(self, utterances, capture_delay=0.0):
+        self.utterances = list(utterances)
+        self.capture_delay = capture_delay
+        self.active = True
+        self.transcribed = []
+        self.engine = None
+
+    def capture(self):
+        time.sleep(self.capture_delay)
+        if not self.utterances:
+            time.sleep(0.01)
+            return None
+        return self.utterances.pop(0)
+
+    def transcribe(self, audio_data):
+        self.transcribed.append(audio_data)
+        return None if audio_data == 'silence' else audio_data
+
+    def respond(self, text, audio_data):
+        if text == 'goodbye':
+            self.engine.say('Goodbye!')
+            self.active = False
+        else:
+            self.engine.say(f'Reply to {text}')
+
+
+class OnsetConversation(ScriptedConversation):
+    """Reports speech onset to the engine, then takes speech_length to finish the utterance"""
+
+    def __init__(self, utterances, speaker, capture_delay=0.0, speech_length=0.0):
+        super().__init__(utterances, capture_delay)
+        self.speaker = speaker
+        self.speech_length = speech_length
+        self.speaking_after_onset = []
+
+    def capture(self):
+        time.sleep(self.capture_delay)
+        if not self.utterances:
+            time.sleep(0.01)
+            return None
+        self.engine.speech_started()
+        self.speaking_after_onset.append(self.speaker.is_speaking)
+        time.sleep(self.speech_length)
+        return self.utterances.pop(0)
+
+
+def run_engine(conversation, speaker, **kwargs):
+    engine = ConversationEngine(conversation.capture, conversation.transcribe, conversation.respond,
+                                speaker, lambda: conversation.active, **kwargs)
+    conversation.engine = engine
+    asyncio.run(asyncio.wait_for(engine.run(), timeout=5))
+    return engine
+
+
+class TestConversationEngine(unittest.TestCase):
+    def test_turns_flow_through_all_stages(self):
+        """Test each utterance is transcribed, answered and spoken in order"""
+        conversation = ScriptedConversation(['hello', 'silence', 'funny movie', 'goodbye'], capture_delay=0.1)
+        speaker = FakeSpeaker(duration=0.01)
+        engine = run_engine(conversation, speaker)
+
+        self.assertEqual(speaker.spoken, ['Reply to hello', 'Reply to funny movie', 'Goodbye!'])
+        self.assertEqual(conversation.transcribed, ['hello', 'silence', 'funny movie', 'goodbye'])
+        self.assertFalse(engine.is_running)
+
+    def test_streamed_utterances_skip_transcription(self):
+        """Test an Utterance from capture() is answered with its own text"""
+        conversation = ScriptedConversation([Utterance('audio', 'hello'), 'goodbye'], capture_delay=0.1)
+        speaker = FakeSpeaker(duration=0.01)
+        run_engine(conversation, speaker)
+
+        self.assertEqual(conversation.transcribed, ['goodbye'])
+        self.assertEqual(speaker.spoken, ['Reply to hello', 'Goodbye!'])
+
+    def test_speech_during_playback_barges_in(self):
+        """Test talking over a reply stops it and the new request is answered"""
+        conversation = ScriptedConversation(['hello', 'actually, a comedy', 'goodbye'], capture_delay=0.15)
+        speaker = FakeSpeaker(duration=1.0)
+        run_engine(conversation, speaker, barge_in=True)
+
+        self.assertIn('Reply to hello', speaker.interrupted)
+        self.assertIn('Reply to actually, a comedy', speaker.spoken)
+        self.assertEqual(speaker.spoken[-1], 'Goodbye!')
+
+    def test_half_duplex_ignores_speech_during_playback(self):
+        """Test barge_in=False drops what the microphone hears while speaking"""
+        conversation = ScriptedConversation(['hello', 'echo of the reply', 'goodbye'], capture_delay=0.2)
+        speaker = FakeSpeaker(duration=0.3)
+        run_engine(conversation, speaker, barge_in=False)
+
+        self.assertNotIn('echo of the reply', conversation.transcribed)
+        self.assertEqual(speaker.interrupted, [])
+        self.assertEqual(speaker.spoken, ['Reply to hello', 'Goodbye!'])
+
+    def test_barge_in_stops_playback_at_speech_onset(self):
+        """Test playback stops when speech starts, not when the utterance ends"""
+        speaker = FakeSpeaker(duration=2.0)
+        conversation = OnsetConversation(['hello', 'actually, a comedy', 'goodbye'], speaker,
+                                         capture_delay=0.15, speech_length=0.3)
+        run_engine(conversation, speaker, barge_in=True)
+
+        self.assertIn('Reply to hello', speaker.interrupted)
+        self.assertNotIn(True, conversation.speaking_after_onset)
+        self.assertIn('Reply to actually, a comedy', speaker.spoken)
+
+    def test_half_duplex_drops_speech_that_started_during_playback(self):
+        """Test an echo that outlasts the reply is still dropped"""
+        speaker = FakeSpeaker(duration=0.3)
+        conversation = OnsetConversation(['hello', 'echo of the reply', 'goodbye'], speaker,
+                                         capture_delay=0.15, speech_length=0.4)
+        run_engine(conversation, speaker, barge_in=False)
+
+        self.assertNotIn('echo of the reply', conversation.transcribed)
+        self.assertEqual(speaker.interrupted, [])
+        self.assertEqual(speaker.spoken, ['Reply to hello', 'Goodbye!'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from conversation_store import ConversationState, ConversationStore, MAX_HISTORY, SharedConversationStore
+
+
+def movies(*titles):
+    return [{'title': title, 'genres': ['Comedy']} for title in titles]
+
+
+class TestConversationState(unittest.TestCase):
+    def test_record_turn_updates_context(self):
+        """Test a turn is remembered for repeat avoidance and history"""
+        state = ConversationState()
+        state.record_turn('something funny', 'happy', 0.8, {'genres': ['Comedy']},
+                          movies('Paddington 2', 'Hot Fuzz'), 'Here you go')
+        self.assertEqual(state.session_recommendations, ['Paddington 2', 'Hot Fuzz'])
+        self.assertEqual(state.conversation_context['last_recommendations'], ['Paddington 2', 'Hot Fuzz'])
+        self.assertEqual(state.conversation_context['mood_history'][0]['emotion'], 'happy')
+        self.assertEqual(state.conversation_history[0]['recommendations'], ['Paddington 2', 'Hot Fuzz'])
+
+    def test_history_is_bounded(self):
+        """Test long sessions don't grow without limit"""
+        state = ConversationState()
+        for i in range(MAX_HISTORY + 5):
+            state.record_turn(f'turn {i}', 'neutral', 0.5, {}, movies(f'Movie {i}'), 'ok')
+        self.assertEqual(len(state.conversation_history), MAX_HISTORY)
+        self.assertEqual(state.conversation_history[-1]['user'], f'turn {MAX_HISTORY + 4}')
+
+    def test_json_round_trip(self):
+        """Test state survives serialisation"""
+        state = ConversationState(is_awake=True)
+        state.record_turn('sad movie', 'sad', 0.6, {'genres': ['Drama']}, movies('Up'), 'Try Up')
+        restored = ConversationState.from_json(state.to_json())
+        self.assertEqual(restored.to_dict(), json.loads(state.to_json()))
+        self.assertTrue(restored.is_awake)
+
+
+class TestConversationStore(unittest.TestCase):
+    def test_sessions_are_isolated(self):
+        """Test two users' recommendations don't leak into each other"""
+        store = ConversationStore()
+        store.get('alice').record_turn('x', 'happy', 1.0, {}, movies('Up'), 'ok')
+        self.assertEqual(store.get('bob').session_recommendations, [])
+        self.assertEqual(store.get('alice').session_recommendations, ['Up'])
+
+    def test_least_recently_used_session_is_evicted(self):
+        """Test the store holds at most max_sessions sessions"""
+        store = ConversationStore(max_sessions=2)
+        store.get('a')
+        store.get('b')
+        store.get('a')
+        store.get('c')
+        self.assertEqual(len(store), 2)
+        self.assertIn('a', store)
+        self.assertNotIn('b', store)
+
+    def test_expired_session_starts_fresh(self):
+        """Test idle sessions are dropped after the TTL"""
+        store = ConversationStore(ttl=60)
+        state = store.get('a')
+        state.record_turn('x', 'happy', 1.0, {}, movies('Up'), 'ok')
+        state.last_activity = time.time() - 120
+        self.assertEqual(store.get('a').session_recommendations, [])
+
+    def test_concurrent_requests_for_a_session_are_serialised(self):
+        """Test turns from one session never interleave"""
+        store = ConversationStore()
+        active = []
+        overlaps = []
+
+        def turn(i):
+            with store.session('same') as state:
+                active.append(i)
+                if len(active) > 1:
+                    overlaps.append(i)
+                time.sleep(0.01)
+                state.record_turn(f'turn {i}', 'neutral', 0.5, {}, movies(f'Movie {i}'), 'ok')
+                active.remove(i)
+
+        threads = [threading.Thread(target=turn, args=(i,)) for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(overlaps, [])
+        self.assertEqual(len(store.get('same').session_recommendations), 10)
+
+
+class TestSharedConversationStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'conversations.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_workers_share_conversations(self):
+        """Test a turn taken through one worker's store is seen by another's"""
+        http_worker = SharedConversationStore(self.path)
+        gateway_worker = SharedConversationStore(self.path)
+        with http_worker.session('alice') as state:
+            state.record_turn('x', 'happy', 1.0, {}, movies('Up'), 'ok')
+        with gateway_worker.session('alice') as state:
+            self.assertEqual(state.session_recommendations, ['Up'])
+            state.record_turn('y', 'sad', 0.5, {}, movies('Coco'), 'ok')
+        self.assertEqual(http_worker.get('alice').session_recommendations, ['Up', 'Coco'])
+        self.assertEqual(http_worker.get('bob').session_recommendations, [])
+        self.assertEqual(len(http_worker), 1)
+
+    def test_expired_session_starts_fresh(self):
+        """Test idle sessions are ignored after the TTL and removed by a sweep"""
+        store = SharedConversationStore(self.path, ttl=60)
+        state = ConversationState()
+        state.record_turn('x', 'happy', 1.0, {}, movies('Up'), 'ok')
+        state.last_activity = time.time() - 120
+        store.put('a', state)
+        self.assertNotIn('a', store)
+        self.assertEqual(store.get('a').session_recommendations, [])
+        store.sweep()
+        self.assertEqual(len(store), 0)
+
+    def test_concurrent_turns_in_a_process_are_all_kept(self):
+        """Test turns from one session are serialised, so none overwrites another"""
+        store = SharedConversationStore(self.path)
+
+        def turn(i):
+            with store.session('same') as state:
+                state.record_turn(f'turn {i}', 'neutral', 0.5, {}, movies(f'Movie {i}'), 'ok')
+
+        threads = [threading.Thread(target=turn, args=(i,)) for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(store.get('same').session_recommendations), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import unittest
+
+import numpy as np
+import websockets
+
+from deepgram_streaming import DeepgramStreamingTranscriber
+
+
+def results_message(transcript, is_final=False, speech_final=False):
+    """Build a Deepgram live 'Results' message"""
+    return json.dumps({
+        'type': 'Results',
+        'is_final': is_final,
+        'speech_final': speech_final,
+        'channel': {'alternatives': [{'transcript': transcript, 'confidence': 0.95}]}
+    })
+
+
+class FakeDeepgramServer:
+    """Local WebSocket server that answers like Deepgram after a few audio chunks"""
+
+    def __init__(self, script, chunks_before_reply=2):
+        self.script = script
+        self.chunks_before_reply = chunks_before_reply
+        self.audio_chunks = []
+        self.control_messages = []
+        self.request_path = None
+        self.subprotocol = None
+
+    async def handler(self, ws):
+        # websockets >= 14 exposes the handshake request, older versions the path
+        self.request_path = ws.request.path if hasattr(ws, 'request') else ws.path
+        self.subprotocol = ws.subprotocol
+        replied = False
+        async for message in ws:
+            if isinstance(message, bytes):
+                self.audio_chunks.append(message)
+                if not replied and len(self.audio_chunks) >= self.chunks_before_reply:
+                    replied = True
+                    for reply in self.script:
+                        await ws.send(reply)
+            else:
+                self.control_messages.append(json.loads(message))
+                if self.control_messages[-1].get('type') == 'CloseStream':
+                    await ws.close()
+                    return
+
+
+class TestDeepgramStreamingTranscriber(unittest.TestCase):
+    def run_with_server(self, server, coro_factory):
+        """Start the fake server, run the client coroutine and stop the server"""
+        async def runner():
+            async with websockets.serve(server.handler, '127.0.0.1', 0, subprotocols=['token']) as ws_server:
+                port = ws_server.sockets[0].getsockname()[1]
+                transcriber = DeepgramStreamingTranscriber(api_key='test-key',
+                                                           url=f'ws://127.0.0.1:{port}/v1/listen')
+                return await coro_factory(transcriber)
+        return asyncio.run(runner())
+
+    def test_build_url_requests_interim_results_and_endpointing(self):
+        """Test that the streaming URL enables interim results and endpointing"""
+        url = DeepgramStreamingTranscriber(api_key='x', endpointing_ms=250).build_url()
+        self.assertIn('interim_results=true', url)
+        self.assertIn('endpointing=250', url)
+        self.assertIn('encoding=linear16', url)
+        self.assertIn('keywords=comedy', url)
+
+    def test_to_pcm16_converts_float_audio(self):
+        """Test float audio in [-1, 1] is converted to int16 PCM"""
+        transcriber = DeepgramStreamingTranscriber(api_key='x')
+        pcm = transcriber.to_pcm16(np.array([0.0, 1.0, -1.0, 2.0], dtype=np.float32))
+        self.assertEqual(np.frombuffer(pcm, dtype='<i2').tolist(), [0, 32767, -32767, 32767])
+
+    def test_final_transcript_returned_on_speech_final(self):
+        """Test interim results are reported and the final transcript is joined"""
+        server = FakeDeepgramServer([
+            json.dumps({'type': 'Metadata'}),
+            results_message('i want a'),
+            results_message('i want a funny', is_final=True),
+            results_message('movie'),
+            results_message('movie tonight', is_final=True, speech_final=True),
+        ])
+        interim = []
+
+        async def run(transcriber):
+            chunks = [np.zeros(1600, dtype=np.int16) for _ in range(5)]
+            return await transcriber.transcribe_stream(chunks, on_interim=interim.append)
+
+        transcript = self.run_with_server(server, run)
+
+        self.assertEqual(transcript, 'i want a funny movie tonight')
+        self.assertEqual(interim, ['i want a', 'i want a funny movie'])
+        self.assertEqual(server.subprotocol, 'token')
+        self.assertIn('interim_results=true', server.request_path)
+
+    def test_returns_before_audio_source_is_exhausted(self):
+        """Test endpointing ends the stream without waiting for the full recording"""
+        server = FakeDeepgramServer([
+            results_message('hey movie buddy', is_final=True, speech_final=True),
+        ], chunks_before_reply=3)
+        produced = []
+
+        async def slow_microphone():
+            for _ in range(60):  # 6 seconds of 100ms chunks
+                produced.append(1)
+                yield np.zeros(1600, dtype=np.int16)
+                await asyncio.sleep(0.01)
+
+        async def run(transcriber):
+            return await transcriber.transcribe_stream(slow_microphone())
+
+        transcript = self.run_with_server(server, run)
+
+        self.assertEqual(transcript, 'hey movie buddy')
+        self.assertLess(len(produced), 60)
+
+    def test_close_stream_sent_when_audio_ends_without_speech(self):
+        """Test silence returns None after asking Deepgram to flush"""
+        server = FakeDeepgramServer([], chunks_before_reply=100)
+
+        async def run(transcriber):
+            return await transcriber.transcribe_stream([np.zeros(1600, dtype=np.int16)] * 3)
+
+        transcript = self.run_with_server(server, run)
+
+        self.assertIsNone(transcript)
+        self.assertEqual(server.control_messages, [{'type': 'CloseStream'}])
+        self.assertEqual(len(server.audio_chunks), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
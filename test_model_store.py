@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from catalog_index import CatalogIndex, build_catalog_index
+from model_store import ModelStore, StringTable, save_store
+
+MOVIES = [
+    ('avatar', 'james cameron sam worthington zoe saldana action adventure fantasy'),
+    ('titanic', 'james cameron leonardo dicaprio kate winslet drama romance'),
+    ('aliens', 'james cameron sigourney weaver michael biehn action adventure'),
+    ('the notebook', 'nick cassavetes ryan gosling rachel mcadams drama romance'),
+    ('inception', 'christopher nolan leonardo dicaprio joseph gordon-levitt action adventure'),
+    ('avatar', 'james cameron sam worthington zoe saldana action adventure fantasy'),
+]
+
+
+class TestModelStore(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'store.npz')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_arrays_are_read_only_views_of_the_file(self):
+        """Test arrays round-trip as views into one read-only mapping"""
+        matrix = np.arange(12, dtype=np.float32).reshape(3, 4)
+        save_store(self.path, {'matrix': matrix, 'fortran': np.asfortranarray(matrix),
+                               'empty': np.zeros(0, dtype=np.int64)}, meta={'rows': 3})
+        store = ModelStore(self.path)
+        self.assertEqual(store.meta, {'rows': 3})
+        np.testing.assert_array_equal(store['matrix'], matrix)
+        np.testing.assert_array_equal(store['fortran'], matrix)
+        self.assertEqual(store['empty'].shape, (0,))
+        self.assertFalse(store['matrix'].flags.writeable)
+        self.assertFalse(store['matrix'].flags.owndata)
+        with self.assertRaises(ValueError):
+            save_store(self.path, {'objects': np.array(['a', None], dtype=object)})
+
+    def test_string_table_lookups(self):
+        """Test strings come back by position and the first duplicate wins lookups"""
+        table = StringTable.build(['avatar', 'amélie', '', 'avatar', 'up'])
+        save_store(self.path, table.arrays('titles'))
+        titles = ModelStore(self.path).strings('titles')
+        self.assertEqual(list(titles), ['avatar', 'amélie', '', 'avatar', 'up'])
+        self.assertEqual(titles[-1], 'up')
+        self.assertEqual(titles.get('avatar'), 0)
+        self.assertEqual(titles.get('amélie'), 1)
+        self.assertEqual(titles.get(''), 2)
+        self.assertIsNone(titles.get('missing'))
+        self.assertNotIn('Avatar', titles)
+        self.assertEqual(list(titles.lookup(['up', 'missing', 'avatar', ''])), [4, -1, 0, 2])
+        self.assertEqual(len(titles.lookup([])), 0)
+
+
+class TestCatalogIndex(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.csv = os.path.join(self.dir, 'catalog.csv')
+        self.path = os.path.join(self.dir, 'catalog_index.npz')
+        pd.DataFrame(MOVIES, columns=['movie_title', 'comb']).to_csv(self.csv, index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_neighbours_match_full_cosine_similarity(self):
+        """Test the stored top-K agrees with sorting a full cosine-similarity row"""
+        from sklearn.feature_extraction.text import CountVectorizer
+        from sklearn.metrics.pairwise import cosine_similarity
+
+        build_catalog_index(self.csv, self.path, top_k=3)
+        index = CatalogIndex(self.path)
+        similarity = cosine_similarity(CountVectorizer().fit_transform([comb for _, comb in MOVIES]))
+        for i in range(len(MOVIES)):
+            expected = [j for j in np.argsort(-similarity[i], kind='stable') if j != i][:3]
+            self.assertEqual(list(index.topk_index[i]), expected)
+            np.testing.assert_allclose(index.topk_score[i], similarity[i][expected], rtol=1e-6)
+        self.assertEqual(index.index_of('avatar'), 0)
+        self.assertEqual(index.neighbours(1, 2), [MOVIES[j][0] for j in index.topk_index[1][:2]])
+        row = index.scores(1)
+        self.assertEqual(row.shape, (len(MOVIES),))
+        self.assertEqual(np.count_nonzero(row), 3)
+
+    def test_load_rebuilds_when_the_catalog_changes(self):
+        """Test a missing or stale index is rebuilt from the CSV"""
+        self.assertEqual(len(CatalogIndex.load(self.csv, self.path)), len(MOVIES))
+        pd.DataFrame(MOVIES[:4], columns=['movie_title', 'comb']).to_csv(self.csv, index=False)
+        os.utime(self.csv, ns=(0, 0))
+        self.assertEqual(len(CatalogIndex.load(self.csv, self.path)), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
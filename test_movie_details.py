@@ -0,0 +1,156 @@
+import threading
+import unittest
+
+from movie_details import DetailsUnavailable, MovieDetailsService, PLACEHOLDER_IMAGE, format_date, format_runtime
+
+REVIEWS_PAGE = b"""<html><body>
+<div class="ipc-html-content-inner-div">Loved every minute.</div>
+<div class="ipc-html-content-inner-div">A waste of time.</div>
+</body></html>"""
+
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+
+    def json(self):
+        return self.body
+
+    @property
+    def content(self):
+        return self.body
+
+
+class FakeTMDB:
+    """Stands in for requests.Session - answers TMDB/IMDB URLs and counts calls"""
+
+    def __init__(self, details_status=200):
+        self.details_status = details_status
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        with self._lock:
+            self.calls.append((url, (params or {}).get('query')))
+        if url.endswith('/search/movie'):
+            query = params['query']
+            if query == 'nowhere':
+                return FakeResponse(200, {'results': []})
+            return FakeResponse(200, {'results': [{'id': len(query), 'title': query.title(),
+                                                   'poster_path': f'/{query}.jpg'}]})
+        if url.endswith('/credits'):
+            cast = [{'id': i, 'name': f'Actor {i}', 'character': f'Role {i}',
+                     'profile_path': f'/p{i}.jpg' if i % 2 else None} for i in range(12)]
+            return FakeResponse(200, {'cast': cast})
+        if '/movie/' in url:
+            return FakeResponse(self.details_status, {
+                'title': 'Avatar', 'imdb_id': 'tt0499549', 'poster_path': '/avatar.jpg',
+                'overview': 'Blue people.', 'genres': [{'name': 'Action'}, {'name': 'Fantasy'}],
+                'vote_average': 7.5, 'vote_count': 29000, 'release_date': '2009-12-10',
+                'runtime': 162, 'status': 'Released'})
+        if '/person/' in url:
+            return FakeResponse(200, {'birthday': '1976-08-12', 'place_of_birth': 'Somewhere',
+                                      'biography': 'An actor.'})
+        if 'imdb.com' in url:
+            return FakeResponse(200, REVIEWS_PAGE)
+        return FakeResponse(404, None)
+
+
+def recommend(title):
+    if title.lower() in ('avatar', 'nowhere'):
+        return ['titanic', 'aliens']
+    return 'Sorry! The movie you requested is not in our database.'
+
+
+def classify(texts):
+    return ['Good' if 'Loved' in text else 'Bad' for text in texts]
+
+
+class TestMovieDetailsService(unittest.TestCase):
+    def setUp(self):
+        self.tmdb = FakeTMDB()
+        self.service = MovieDetailsService(recommend, classify, api_key='key', session=self.tmdb)
+
+    def tearDown(self):
+        self.service.shutdown()
+
+    def test_assembles_full_page_model(self):
+        """Test one call returns details, cast bios, recommendation posters and reviews"""
+        model = self.service.page_model('Avatar')
+        self.assertEqual(model.title, 'Avatar')
+        self.assertEqual(model.genres, 'Action, Fantasy')
+        self.assertEqual(model.runtime, '2 hour(s) 42 min(s)')
+        self.assertEqual(model.vote_count, '29,000')
+        self.assertEqual(model.release_date, 'Dec 10 2009')
+        self.assertEqual(len(model.cast), 10)
+        self.assertEqual(model.cast[0].profile, PLACEHOLDER_IMAGE)
+        self.assertEqual(model.cast[1].birthday, 'Aug 12 1976')
+        self.assertEqual(model.cast[1].biography, 'An actor.')
+        self.assertEqual([rec.title for rec in model.recommendations], ['titanic', 'aliens'])
+        self.assertTrue(model.recommendations[0].poster.endswith('/titanic.jpg'))
+        self.assertEqual([r.sentiment for r in model.reviews], ['Good', 'Bad'])
+
+    def test_page_model_is_cached_by_normalised_title(self):
+        """Test a repeat view (any case or spacing) makes no upstream requests"""
+        self.service.page_model('Avatar')
+        calls = len(self.tmdb.calls)
+        again = self.service.page_model('  avatar ')
+        self.assertEqual(len(self.tmdb.calls), calls)
+        self.assertEqual(again.title, 'Avatar')
+
+    def test_upstream_responses_are_shared_between_pages(self):
+        """Test a movie searched for one page isn't searched again for another"""
+        self.service.page_model('Avatar')
+        self.service.pages.clear()
+        calls = len(self.tmdb.calls)
+        self.service.page_model('Avatar')
+        self.assertEqual(len(self.tmdb.calls), calls)
+
+    def test_search_many_runs_lookups_concurrently(self):
+        """Test several slow searches overlap instead of running back to back"""
+        barrier = threading.Barrier(3, timeout=5)
+        get = self.tmdb.get
+
+        def slow_get(url, **kwargs):
+            barrier.wait()  # only passes once all three searches are in flight
+            return get(url, **kwargs)
+
+        self.tmdb.get = slow_get
+        results = self.service.search_many(['alien', 'heat', 'nowhere'])
+        self.assertEqual([r and r['title'] for r in results], ['Alien', 'Heat', None])
+
+    def test_movie_not_in_catalog_returns_none(self):
+        """Test titles the recommender doesn't know make no TMDB requests"""
+        self.assertIsNone(self.service.page_model('Unknown Film'))
+        self.assertEqual(self.tmdb.calls, [])
+
+    def test_missing_tmdb_record_raises(self):
+        """Test a catalog movie TMDB can't find raises DetailsUnavailable"""
+        with self.assertRaises(DetailsUnavailable):
+            self.service.page_model('nowhere')
+        self.tmdb.details_status = 500
+        with self.assertRaises(DetailsUnavailable):
+            MovieDetailsService(recommend, session=self.tmdb).page_model('Avatar')
+
+    def test_template_context_matches_details_page(self):
+        """Test the model converts to the variables movie_details.html uses"""
+        context = self.service.page_model('Avatar').template_context()
+        self.assertEqual(context['vote_average'], 7.5)
+        self.assertEqual(list(context['movie_cards'].values()), ['titanic', 'aliens'])
+        self.assertEqual(context['casts']['Actor 1'], ['1', 'Role 1', context['cast_details']['Actor 1'][1]])
+        self.assertEqual(context['cast_details']['Actor 1'][2:4], ['Aug 12 1976', 'Somewhere'])
+        self.assertEqual(context['reviews'], {'Loved every minute.': 'Good', 'A waste of time.': 'Bad'})
+
+
+class TestFormatting(unittest.TestCase):
+    def test_runtime_and_dates(self):
+        """Test runtime and date formatting match what the page showed before"""
+        self.assertEqual(format_runtime(120), '2 hour(s)')
+        self.assertEqual(format_runtime(None), '0 hour(s)')
+        self.assertEqual(format_date('1999-03-31'), 'Mar 31 1999')
+        self.assertEqual(format_date(None), 'Not Available')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+from flask import Flask, render_template, request
+from jinja2 import DictLoader
+
+from page_cache import PageCache
+
+
+def make_app():
+    app = Flask(__name__)
+    app.config['TEMPLATES_AUTO_RELOAD'] = True
+    templates = {'details.html': '<h1>{{ title }}</h1>'}
+    app.jinja_loader = DictLoader(templates)
+    cache = PageCache(app.jinja_env)
+    renders = []
+
+    @app.route('/details')
+    def details():
+        title = request.args['title']
+        key = cache.key('details.html', title)
+        page = cache.get(key)
+        if page is None:
+            renders.append(title)
+            page = cache.put(key, render_template('details.html', title=title))
+        return cache.respond(page, request, app.response_class)
+
+    return app, cache, templates, renders
+
+
+class TestPageCache(unittest.TestCase):
+    def setUp(self):
+        self.app, self.cache, self.templates, self.renders = make_app()
+        self.client = self.app.test_client()
+
+    def test_repeat_views_skip_rendering(self):
+        """Test the same title (in any case or spacing) is rendered once"""
+        first = self.client.get('/details?title=Avatar')
+        second = self.client.get('/details?title=%20avatar%20')
+        self.assertEqual(first.data, b'<h1>Avatar</h1>')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(self.renders, ['Avatar'])
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_validators_and_not_modified(self):
+        """Test ETag and Last-Modified are sent and matching requests get an empty 304"""
+        first = self.client.get('/details?title=Avatar')
+        etag = first.headers['ETag']
+        self.assertTrue(first.headers['Last-Modified'])
+        self.assertIn('no-cache', first.headers['Cache-Control'])
+
+        by_etag = self.client.get('/details?title=Avatar', headers={'If-None-Match': etag})
+        self.assertEqual(by_etag.status_code, 304)
+        self.assertEqual(by_etag.data, b'')
+
+        by_date = self.client.get('/details?title=Avatar',
+                                  headers={'If-Modified-Since': first.headers['Last-Modified']})
+        self.assertEqual(by_date.status_code, 304)
+
+        stale = self.client.get('/details?title=Avatar', headers={'If-None-Match': '"something-else"'})
+        self.assertEqual(stale.status_code, 200)
+
+    def test_template_change_retires_cached_pages(self):
+        """Test a new template version renders again with a new ETag"""
+        first = self.client.get('/details?title=Avatar')
+        self.templates['details.html'] = '<h2>{{ title }}</h2>'
+        second = self.client.get('/details?title=Avatar', headers={'If-None-Match': first.headers['ETag']})
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data, b'<h2>Avatar</h2>')
+        self.assertEqual(self.renders, ['Avatar', 'Avatar'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from phrase_bank import EMOTION_OPENINGS, FOLLOW_UPS, PhraseBank, static_phrases
+from pipelined_speaker import PipelinedSpeaker, split_sentences
+
+
+def fake_synthesize(text, path, **voice):
+    """Stands in for gTTS"""
+    with open(path, 'wb') as f:
+        f.write(text.encode('utf-8'))
+
+
+class RecordingCache:
+    """Stands in for TTSCache and records what had to be synthesised"""
+
+    def __init__(self):
+        self.synthesised = []
+
+    def synthesize_path(self, text, **voice):
+        self.synthesised.append(text)
+        return text
+
+
+class InstantPlayer:
+    def __init__(self):
+        self.played = []
+
+    def play(self, path):
+        self.played.append(path)
+
+    def stop(self):
+        pass
+
+
+class TestPhraseBank(unittest.TestCase):
+    def setUp(self):
+        self.assets_dir = tempfile.mkdtemp()
+        self.bank = PhraseBank(assets_dir=self.assets_dir)
+        self.manifest = self.bank.build(synthesize=fake_synthesize)
+
+    def tearDown(self):
+        shutil.rmtree(self.assets_dir)
+
+    def test_every_static_sentence_is_rendered(self):
+        """Test the build covers each sentence of every static phrase"""
+        for text, slow in static_phrases():
+            for sentence in split_sentences(text):
+                self.assertIsNotNone(self.bank.lookup(sentence, slow), sentence)
+
+    def test_manifest_is_reloaded_by_a_new_bank(self):
+        """Test runtime picks up the assets from the manifest alone"""
+        with open(os.path.join(self.assets_dir, 'manifest.json')) as f:
+            manifest = json.load(f)
+        self.assertEqual(len(manifest['phrases']), len(self.manifest['phrases']))
+        reloaded = PhraseBank(assets_dir=self.assets_dir)
+        self.assertEqual(reloaded.entries, self.bank.entries)
+
+    def test_rebuild_reuses_existing_assets(self):
+        """Test a second build doesn't synthesise anything"""
+        calls = []
+        self.bank.build(synthesize=lambda text, path, **voice: calls.append(text))
+        self.assertEqual(calls, [])
+
+    def test_dynamic_sentences_are_not_in_the_bank(self):
+        """Test movie-specific text is left to runtime synthesis"""
+        self.assertIsNone(self.bank.lookup("1. Inception (2010) - Action, Sci-Fi"))
+
+    def test_response_stitches_static_assets_with_dynamic_synthesis(self):
+        """Test only the movie list of a formatted response is synthesised"""
+        response = (f"{EMOTION_OPENINGS['happy']}\n\n"
+                    f"1. **Paddington 2 (2017)** - Comedy, Family\n   Why: highly rated (7.8/10)\n\n"
+                    f"\n{FOLLOW_UPS[1]}")
+        cache, player = RecordingCache(), InstantPlayer()
+        speaker = PipelinedSpeaker(cache, player=player, phrase_bank=self.bank)
+        speaker.speak(response)
+        speaker.wait()
+
+        self.assertEqual(len(player.played), len(split_sentences(response)))
+        self.assertEqual(cache.synthesised, ["1. Paddington 2 (2017) - Comedy, Family",
+                                             "Why: highly rated (7.8/10)"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import threading
+import time
+import unittest
+
+from pipelined_speaker import PipelinedSpeaker, split_sentences
+
+
+class FakeCache:
+    """Stands in for TTSCache - synthesis takes a fixed time"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.finished = {}
+
+    def synthesize_path(self, text, **voice):
+        time.sleep(self.delay)
+        self.finished[text] = time.monotonic()
+        return text
+
+
+class FakePlayer:
+    """Records when each clip started playing"""
+
+    def __init__(self, duration=0.05):
+        self.duration = duration
+        self.started = []
+        self._stopped = threading.Event()
+
+    def play(self, path):
+        self.started.append((path, time.monotonic()))
+        self._stopped.wait(self.duration)
+
+    def stop(self):
+        self._stopped.set()
+
+
+RESPONSE = """I love your positive energy! Here are some fantastic movies that will keep those good vibes flowing.
+
+1. **The Grand Budapest Hotel (2014)** - Comedy, Drama
+   Why: highly rated (8.1/10)
+
+Would you like more details about any of these movies?"""
+
+
+class TestSplitSentences(unittest.TestCase):
+    def test_response_is_split_into_sentences_and_lines(self):
+        """Test markdown is removed and list numbers don't split a line"""
+        sentences = split_sentences(RESPONSE)
+        self.assertEqual(sentences[0], "I love your positive energy!")
+        self.assertIn("1. The Grand Budapest Hotel (2014) - Comedy, Drama", sentences)
+        self.assertEqual(sentences[-1], "Would you like more details about any of these movies?")
+
+    def test_short_fragments_are_merged(self):
+        """Test tiny sentences are joined to the next one"""
+        self.assertEqual(split_sentences("Hi! Here are some great picks for you."),
+                         ["Hi! Here are some great picks for you."])
+
+    def test_empty_text(self):
+        """Test nothing is spoken for blank text"""
+        self.assertEqual(split_sentences("  \n\n "), [])
+
+
+class TestPipelinedSpeaker(unittest.TestCase):
+    def test_first_sentence_plays_before_the_rest_is_synthesised(self):
+        """Test playback starts after one sentence, not the whole response"""
+        cache, player = FakeCache(), FakePlayer()
+        speaker = PipelinedSpeaker(cache, player=player)
+        speaker.speak(RESPONSE)
+        speaker.wait()
+
+        sentences = split_sentences(RESPONSE)
+        self.assertEqual([path for path, _ in player.started], sentences)
+        first_start = player.started[0][1]
+        self.assertLess(first_start, cache.finished[sentences[-1]])
+        self.assertFalse(speaker.is_speaking)
+
+    def test_speak_returns_immediately_and_stop_interrupts(self):
+        """Test speak() doesn't block and stop() cuts the utterance short"""
+        cache, player = FakeCache(delay=0.01), FakePlayer(duration=5)
+        speaker = PipelinedSpeaker(cache, player=player)
+        start = time.monotonic()
+        speaker.speak(RESPONSE)
+        self.assertLess(time.monotonic() - start, 0.5)
+        while not player.started:
+            time.sleep(0.01)
+        speaker.stop()
+        self.assertFalse(speaker.is_speaking)
+        self.assertEqual(len(player.started), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
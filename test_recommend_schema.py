@@ -0,0 +1,102 @@
+import json
+import unittest
+
+from recommend_schema import (CastMember, MAX_REQUEST_BYTES, MovieCard, MovieDetails, Review, SchemaError,
+                              decode_legacy_form, decode_recommend_request, dumps, loads)
+
+PAYLOAD = {
+    'title': 'Avatar',
+    'imdb_id': 'tt0499549',
+    'poster': 'https://image.tmdb.org/t/p/original/avatar.jpg',
+    'genres': 'Action, Fantasy',
+    'rating': '7.5',
+    'vote_count': '29,000',
+    'runtime': '2 hour(s) 42 min(s)',
+    'cast': [
+        {'id': 65731, 'name': 'Sam Worthington', 'character': 'Jake Sully',
+         'biography': 'Born in "Godalming", Surrey,\nhe moved to Perth.'},
+        {'id': '8691', 'name': 'Zoe Saldana', 'birthday': 'Jun 19 1978'},
+    ],
+    'recommendations': [{'title': 'aliens', 'poster': 'https://example.com/aliens.jpg'}],
+}
+
+
+class TestRecommendSchema(unittest.TestCase):
+    def test_decodes_typed_model(self):
+        """Test a JSON body becomes a validated MovieDetails"""
+        details = decode_recommend_request(json.dumps(PAYLOAD).encode('utf-8'))
+        self.assertEqual(details.rating, 7.5)
+        self.assertEqual(details.cast[0], CastMember(
+            id='65731', name='Sam Worthington', character='Jake Sully',
+            biography='Born in "Godalming", Surrey,\nhe moved to Perth.'))
+        self.assertEqual(details.cast[1].place_of_birth, 'Not Available')
+        self.assertEqual(details.recommendations, (MovieCard('aliens', 'https://example.com/aliens.jpg'),))
+        self.assertEqual(details.reviews, ())
+
+    def test_invalid_payloads_name_the_field(self):
+        """Test malformed bodies raise SchemaError with the offending field"""
+        cases = [
+            (b'{"title": ', 'Invalid JSON'),
+            (b'[]', 'body must be an object'),
+            (b'{"overview": "x"}', 'title is required'),
+            (b'{"title": "A", "rating": "high"}', 'rating must be a number'),
+            (b'{"title": "A", "cast": {"id": 1}}', 'cast must be a list'),
+            (b'{"title": "A", "cast": [{"id": 1}]}', 'cast[0].name is required'),
+            (b'{"title": "A", "recommendations": [{"title": ["x"]}]}', 'recommendations[0].title must be a string'),
+        ]
+        for body, message in cases:
+            with self.assertRaises(SchemaError) as raised:
+                decode_recommend_request(body)
+            self.assertIn(message, str(raised.exception))
+
+    def test_oversized_body_is_rejected_before_parsing(self):
+        """Test bodies past the size limit are refused"""
+        with self.assertRaises(SchemaError):
+            decode_recommend_request(b' ' * (MAX_REQUEST_BYTES + 1))
+
+    def test_legacy_form_decodes_json_lists(self):
+        """Test the old hidden form is decoded as JSON, keeping quotes and commas in biographies"""
+        bio = 'He said "hi", then left.\nThe end.'
+        form = {
+            'title': 'Avatar', 'imdb_id': 'tt0499549', 'poster': 'p.jpg', 'genres': 'Action', 'overview': 'o',
+            'rating': '7.5', 'vote_count': '29,000', 'release_date': 'Dec 10 2009', 'runtime': '2 hour(s)',
+            'status': 'Released',
+            'cast_ids': '[65731,8691]',
+            'cast_names': json.dumps(['Sam Worthington', 'Zoe Saldana']),
+            'cast_chars': json.dumps(['Jake', 'Neytiri']),
+            'cast_profiles': json.dumps(['a.jpg', 'b.jpg']),
+            'cast_bdays': json.dumps(['Aug 02 1976', 'Jun 19 1978']),
+            'cast_bios': json.dumps([bio, '']),
+            'cast_places': json.dumps(['Godalming', 'Passaic']),
+            'rec_movies': json.dumps(['aliens', 'titanic']),
+            'rec_posters': json.dumps(['x.jpg', 'y.jpg']),
+        }
+        details = decode_legacy_form(form)
+        self.assertEqual(details.cast[0].biography, bio)
+        self.assertEqual(details.cast[1].biography, 'Biography not available')
+        self.assertEqual(details.cast[1].id, '8691')
+        context = details.template_context()
+        self.assertEqual(context['movie_cards'], {'x.jpg': 'aliens', 'y.jpg': 'titanic'})
+        self.assertEqual(context['cast_details']['Zoe Saldana'], ['8691', 'b.jpg', 'Jun 19 1978', 'Passaic',
+                                                                  'Biography not available'])
+
+        del form['cast_bios']
+        with self.assertRaises(SchemaError):
+            decode_legacy_form(form)
+        form['cast_bios'] = '["unterminated'
+        with self.assertRaises(SchemaError):
+            decode_legacy_form(form)
+
+    def test_response_round_trip(self):
+        """Test response dataclasses serialise to compact JSON"""
+        details = MovieDetails(title='Avatar', cast=(CastMember(id='1', name='Sam'),),
+                               recommendations=(MovieCard('aliens', 'a.jpg'),)).with_reviews([Review('Great', 'Good')])
+        encoded = dumps({'success': True, 'movie': details})
+        self.assertNotIn(b'\n', encoded)
+        decoded = loads(encoded)
+        self.assertEqual(decoded['movie']['reviews'], [{'text': 'Great', 'sentiment': 'Good'}])
+        self.assertEqual(decoded['movie']['cast'][0]['biography'], 'Biography not available')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from model_store import ModelStore, save_store
+from sentiment_model import SentimentModel, export_legacy, load_legacy, load_reviews, save_model
+
+TOKEN_PATTERN = r'(?u)\b\w\w+\b'
+
+
+class TestSentimentModel(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'sentiment.npz')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_export_matches_the_pickled_model(self):
+        """Test the exported arrays predict exactly what the pickled classifier does"""
+        export_legacy(path=self.path)
+        model = SentimentModel(ModelStore(self.path))
+        clf, vectorizer = load_legacy()
+        texts, _ = load_reviews()
+        texts = texts[::7] + ['Ça été un film très décevant', '', 'the and of']
+        np.testing.assert_array_equal(model.predict(texts), clf.predict(vectorizer.transform(texts)))
+
+    def test_tfidf_vocabulary_scoring(self):
+        """Test accents, case, unknown words and l2-normalised TF-IDF weights are handled"""
+        save_model(self.path, coef=[[0.0, 0.0], [2.0, -1.0]], intercept=[0.0, 0.1], classes=[0, 1],
+                   features='vocabulary', token_pattern=TOKEN_PATTERN, vocabulary={'great': 0, 'boring': 1},
+                   idf=[1.0, 3.0], strip_accents='ascii')
+        model = SentimentModel(ModelStore(self.path))
+        self.assertEqual(model.vectorizer.tokens('GRÉAT fun, a x'), ['great', 'fun'])
+        columns, values = model.vectorizer.vector('great great boring zzz')
+        self.assertEqual(list(columns), [0, 1])
+        np.testing.assert_allclose(values, np.array([2.0, 3.0]) / np.sqrt(13))
+        self.assertEqual(list(model.predict(['Great!', 'boring', 'nothing known'])), [1, 0, 1])
+        self.assertEqual(len(model.predict([])), 0)
+
+    def test_hashing_model_scored_by_sign(self):
+        """Test a one-row (binary) model picks the second class for positive scores"""
+        save_model(self.path, coef=np.ones((1, 8)), intercept=[-0.5], classes=[0, 1],
+                   features='hashing', token_pattern=TOKEN_PATTERN, norm=None)
+        model = SentimentModel(ModelStore(self.path))
+        self.assertTrue(all(0 <= column < 8 for column in model.vectorizer.columns(['some', 'words', 'here'])))
+        self.assertEqual(list(model.predict(['', 'one word'])), [0, 1])
+
+    def test_trained_hashing_model_round_trips(self):
+        """Test a model written by the training script scores like the classifier it came from"""
+        from train_sentiment import TOKEN_PATTERN as TRAIN_PATTERN, fit, hashed_vectorizer, split_by_text
+
+        texts, labels = load_reviews()
+        texts, labels = texts[::5], labels[::5]
+        test = split_by_text(texts, 0.2, seed=0)
+        self.assertFalse(set(np.array(texts)[test]) & set(np.array(texts)[~test]))
+        idf, clf = fit(texts, labels, 4096, alpha=0.1)
+        save_model(self.path, clf.feature_log_prob_, clf.class_log_prior_, clf.classes_, 'hashing', TRAIN_PATTERN,
+                   idf=idf, strip_accents='ascii')
+        model = SentimentModel(ModelStore(self.path))
+        expected = clf.predict(hashed_vectorizer(4096, idf=idf, norm='l2').matrix(texts))
+        np.testing.assert_array_equal(model.predict(texts), expected)
+
+    def test_rejects_other_files_and_versions(self):
+        """Test stores that aren't this model format version fail loudly"""
+        save_store(self.path, {'coef': np.zeros((1, 2))}, meta={'format': 'moodflix-sentiment', 'version': 0})
+        with self.assertRaises(ValueError):
+            SentimentModel(ModelStore(self.path))
+        save_store(self.path, {'x': np.zeros(1)})
+        with self.assertRaises(ValueError):
+            SentimentModel(ModelStore(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import timedelta
+
+from flask import Flask, session
+
+from session_store import SERVER_PREFIX, HybridSessionInterface, SessionStore
+
+
+def make_app(store, **kwargs):
+    app = Flask(__name__)
+    app.secret_key = 'test-secret'
+    app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=30)
+    app.session_interface = HybridSessionInterface(store, **kwargs)
+
+    @app.route('/visit')
+    def visit():
+        session['visits'] = session.get('visits', 0) + 1
+        return str(session['visits'])
+
+    @app.route('/login')
+    def login():
+        session['user_id'] = 'ann@example.com'
+        return 'ok'
+
+    @app.route('/whoami')
+    def whoami():
+        return session.get('user_id', 'anonymous')
+
+    @app.route('/logout')
+    def logout():
+        session.clear()
+        return 'bye'
+
+    return app
+
+
+class TestSessionStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = SessionStore(os.path.join(self.tmp_dir, 'sessions.db'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def cookie(self, client):
+        cookie = client.get_cookie('session')
+        return cookie.value if cookie else None
+
+    def test_anonymous_sessions_stay_in_the_cookie(self):
+        """Test anonymous visitors never touch the database"""
+        client = make_app(self.store).test_client()
+        self.assertEqual(client.get('/visit').text, '1')
+        self.assertEqual(client.get('/visit').text, '2')
+        self.assertFalse(self.cookie(client).startswith(SERVER_PREFIX))
+        self.assertEqual(len(self.store), 0)
+
+    def test_signed_in_sessions_move_server_side_with_a_new_id(self):
+        """Test logging in stores the session in SQLite behind a signed id"""
+        client = make_app(self.store).test_client()
+        client.get('/visit')
+        client.get('/login')
+        value = self.cookie(client)
+        self.assertTrue(value.startswith(SERVER_PREFIX))
+        self.assertEqual(len(self.store), 1)
+        self.assertEqual(client.get('/whoami').text, 'ann@example.com')
+        self.assertEqual(client.get('/visit').text, '2')
+
+    def test_signed_in_sessions_are_permanent_and_refreshed(self):
+        """Test the cookie outlives the browser and the row is extended after half its lifetime"""
+        client = make_app(self.store).test_client()
+        response = client.get('/login')
+        self.assertIn('Expires=', response.headers['Set-Cookie'])
+        sid = next(iter(self.store.connection().execute('SELECT sid FROM sessions')))[0]
+        lifetime = timedelta(days=30).total_seconds()
+
+        # Early in its lifetime a request neither rewrites the row nor resends the cookie
+        self.assertNotIn('Set-Cookie', client.get('/whoami').headers)
+
+        self.store.touch(sid, time.time() + lifetime * 0.4)
+        response = client.get('/whoami')
+        self.assertIn('Expires=', response.headers['Set-Cookie'])
+        self.assertGreater(self.store.load(sid)[1], time.time() + lifetime * 0.9)
+
+    def test_non_permanent_sessions_end_with_the_browser(self):
+        """Test permanent=False issues cookies without an expiry"""
+        client = make_app(self.store, permanent=False).test_client()
+        self.assertNotIn('Expires=', client.get('/login').headers['Set-Cookie'])
+
+    def test_tampered_ids_are_rejected(self):
+        """Test a forged server session id yields an empty session"""
+        client = make_app(self.store).test_client()
+        client.get('/login')
+        value = self.cookie(client)
+        client.set_cookie('session', value[:-2] + 'xx')
+        self.assertEqual(client.get('/whoami').text, 'anonymous')
+
+    def test_logout_deletes_the_row(self):
+        """Test clearing the session removes it from the store and the browser"""
+        client = make_app(self.store).test_client()
+        client.get('/login')
+        client.get('/logout')
+        self.assertEqual(len(self.store), 0)
+        self.assertIsNone(self.cookie(client))
+
+    def test_server_only_mode(self):
+        """Test anonymous_cookies=False keeps every session server-side"""
+        client = make_app(self.store, anonymous_cookies=False).test_client()
+        client.get('/visit')
+        self.assertTrue(self.cookie(client).startswith(SERVER_PREFIX))
+        self.assertEqual(len(self.store), 1)
+
+    def test_sweep_removes_expired_sessions(self):
+        """Test expired rows are deleted and no longer load"""
+        self.store.save('old', '{}', time.time() - 1)
+        self.store.save('new', '{}', time.time() + 60)
+        self.assertIsNone(self.store.load('old'))
+        self.assertEqual(self.store.sweep(), 1)
+        self.assertEqual(len(self.store), 1)
+
+    def test_shared_secret_is_stable(self):
+        """Test every worker opening the database gets the same generated key"""
+        other = SessionStore(self.store.path)
+        self.assertEqual(self.store.shared_secret(), other.shared_secret())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from tts_cache import TTSCache
+
+
+class FakeSynthesizer:
+    """Stands in for gTTS - writes a fixed-size clip and counts calls"""
+
+    def __init__(self, size=1000):
+        self.size = size
+        self.calls = []
+
+    def __call__(self, text, path, **voice):
+        self.calls.append((text, voice))
+        with open(path, 'wb') as f:
+            f.write(b'\xff' * self.size)
+
+
+class TestTTSCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.synth = FakeSynthesizer()
+        self.cache = TTSCache(cache_dir=self.cache_dir, max_bytes=3500, synthesize=self.synth)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_repeated_phrase_is_synthesised_once(self):
+        """Test a phrase spoken twice costs one synthesis"""
+        first = self.cache.synthesize_path("Goodbye! Enjoy your movie.")
+        second = self.cache.synthesize_path("Goodbye!  Enjoy your movie.\n")
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.synth.calls), 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertTrue(os.path.exists(first))
+
+    def test_voice_settings_are_part_of_the_key(self):
+        """Test slow speech is cached separately from normal speech"""
+        normal = self.cache.key_for("Take care", slow=False)
+        slow = self.cache.key_for("Take care", slow=True)
+        self.assertNotEqual(normal, slow)
+        self.assertTrue(TTSCache.is_valid_key(normal))
+
+    def test_least_recently_used_clips_are_evicted(self):
+        """Test the cache stays under max_bytes by dropping the oldest clips"""
+        keys = []
+        for i, text in enumerate(["one", "two", "three", "four"]):
+            keys.append(self.cache.synthesize_key(text))
+            # Make access order explicit regardless of filesystem timestamp resolution
+            os.utime(self.cache.path_for(keys[-1]), (1000 + i, 1000 + i))
+        self.cache.evict()
+
+        self.assertLessEqual(self.cache.size(), 3500)
+        self.assertIsNone(self.cache.get(keys[0]))
+        self.assertIsNotNone(self.cache.get(keys[3]))
+
+    def test_misses_for_different_phrases_run_in_parallel(self):
+        """Test one slow synthesis doesn't hold up another phrase, but the same phrase waits"""
+        both_started = threading.Barrier(2, timeout=2)
+
+        def synthesize(text, path, **voice):
+            if text != 'again':
+                both_started.wait()  # Breaks (and raises) if the two misses were serialised
+            self.synth(text, path, **voice)
+
+        cache = TTSCache(cache_dir=self.cache_dir, synthesize=synthesize)
+        texts = ['first', 'second', 'again', 'again', 'again']
+        threads = [threading.Thread(target=cache.synthesize_key, args=(text,)) for text in texts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(text for text, _ in self.synth.calls), ['again', 'first', 'second'])
+        self.assertEqual((cache.hits, cache.misses), (2, 3))
+
+    def test_directory_is_only_rescanned_over_the_limit(self):
+        """Test misses below max_bytes don't list the cache directory"""
+        with mock.patch.object(self.cache, '_entries', wraps=self.cache._entries) as entries:
+            for text in ["one", "two", "three"]:
+                self.cache.synthesize_key(text)
+            self.assertEqual(entries.call_count, 0)
+            self.cache.synthesize_key("four")
+            self.assertEqual(entries.call_count, 1)
+        self.assertLessEqual(self.cache.size(), 3500)
+
+    def test_failed_synthesis_leaves_no_partial_file(self):
+        """Test an error from the TTS service doesn't leave a broken clip behind"""
+        def failing(text, path, **voice):
+            raise RuntimeError("network down")
+        cache = TTSCache(cache_dir=self.cache_dir, synthesize=failing)
+        with self.assertRaises(RuntimeError):
+            cache.synthesize_key("Hello")
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_invalid_keys_are_rejected(self):
+        """Test the serving route can't be used for path traversal"""
+        self.assertFalse(TTSCache.is_valid_key('../main.py'))
+        self.assertFalse(TTSCache.is_valid_key('A' * 64))
+
+
+if __name__ == '__main__':
+    unittest.main()
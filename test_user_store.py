@@ -0,0 +1,92 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+
+from user_store import UserStore
+
+
+def add_from_other_process(path, user_id, movie_id):
+    """Write through a separate process's connection"""
+    UserStore(path).add_to_watchlist(user_id, {'id': movie_id, 'title': f'Movie {movie_id}'})
+
+
+class TestUserStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'users.db')
+        self.store = UserStore(self.path)
+        self.store.create_user('ann@example.com', 'Ann', b'hash')
+        self.user = self.store.get_user('ann@example.com')
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_create_and_get_user(self):
+        """Test accounts are stored once per email"""
+        self.assertEqual(self.user['name'], 'Ann')
+        self.assertEqual(self.user['password'], b'hash')
+        self.assertIsInstance(self.user['created_at'], datetime)
+        self.assertFalse(self.store.create_user('ann@example.com', 'Other', b'x'))
+        self.assertIsNone(self.store.get_user('nobody@example.com'))
+
+    def test_wal_mode_enabled(self):
+        """Test the database runs in WAL mode"""
+        mode = self.store.connection().execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(mode, 'wal')
+
+    def test_watchlist_rejects_duplicates_and_removes(self):
+        """Test the (user, movie) key makes adds idempotent and removal targeted"""
+        movie = {'id': 27205, 'title': 'Inception', 'poster': '/p.jpg'}
+        self.assertTrue(self.store.add_to_watchlist(self.user['id'], movie))
+        self.assertFalse(self.store.add_to_watchlist(self.user['id'], movie))
+        self.store.add_to_watchlist(self.user['id'], {'id': 155, 'title': 'The Dark Knight'})
+
+        profile = self.store.get_profile('ann@example.com')
+        self.assertEqual([m['title'] for m in profile['watchlist']], ['Inception', 'The Dark Knight'])
+        self.assertIsInstance(profile['watchlist'][0]['added_at'], datetime)
+
+        self.assertTrue(self.store.remove_from_watchlist(self.user['id'], 27205))
+        self.assertFalse(self.store.remove_from_watchlist(self.user['id'], 27205))
+        profile = self.store.get_profile('ann@example.com')
+        self.assertEqual([m['title'] for m in profile['watchlist']], ['The Dark Knight'])
+
+    def test_rating_replaces_previous_rating(self):
+        """Test re-rating a movie updates it instead of adding a second entry"""
+        self.store.rate_movie(self.user['id'], {'id': 1, 'title': 'Up'}, 3)
+        self.store.rate_movie(self.user['id'], {'id': 1, 'title': 'Up'}, 5)
+        ratings = self.store.get_profile('ann@example.com')['ratings']
+        self.assertEqual(list(ratings), ['1'])
+        self.assertEqual(ratings['1']['rating'], 5)
+        self.assertIsInstance(ratings['1']['rated_at'], datetime)
+
+    def test_watched_movies_listed_newest_first(self):
+        """Test watched movies are recorded once and listed most recent first"""
+        self.store.mark_watched(self.user['id'], {'id': 'Up', 'title': 'Up'})
+        self.store.mark_watched(self.user['id'], {'id': 'Heat', 'title': 'Heat'})
+        watched = self.store.get_profile('ann@example.com')['watched']
+        self.assertEqual([m['title'] for m in watched], ['Heat', 'Up'])
+
+    def test_state_shared_across_processes(self):
+        """Test writes from another worker process are visible here"""
+        process = multiprocessing.Process(target=add_from_other_process, args=(self.path, self.user['id'], 42))
+        process.start()
+        process.join(10)
+        self.assertEqual(process.exitcode, 0)
+        titles = [m['title'] for m in self.store.get_profile('ann@example.com')['watchlist']]
+        self.assertEqual(titles, ['Movie 42'])
+
+    def test_persists_across_reopen(self):
+        """Test data survives closing and reopening the database"""
+        self.store.add_to_watchlist(self.user['id'], {'id': 7, 'title': 'Se7en'})
+        self.store.close()
+        reopened = UserStore(self.path)
+        self.assertEqual(reopened.get_profile('ann@example.com')['watchlist'][0]['title'], 'Se7en')
+        reopened.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+
+import numpy as np
+
+from voice_activity import SpeechGate, VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+
+
+def tone(seconds, freq=200.0, amplitude=0.1):
+    """Generate a voiced-speech-like sine tone"""
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def silence(seconds, amplitude=0.001):
+    """Generate quiet background noise"""
+    rng = np.random.default_rng(0)
+    return (amplitude * rng.standard_normal(int(SAMPLE_RATE * seconds))).astype(np.float32)
+
+
+def blocks(audio, block_ms=30):
+    """Split audio into microphone-sized blocks"""
+    size = int(SAMPLE_RATE * block_ms / 1000)
+    return [audio[i:i + size] for i in range(0, len(audio), size)]
+
+
+class TestVoiceActivityDetector(unittest.TestCase):
+    def setUp(self):
+        self.detector = VoiceActivityDetector(sample_rate=SAMPLE_RATE)
+
+    def test_silence_has_no_speech(self):
+        """Test that a quiet clip is dropped before STT"""
+        self.assertFalse(self.detector.contains_speech(silence(2.0)))
+
+    def test_voiced_audio_is_speech(self):
+        """Test that a voiced segment is detected"""
+        audio = np.concatenate([silence(1.0), tone(0.5), silence(1.0)])
+        self.assertTrue(self.detector.contains_speech(audio))
+
+    def test_int16_audio_is_supported(self):
+        """Test int16 microphone buffers are normalised before analysis"""
+        audio = (tone(0.5) * 32767).astype(np.int16)
+        self.assertTrue(self.detector.contains_speech(audio))
+
+    def test_loud_hiss_is_rejected_by_zero_crossing_rate(self):
+        """Test broadband noise with high energy is not treated as speech"""
+        rng = np.random.default_rng(1)
+        hiss = (0.2 * rng.standard_normal(SAMPLE_RATE)).astype(np.float32)
+        self.assertFalse(self.detector.contains_speech(hiss))
+
+    def test_clips_are_judged_independently(self):
+        """Test screening a noisy clip doesn't raise the threshold for the next one"""
+        rng = np.random.default_rng(1)
+        noisy = (0.2 * rng.standard_normal(SAMPLE_RATE * 2)).astype(np.float32)
+        quiet_speech = tone(0.5, amplitude=0.05)
+        self.detector.contains_speech(noisy)
+        self.assertEqual(self.detector.noise_floor, VoiceActivityDetector(sample_rate=SAMPLE_RATE).noise_floor)
+        self.assertTrue(self.detector.contains_speech(quiet_speech))
+
+    def test_none_is_not_speech(self):
+        """Test a failed recording is treated as silence"""
+        self.assertFalse(self.detector.contains_speech(None))
+
+
+class TestSpeechGate(unittest.TestCase):
+    def test_captures_utterance_with_pre_roll_and_stops_on_trailing_silence(self):
+        """Test onset flushes the ring buffer and trailing silence ends capture"""
+        gate = SpeechGate(sample_rate=SAMPLE_RATE, pre_roll_ms=90, trailing_silence_ms=300)
+        audio = np.concatenate([silence(1.0), tone(0.6), silence(2.0)])
+
+        emitted = []
+        pushed = 0
+        for block in blocks(audio):
+            if gate.finished:
+                break
+            pushed += 1
+            emitted.extend(gate.push(block))
+
+        self.assertTrue(gate.triggered)
+        self.assertTrue(gate.finished)
+        # Stopped long before the end of the 3.6 second window
+        self.assertLess(pushed, len(blocks(audio)))
+        captured_seconds = sum(len(b) for b in emitted) / SAMPLE_RATE
+        # Pre-roll + speech + trailing silence, not the whole window
+        self.assertGreater(captured_seconds, 0.6)
+        self.assertLess(captured_seconds, 1.3)
+
+    def test_silence_never_triggers(self):
+        """Test a silent window emits nothing"""
+        gate = SpeechGate(sample_rate=SAMPLE_RATE)
+        emitted = []
+        for block in blocks(silence(3.0)):
+            emitted.extend(gate.push(block))
+        self.assertFalse(gate.triggered)
+        self.assertEqual(emitted, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import websockets
+
+from tts_cache import TTSCache
+from voice_gateway import VoiceGateway
+
+
+class FakeTranscriber:
+    """Streaming transcriber that reports interim text and finishes after a few chunks"""
+
+    def __init__(self, transcript='i feel happy, something funny', chunks_per_utterance=3):
+        self.transcript = transcript
+        self.chunks_per_utterance = chunks_per_utterance
+
+    async def transcribe_stream(self, audio_chunks, on_interim=None):
+        received = 0
+        async for chunk in audio_chunks:
+            received += 1
+            if on_interim:
+                on_interim(self.transcript[:received * 5])
+            if received >= self.chunks_per_utterance:
+                return self.transcript
+        return self.transcript if received else None
+
+
+def fake_synthesize(text, path, lang='en', slow=False, tld='com'):
+    """Write recognisable bytes instead of calling gTTS"""
+    with open(path, 'wb') as f:
+        f.write(b'ID3' + text.encode('utf-8') * 2000)
+
+
+class TestVoiceGateway(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.tts_cache = TTSCache(self.cache_dir, synthesize=fake_synthesize)
+        self.turns = []
+        self.emotion_samples = []
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def respond(self, session_id, text, emotion, confidence):
+        self.turns.append((session_id, text, emotion, confidence))
+        cards = [{'title': 'The Mask', 'year': 1994}]
+        return cards, "Here is a comedy for you. The Mask is a lot of fun. Enjoy the movie tonight!"
+
+    def detect_emotion(self, samples):
+        self.emotion_samples.append(samples)
+        return 'happy', 0.8
+
+    def resolve_session(self, token):
+        return token[len('signed-'):] if token.startswith('signed-') else None
+
+    def make_gateway(self, **kwargs):
+        return VoiceGateway(self.respond, detect_emotion=self.detect_emotion, tts_cache=self.tts_cache,
+                            transcriber_factory=lambda sample_rate: FakeTranscriber(),
+                            resolve_session=self.resolve_session, host='127.0.0.1', port=0, **kwargs)
+
+    def run_client(self, gateway, client):
+        """Serve the gateway on a free port and run the client coroutine against it"""
+        async def runner():
+            async with websockets.serve(gateway.handler, '127.0.0.1', 0) as server:
+                port = server.sockets[0].getsockname()[1]
+                async with websockets.connect(f'ws://127.0.0.1:{port}/') as ws:
+                    return await asyncio.wait_for(client(ws), timeout=10)
+        return asyncio.run(runner())
+
+    async def read_turn(self, ws):
+        """Collect events (and audio bytes per clip) until the turn ends"""
+        events, clips = [], []
+        while True:
+            message = await ws.recv()
+            if isinstance(message, bytes):
+                clips[-1] += message
+                continue
+            event = json.loads(message)
+            events.append(event)
+            if event['type'] == 'audio_start':
+                clips.append(b'')
+            if event['type'] in ('turn_end', 'error'):
+                return events, clips
+
+    def test_streamed_audio_produces_interim_emotion_cards_and_speech(self):
+        """Test a spoken turn pushes each result as it becomes ready, then streams TTS"""
+        async def client(ws):
+            await ws.send(json.dumps({'type': 'start', 'token': 'signed-abc', 'sample_rate': 16000}))
+            ready = json.loads(await ws.recv())
+            pcm = (np.sin(np.linspace(0, 200, 1600)) * 8000).astype('<i2').tobytes()
+            for _ in range(3):
+                await ws.send(pcm)
+            events, clips = await self.read_turn(ws)
+            return ready, events, clips
+
+        ready, events, clips = self.run_client(self.make_gateway(), client)
+        types = [event['type'] for event in events]
+
+        self.assertEqual(ready, {'type': 'ready', 'sample_rate': 16000})
+        self.assertEqual(types[0], 'interim')
+        ordered = [t for t in types if t != 'interim']
+        self.assertEqual(ordered[:4], ['transcript', 'emotion', 'recommendations', 'response'])
+        self.assertEqual(ordered[-1], 'turn_end')
+
+        emotion = events[types.index('emotion')]
+        self.assertEqual((emotion['emotion'], emotion['confidence']), ('happy', 0.8))
+        self.assertEqual(events[types.index('recommendations')]['recommendations'][0]['title'], 'The Mask')
+
+        # The turn ran in the page's session with the detected emotion
+        self.assertEqual(self.turns, [('abc', 'i feel happy, something funny', 'happy', 0.8)])
+        self.assertEqual(len(self.emotion_samples[0]), 3 * 1600)
+        self.assertLessEqual(np.abs(self.emotion_samples[0]).max(), 1.0)
+
+        # One clip per sentence, each identical to the cached MP3 and sent in several frames
+        sentences = [event['text'] for event in events if event['type'] == 'audio_start']
+        self.assertEqual(len(sentences), 3)
+        for sentence, clip in zip(sentences, clips):
+            with open(self.tts_cache.synthesize_path(sentence), 'rb') as f:
+                self.assertEqual(clip, f.read())
+
+    def test_silence_never_reaches_the_transcriber(self):
+        """Test an open microphone sends nothing to Deepgram until someone speaks"""
+        streams = []
+
+        def transcriber_factory(sample_rate):
+            streams.append(sample_rate)
+            return FakeTranscriber()
+
+        async def client(ws):
+            await ws.send(json.dumps({'type': 'start', 'token': 'signed-abc', 'sample_rate': 16000}))
+            await ws.recv()
+            silence = np.zeros(1600, dtype='<i2').tobytes()
+            for _ in range(30):
+                await ws.send(silence)
+            await ws.send(json.dumps({'type': 'text', 'text': 'ping'}))
+            await self.read_turn(ws)
+            opened_during_silence = len(streams)
+            pcm = (np.sin(np.linspace(0, 200, 1600)) * 8000).astype('<i2').tobytes()
+            for _ in range(3):
+                await ws.send(pcm)
+            events, _ = await self.read_turn(ws)
+            return opened_during_silence, events
+
+        gateway = self.make_gateway()
+        gateway.transcriber_factory = transcriber_factory
+        opened_during_silence, events = self.run_client(gateway, client)
+
+        self.assertEqual(opened_during_silence, 0)
+        self.assertEqual(len(streams), 1)
+        self.assertNotIn('no_speech', [event['type'] for event in events])
+        self.assertEqual(self.turns[-1][1], 'i feel happy, something funny')
+        # Of the leading silence only the gate's 300 ms pre-roll is kept with the speech
+        self.assertEqual(len(self.emotion_samples[0]), 3 * 1600 + 4800)
+
+    def test_text_message_answered_without_audio(self):
+        """Test a typed message is answered with neutral emotion and no transcription"""
+        async def client(ws):
+            await ws.send(json.dumps({'type': 'text', 'text': 'a scary movie'}))
+            return await self.read_turn(ws)
+
+        events, clips = self.run_client(self.make_gateway(), client)
+
+        self.assertEqual(events[0], {'type': 'transcript', 'text': 'a scary movie'})
+        self.assertEqual(events[1]['emotion'], 'neutral')
+        self.assertEqual(self.turns[0][1:], ('a scary movie', 'neutral', 0.0))
+        self.assertEqual(self.emotion_samples, [])
+        self.assertEqual(len(clips), 3)
+
+    def test_session_needs_a_signed_token(self):
+        """Test a client can't join another browser's conversation by naming its id"""
+        async def client(ws):
+            await ws.send(json.dumps({'type': 'start', 'session_id': 'victim', 'sample_rate': 16000}))
+            ready = json.loads(await ws.recv())
+            await ws.send(json.dumps({'type': 'start', 'token': 'forged-victim'}))
+            rejected = json.loads(await ws.recv())
+            await ws.send(json.dumps({'type': 'text', 'text': 'a scary movie'}))
+            await self.read_turn(ws)
+            return ready, rejected
+
+        ready, rejected = self.run_client(self.make_gateway(), client)
+
+        self.assertEqual(ready['type'], 'ready')
+        self.assertEqual(rejected, {'type': 'error', 'message': 'Invalid voice session token'})
+        self.assertNotIn(self.turns[0][0], ('victim', 'forged-victim'))
+
+    def test_new_turn_interrupts_reply_in_progress(self):
+        """Test barge-in: a new turn cancels the reply that is still being answered"""
+        gate = asyncio.Event()
+        respond = self.respond
+
+        def slow_respond(session_id, text, emotion, confidence):
+            if text == 'first':
+                asyncio.run_coroutine_threadsafe(gate.wait(), loop).result(5)
+            return respond(session_id, text, emotion, confidence)
+
+        gateway = self.make_gateway()
+        gateway.respond = slow_respond
+        loop = None
+
+        async def client(ws):
+            nonlocal loop
+            loop = asyncio.get_running_loop()
+            await ws.send(json.dumps({'type': 'text', 'text': 'first'}))
+            await ws.send(json.dumps({'type': 'text', 'text': 'second'}))
+            events, _ = await self.read_turn(ws)
+            gate.set()
+            return events
+
+        events = self.run_client(gateway, client)
+        types = [event['type'] for event in events]
+
+        self.assertIn('interrupted', types)
+        responses = [event for event in events if event['type'] == 'recommendations']
+        self.assertEqual(len(responses), 1)
+        self.assertEqual(events[-1]['type'], 'turn_end')
+
+    def test_unknown_and_invalid_messages_report_errors(self):
+        """Test bad control messages get an error event instead of closing the socket"""
+        async def client(ws):
+            await ws.send('not json')
+            first = json.loads(await ws.recv())
+            await ws.send(json.dumps({'type': 'dance'}))
+            second = json.loads(await ws.recv())
+            return first, second
+
+        first, second = self.run_client(self.make_gateway(), client)
+        self.assertEqual(first, {'type': 'error', 'message': 'Invalid JSON message'})
+        self.assertEqual(second['type'], 'error')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import time
+import unittest
+
+from voice_worker_pool import VoicePoolFull, VoiceWorkerPool
+
+
+def counting_handler():
+    """Handler factory that records each warm-up and runs jobs from their payload"""
+    with open(os.environ['VOICE_POOL_TEST_LOADS'], 'a') as f:
+        f.write('loaded\n')
+
+    def handle(payload):
+        action = (payload or {}).get('action')
+        if action == 'sleep':
+            time.sleep(payload['seconds'])
+        elif action == 'crash':
+            os._exit(1)
+        elif action == 'raise':
+            raise ValueError('bad request')
+
+    return handle
+
+
+class TestVoiceWorkerPool(unittest.TestCase):
+    def setUp(self):
+        self.loads_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), f'.voice_pool_{os.getpid()}')
+        os.environ['VOICE_POOL_TEST_LOADS'] = self.loads_file
+        self.pool = None
+
+    def tearDown(self):
+        if self.pool is not None:
+            self.pool.stop(timeout=1)
+        if os.path.exists(self.loads_file):
+            os.unlink(self.loads_file)
+
+    def start_pool(self, **kwargs):
+        options = dict(size=1, max_queue=2, handler_factory=counting_handler,
+                       heartbeat_interval=0.1, health_timeout=2.0)
+        options.update(kwargs)
+        self.pool = VoiceWorkerPool(**options).start()
+        return self.pool
+
+    def wait_for(self, predicate, timeout=10):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if predicate():
+                return True
+            time.sleep(0.05)
+        return False
+
+    def wait_for_job(self, job_id, status):
+        self.assertTrue(self.wait_for(lambda: self.pool.job(job_id)['status'] == status),
+                        f"job never reached {status}: {self.pool.job(job_id)}")
+
+    def loads(self):
+        if not os.path.exists(self.loads_file):
+            return 0
+        with open(self.loads_file) as f:
+            return len(f.readlines())
+
+    def test_jobs_reuse_the_warm_worker(self):
+        """Test several launches run in one worker that warmed up only once"""
+        pool = self.start_pool()
+        for _ in range(3):
+            job_id = pool.submit()
+            self.wait_for_job(job_id, 'done')
+        self.assertEqual(self.loads(), 1)
+        self.assertEqual(pool.status()['idle'], 1)
+
+    def test_queue_limit_refuses_extra_jobs(self):
+        """Test the concurrency cap: one running, max_queue waiting, the rest refused"""
+        pool = self.start_pool()
+        running = pool.submit({'action': 'sleep', 'seconds': 1})
+        self.wait_for_job(running, 'running')
+        pool.submit()
+        pool.submit()
+        with self.assertRaises(VoicePoolFull):
+            pool.submit()
+        self.assertEqual(pool.status()['queued'], 2)
+
+    def test_failed_job_reports_error_and_worker_stays_up(self):
+        """Test a handler exception fails only that job"""
+        pool = self.start_pool()
+        failed = pool.submit({'action': 'raise'})
+        self.wait_for_job(failed, 'failed')
+        self.assertEqual(pool.job(failed)['error'], 'bad request')
+        ok = pool.submit()
+        self.wait_for_job(ok, 'done')
+        self.assertEqual(pool.restarts, 0)
+
+    def test_crashed_worker_is_replaced(self):
+        """Test the supervisor fails the crashed job and starts a fresh worker"""
+        pool = self.start_pool()
+        crashed = pool.submit({'action': 'crash'})
+        self.wait_for_job(crashed, 'failed')
+        self.assertIn('exited', pool.job(crashed)['error'])
+        self.assertGreaterEqual(pool.restarts, 1)
+        ok = pool.submit()
+        self.wait_for_job(ok, 'done')
+
+    def test_overrunning_job_is_stopped(self):
+        """Test a job past job_timeout gets its worker replaced"""
+        pool = self.start_pool(job_timeout=0.5)
+        stuck = pool.submit({'action': 'sleep', 'seconds': 30})
+        self.wait_for_job(stuck, 'failed')
+        self.assertIn('timed out', pool.job(stuck)['error'])
+        self.assertTrue(self.wait_for(lambda: pool.status()['idle'] == 1))
+
+    def test_unknown_job(self):
+        """Test an unknown job id has no status"""
+        pool = self.start_pool()
+        self.assertIsNone(pool.job('missing'))
+
+
+if __name__ == '__main__':
+    unittest.main()
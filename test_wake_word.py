@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from wake_word import WakeWordSpotter
+
+SAMPLE_RATE = 16000
+
+
+def phrase(freqs, syllable_seconds=0.2, seed=0, stretch=1.0):
+    """Synthesize a 'spoken phrase' as a sequence of harmonic syllables"""
+    rng = np.random.default_rng(seed)
+    parts = []
+    for freq in freqs:
+        n = int(SAMPLE_RATE * syllable_seconds * stretch)
+        t = np.arange(n) / SAMPLE_RATE
+        syllable = sum(np.sin(2 * np.pi * freq * k * t) / k for k in range(1, 4))
+        parts.append(0.1 * syllable * np.hanning(n))
+    audio = np.concatenate(parts)
+    return (audio + 0.002 * rng.standard_normal(len(audio))).astype(np.float32)
+
+
+HEY_MOVIE_BUDDY = [300, 520, 410, 650, 350]
+SOMETHING_ELSE = [900, 180, 900, 180, 900]
+
+
+class TestWakeWordSpotter(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'templates.npz')
+        self.spotter = WakeWordSpotter(['hey movie buddy'], templates_path=self.path)
+        for seed, stretch in [(1, 1.0), (2, 0.9), (3, 1.1)]:
+            self.spotter.enroll('hey movie buddy', phrase(HEY_MOVIE_BUDDY, seed=seed, stretch=stretch))
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        os.rmdir(self.tmpdir)
+
+    def test_not_ready_without_templates(self):
+        """Test the spotter stays inactive until phrases are enrolled"""
+        spotter = WakeWordSpotter(['hey movie buddy'], templates_path=None)
+        self.assertFalse(spotter.is_ready())
+        self.assertEqual(spotter.detect(phrase(HEY_MOVIE_BUDDY))[0], None)
+
+    def test_detects_enrolled_phrase(self):
+        """Test a new utterance of the wake phrase is matched"""
+        self.assertTrue(self.spotter.is_ready())
+        detected, _ = self.spotter.detect(phrase(HEY_MOVIE_BUDDY, seed=7, stretch=1.05))
+        self.assertEqual(detected, 'hey movie buddy')
+
+    def test_detects_phrase_at_start_of_longer_request(self):
+        """Test the wake phrase is found when followed by the actual request"""
+        audio = np.concatenate([phrase(HEY_MOVIE_BUDDY, seed=8), phrase(SOMETHING_ELSE, seed=9)])
+        detected, _ = self.spotter.detect(audio)
+        self.assertEqual(detected, 'hey movie buddy')
+
+    def test_rejects_other_speech(self):
+        """Test unrelated speech does not wake the assistant"""
+        detected, distance = self.spotter.detect(phrase(SOMETHING_ELSE, seed=10))
+        self.assertIsNone(detected)
+        self.assertGreater(distance, self.spotter.thresholds['hey movie buddy'])
+
+    def test_rejects_silence(self):
+        """Test silence never matches"""
+        detected, _ = self.spotter.detect(np.zeros(SAMPLE_RATE, dtype=np.float32))
+        self.assertIsNone(detected)
+
+    def test_templates_round_trip_through_disk(self):
+        """Test saved templates are loaded and calibrated by a new spotter"""
+        self.spotter.save()
+        reloaded = WakeWordSpotter(['hey movie buddy', 'movie buddy'], templates_path=self.path)
+        self.assertEqual(len(reloaded.templates['hey movie buddy']), 3)
+        self.assertEqual(reloaded.templates['movie buddy'], [])
+        self.assertAlmostEqual(reloaded.thresholds['hey movie buddy'],
+                               self.spotter.thresholds['hey movie buddy'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""Train the review sentiment model from datasets/reviews.txt
+
+    python train_sentiment.py [--features N] [--alpha A] [--test-size F] [--seed S] [--output PATH]
+
+Reviews are turned into hashed TF-IDF features (no vocabulary to store:
+memory is bounded by the number of hash columns) and classified with
+multinomial naive Bayes, like the original pickled model. Accuracy is
+measured on a held-out split; the dataset repeats many lines, so the
+split is by distinct text and no test review is ever seen in training.
+The model is then refitted on every review, benchmarked, and written to
+models/sentiment.npz, which the app loads. The same seed gives the same
+split and the same model.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from sentiment_model import (REVIEWS_DATASET, SENTIMENT_MODEL_PATH, SentimentModel, TextVectorizer, load_reviews,
+                             save_model)
+
+TOKEN_PATTERN = r'(?u)\b\w\w+\b'
+
+# Hash columns: collisions are rare with a few thousand distinct words
+DEFAULT_FEATURES = 2 ** 16
+DEFAULT_ALPHA = 0.1
+DEFAULT_TEST_SIZE = 0.2
+DEFAULT_SEED = 42
+BENCHMARK_BATCH = 256
+
+
+def hashed_vectorizer(n_features, idf=None, norm=None):
+    return TextVectorizer(TOKEN_PATTERN, n_features, idf=idf, lowercase=True, strip_accents='ascii', norm=norm)
+
+
+def fit(texts, labels, n_features, alpha):
+    """Fit IDF weights and naive Bayes on texts; returns (idf, classifier)"""
+    from sklearn.naive_bayes import MultinomialNB
+
+    # Each (document, column) pair appears once, so column counts are document frequencies
+    _, columns, _ = hashed_vectorizer(n_features).vectors(texts)
+    df = np.bincount(columns, minlength=n_features)
+    idf = np.log((1 + len(texts)) / (1 + df)) + 1  # smoothed, as TfidfVectorizer does
+    features = hashed_vectorizer(n_features, idf=idf, norm='l2').matrix(texts)
+    return idf, MultinomialNB(alpha=alpha).fit(features, labels)
+
+
+def split_by_text(texts, test_size, seed):
+    """Boolean test mask that keeps every copy of a text on the same side"""
+    distinct = sorted(set(texts))
+    rng = np.random.default_rng(seed)
+    test_texts = set(rng.permutation(len(distinct))[:round(len(distinct) * test_size)].tolist())
+    test_texts = {distinct[i] for i in test_texts}
+    return np.array([text in test_texts for text in texts])
+
+
+def throughput(model, texts, batch_size):
+    """(single, batched) reviews per second"""
+    sample = texts[:2000]
+    started = time.perf_counter()
+    for text in sample:
+        model.predict([text])
+    single = len(sample) / (time.perf_counter() - started)
+    started = time.perf_counter()
+    for start in range(0, len(texts), batch_size):
+        model.predict(texts[start:start + batch_size])
+    batched = len(texts) / (time.perf_counter() - started)
+    return single, batched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the review sentiment model")
+    parser.add_argument("--data", default=REVIEWS_DATASET, help="labelled reviews, one 'label<TAB>text' per line")
+    parser.add_argument("--features", type=int, default=DEFAULT_FEATURES, help="number of hash columns")
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA, help="naive Bayes smoothing")
+    parser.add_argument("--test-size", type=float, default=DEFAULT_TEST_SIZE, help="share of distinct reviews held out")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", default=SENTIMENT_MODEL_PATH, help="where to write the model the app loads")
+    args = parser.parse_args()
+
+    texts, labels = load_reviews(args.data)
+    test = split_by_text(texts, args.test_size, args.seed)
+    train_texts = [text for text, held_out in zip(texts, test) if not held_out]
+    test_texts = [text for text, held_out in zip(texts, test) if held_out]
+    print(f"📚 {len(texts)} reviews ({len(set(texts))} distinct): "
+          f"{len(train_texts)} for training, {len(test_texts)} held out")
+
+    started = time.perf_counter()
+    idf, clf = fit(train_texts, labels[~test], args.features, args.alpha)
+    print(f"🏋️ Trained in {time.perf_counter() - started:.2f}s")
+    features = hashed_vectorizer(args.features, idf=idf, norm='l2').matrix(test_texts)
+    accuracy = float(np.mean(clf.predict(features) == labels[test]))
+    print(f"🎯 Held-out accuracy: {accuracy:.2%}")
+
+    # The shipped model learns from every review
+    idf, clf = fit(texts, labels, args.features, args.alpha)
+    save_model(args.output, clf.feature_log_prob_, clf.class_log_prior_, clf.classes_, 'hashing', TOKEN_PATTERN,
+               idf=idf, lowercase=True, strip_accents='ascii', norm='l2',
+               source=args.data, seed=args.seed, alpha=args.alpha, held_out_accuracy=accuracy)
+    model = SentimentModel.load(args.output)
+    single, batched = throughput(model, texts, BENCHMARK_BATCH)
+    print(f"✅ Wrote {args.output} ({model.store.nbytes / 1e6:.1f} MB, {args.features} hash columns)")
+    print(f"⚡ Inference: {single:,.0f} reviews/s one at a time, "
+          f"{batched:,.0f} reviews/s in batches of {BENCHMARK_BATCH}")
+
+
+if __name__ == "__main__":
+    main()
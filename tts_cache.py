@@ -0,0 +1,183 @@
+import contextlib
+import hashlib
+import os
+import tempfile
+import threading
+
+# Synthesised speech is cached next to the app, keyed by a hash of the request
+TTS_CACHE_DIR = 'tts_cache'
+
+# Total size the cache may grow to before the least recently used clips are dropped
+TTS_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def gtts_synthesize(text, path, lang='en', slow=False, tld='com'):
+    """Synthesise text to an MP3 file with gTTS"""
+    # Imported here so the cache can be used (and tested) without gTTS
+    from gtts import gTTS
+    gTTS(text=text, lang=lang, slow=slow, tld=tld).save(path)
+
+
+def normalise_text(text):
+    """Collapse whitespace so trivially different strings share a clip"""
+    return ' '.join(str(text).split())
+
+
+def tts_key(text, lang='en', slow=False, tld='com'):
+    """Return the content hash for a piece of text and its voice settings"""
+    payload = '\x1f'.join([normalise_text(text), lang, '1' if slow else '0', tld])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class TTSCache:
+    """Content-addressed, size-bounded disk cache for synthesised speech
+
+    Each clip is stored as ``<sha256>.mp3`` where the hash covers the text
+    and every voice setting, so a phrase that has been spoken once is never
+    sent to the TTS service again. The web app serves clips by URL (the key
+    never changes for a given clip, so browsers can cache it forever) and
+    the voice assistants play the cached file directly.
+
+    Misses lock only their own key, so different phrases are synthesised in
+    parallel while concurrent requests for the same phrase wait for one
+    synthesis. The cache keeps a running size estimate (the size found at
+    start-up plus what this process wrote) and only rescans the directory
+    to evict when that estimate goes over max_bytes.
+    """
+
+    def __init__(self, cache_dir=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_BYTES, synthesize=None):
+        """Initialize the cache; ``synthesize(text, path, **voice)`` defaults to gTTS"""
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.synthesize = synthesize or gtts_synthesize
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._evict_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._size_estimate = self.size()
+
+    def key_for(self, text, lang='en', slow=False, tld='com'):
+        """Return the content hash for a piece of text and its voice settings"""
+        return tts_key(text, lang, slow, tld)
+
+    def path_for(self, key):
+        """Return the on-disk path of a clip"""
+        return os.path.join(self.cache_dir, f'{key}.mp3')
+
+    @staticmethod
+    def is_valid_key(key):
+        """Return True if key looks like one of our hashes (guards the serving route)"""
+        return len(key) == 64 and all(c in '0123456789abcdef' for c in key)
+
+    def get(self, key):
+        """Return the path of a cached clip, or None"""
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+        # mtime doubles as the last-used time for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def synthesize_key(self, text, lang='en', slow=False, tld='com'):
+        """Return the key for text, synthesising it only if it isn't cached yet"""
+        text = normalise_text(text)
+        key = self.key_for(text, lang, slow, tld)
+        if self.get(key):
+            self.hits += 1
+            return key
+
+        with self._key_lock(key):
+            # Another thread may have produced it while we waited
+            if self.get(key):
+                self.hits += 1
+                return key
+
+            with self._lock:
+                self.misses += 1
+            # Write to a temp file in the cache dir, then rename atomically so
+            # readers never see a half-written clip
+            fd, tmp_path = tempfile.mkstemp(suffix='.part', dir=self.cache_dir)
+            os.close(fd)
+            try:
+                self.synthesize(text, tmp_path, lang=lang, slow=slow, tld=tld)
+                size = os.path.getsize(tmp_path)
+                os.replace(tmp_path, self.path_for(key))
+            finally:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+
+        with self._lock:
+            self._size_estimate += size
+            over_limit = self._size_estimate > self.max_bytes
+        # One thread rescans at a time; the others carry on
+        if over_limit and self._evict_lock.acquire(blocking=False):
+            try:
+                self.evict()
+            finally:
+                self._evict_lock.release()
+        return key
+
+    @contextlib.contextmanager
+    def _key_lock(self, key):
+        """Hold the lock for one key, dropping it once nobody is waiting on it"""
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._key_locks[key]
+
+    def synthesize_path(self, text, lang='en', slow=False, tld='com'):
+        """Return the path of the clip for text, synthesising it on a miss"""
+        return self.path_for(self.synthesize_key(text, lang, slow, tld))
+
+    def size(self):
+        """Total bytes currently stored"""
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        """List (path, size, mtime) for every cached clip"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.mp3'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def evict(self):
+        """Delete least recently used clips until the cache fits in max_bytes"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            with self._lock:
+                self._size_estimate = total
+            return 0
+
+        removed = 0
+        for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+        with self._lock:
+            self._size_estimate = total
+        return removed
@@ -0,0 +1,199 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+# SQLite file shared by every worker process
+USER_DB_PATH = os.environ.get('USER_DB_PATH', 'moodflix.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    name TEXT,
+    password BLOB NOT NULL,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS watchlist (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    movie_id TEXT NOT NULL,
+    movie TEXT NOT NULL,
+    added_at TEXT NOT NULL,
+    PRIMARY KEY (user_id, movie_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS ratings (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    movie_id TEXT NOT NULL,
+    movie TEXT NOT NULL,
+    rating INTEGER NOT NULL,
+    rated_at TEXT NOT NULL,
+    PRIMARY KEY (user_id, movie_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS watched (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    movie_id TEXT NOT NULL,
+    movie TEXT NOT NULL,
+    watched_at TEXT NOT NULL,
+    PRIMARY KEY (user_id, movie_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS watchlist_added ON watchlist (user_id, added_at);
+CREATE INDEX IF NOT EXISTS ratings_rated ON ratings (user_id, rated_at);
+CREATE INDEX IF NOT EXISTS watched_at ON watched (user_id, watched_at);
+"""
+
+
+def _movie_row(movie):
+    """Split a movie dict into (movie_id, JSON of the remaining fields)"""
+    movie = dict(movie)
+    movie_id = movie.get('id')
+    if movie_id is None:
+        movie_id = movie.get('title')
+    return str(movie_id), json.dumps(movie, default=str)
+
+
+def _movie(data, **timestamps):
+    """Rebuild a movie dict with its timestamps as datetimes (the templates format them)"""
+    movie = json.loads(data)
+    for key, value in timestamps.items():
+        movie[key] = datetime.fromisoformat(value)
+    return movie
+
+
+class UserStore:
+    """SQLite store for accounts, watchlists, ratings and watched movies
+
+    Every gunicorn worker opens the same database file, so registrations and
+    lists are shared and survive restarts. WAL mode lets readers carry on
+    while one worker writes, and the (user_id, movie_id) primary keys make
+    the duplicate check, insert and delete single index operations. Each
+    thread of each process gets its own connection; a process forked after
+    a connection was opened reconnects instead of sharing it.
+    """
+
+    def __init__(self, path=USER_DB_PATH, timeout=5.0):
+        """Initialize the store and create the schema if needed"""
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def connection(self):
+        """Return this thread's connection (used as ``with store.connection() as conn``)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # Accounts
+
+    def create_user(self, email, name, password):
+        """Add an account; returns False if the email is already registered"""
+        try:
+            with self.connection() as conn:
+                conn.execute('INSERT INTO users (email, name, password, created_at) VALUES (?, ?, ?, ?)',
+                             (email, name, password, datetime.now().isoformat()))
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def get_user(self, email):
+        """Return the account (id, email, name, password, created_at) or None"""
+        row = self.connection().execute(
+            'SELECT id, email, name, password, created_at FROM users WHERE email = ?', (email,)).fetchone()
+        if row is None:
+            return None
+        user = dict(row)
+        user['created_at'] = datetime.fromisoformat(user['created_at'])
+        return user
+
+    def update_password(self, user_id, password):
+        """Replace an account's stored password hash"""
+        with self.connection() as conn:
+            conn.execute('UPDATE users SET password = ? WHERE id = ?', (password, user_id))
+
+    def get_profile(self, email):
+        """Return the account with its watchlist, watched movies and ratings, or None"""
+        user = self.get_user(email)
+        if user is None:
+            return None
+        conn = self.connection()
+        user['watchlist'] = [
+            _movie(row['movie'], added_at=row['added_at']) for row in conn.execute(
+                'SELECT movie, added_at FROM watchlist WHERE user_id = ? ORDER BY added_at', (user['id'],))]
+        user['watched'] = [
+            _movie(row['movie'], watched_at=row['watched_at']) for row in conn.execute(
+                'SELECT movie, watched_at FROM watched WHERE user_id = ? ORDER BY watched_at DESC', (user['id'],))]
+        user['ratings'] = {}
+        for row in conn.execute('SELECT movie_id, movie, rating, rated_at FROM ratings '
+                                'WHERE user_id = ? ORDER BY rated_at', (user['id'],)):
+            movie = _movie(row['movie'], rated_at=row['rated_at'])
+            movie['rating'] = row['rating']
+            user['ratings'][row['movie_id']] = movie
+        return user
+
+    # Lists
+
+    def add_to_watchlist(self, user_id, movie):
+        """Add a movie; returns False if it was already on the watchlist"""
+        movie_id, data = _movie_row(movie)
+        with self.connection() as conn:
+            cursor = conn.execute('INSERT OR IGNORE INTO watchlist (user_id, movie_id, movie, added_at) '
+                                  'VALUES (?, ?, ?, ?)', (user_id, movie_id, data, datetime.now().isoformat()))
+        return cursor.rowcount == 1
+
+    def remove_from_watchlist(self, user_id, movie_id):
+        """Remove a movie; returns the removed movie, or None if it wasn't on the watchlist"""
+        with self.connection() as conn:
+            row = conn.execute('DELETE FROM watchlist WHERE user_id = ? AND movie_id = ? RETURNING movie',
+                               (user_id, str(movie_id))).fetchone()
+        return json.loads(row['movie']) if row else None
+
+    def rate_movie(self, user_id, movie, rating):
+        """Record (or replace) the user's rating for a movie"""
+        movie_id, data = _movie_row(movie)
+        with self.connection() as conn:
+            conn.execute('INSERT INTO ratings (user_id, movie_id, movie, rating, rated_at) VALUES (?, ?, ?, ?, ?) '
+                         'ON CONFLICT (user_id, movie_id) DO UPDATE SET '
+                         'movie = excluded.movie, rating = excluded.rating, rated_at = excluded.rated_at',
+                         (user_id, movie_id, data, int(rating), datetime.now().isoformat()))
+
+    def interactions(self, since=0.0):
+        """Yield (user_id, title, source, rating) for ratings and watchlist entries since a timestamp
+
+        ``source`` is 'rating' or 'watchlist' (rating is None for watchlist rows).
+        Used to build and refresh the collaborative filter.
+        """
+        since = datetime.fromtimestamp(since).isoformat() if since else ''
+        conn = self.connection()
+        for row in conn.execute('SELECT user_id, movie_id, movie, rating FROM ratings WHERE rated_at > ?', (since,)):
+            yield row['user_id'], json.loads(row['movie']).get('title') or row['movie_id'], 'rating', row['rating']
+        for row in conn.execute('SELECT user_id, movie_id, movie FROM watchlist WHERE added_at > ?', (since,)):
+            yield row['user_id'], json.loads(row['movie']).get('title') or row['movie_id'], 'watchlist', None
+
+    def mark_watched(self, user_id, movie):
+        """Record that the user watched a movie (re-watching updates the date)"""
+        movie_id, data = _movie_row(movie)
+        with self.connection() as conn:
+            conn.execute('INSERT INTO watched (user_id, movie_id, movie, watched_at) VALUES (?, ?, ?, ?) '
+                         'ON CONFLICT (user_id, movie_id) DO UPDATE SET '
+                         'movie = excluded.movie, watched_at = excluded.watched_at',
+                         (user_id, movie_id, data, datetime.now().isoformat()))
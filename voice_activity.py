@@ -0,0 +1,206 @@
+import collections
+import copy
+import queue
+import time
+
+import numpy as np
+
+
+class VoiceActivityDetector:
+    """Energy and zero-crossing based voice activity detection"""
+
+    def __init__(self, sample_rate=16000, frame_ms=30, energy_threshold=0.01, noise_ratio=3.0,
+                 max_zcr=0.35, min_speech_frames=3):
+        """Initialize the detector
+
+        A frame counts as speech when its RMS energy is above both the fixed
+        threshold and ``noise_ratio`` times the running noise floor, and its
+        zero-crossing rate is below ``max_zcr`` (broadband hiss crosses zero
+        far more often than voiced speech).
+        """
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.energy_threshold = energy_threshold
+        self.noise_ratio = noise_ratio
+        self.max_zcr = max_zcr
+        self.min_speech_frames = min_speech_frames
+        self.noise_floor = energy_threshold / noise_ratio
+
+    def reset(self):
+        """Forget the learned noise floor"""
+        self.noise_floor = self.energy_threshold / self.noise_ratio
+
+    def _to_float(self, audio_data):
+        """Return mono float32 audio in [-1, 1]"""
+        audio_data = np.asarray(audio_data)
+        if audio_data.ndim > 1:
+            audio_data = audio_data[:, 0]
+        if audio_data.dtype == np.int16:
+            return audio_data.astype(np.float32) / 32768.0
+        if audio_data.dtype == np.int32:
+            return audio_data.astype(np.float32) / 2147483648.0
+        return audio_data.astype(np.float32, copy=False)
+
+    def frame_features(self, frame):
+        """Return (rms_energy, zero_crossing_rate) for one frame"""
+        if len(frame) == 0:
+            return 0.0, 0.0
+        rms = float(np.sqrt(np.mean(frame ** 2)))
+        zcr = float(np.count_nonzero(np.diff(np.signbit(frame)))) / len(frame)
+        return rms, zcr
+
+    def is_speech_frame(self, frame):
+        """Classify a single frame and adapt the noise floor on non-speech"""
+        rms, zcr = self.frame_features(frame)
+        threshold = max(self.energy_threshold, self.noise_floor * self.noise_ratio)
+        speech = rms >= threshold and zcr <= self.max_zcr
+        if not speech:
+            # Slowly track background noise so a noisy room does not trigger capture
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+        return speech
+
+    def speech_frames(self, audio_data):
+        """Yield a speech/non-speech flag for every full frame in a buffer"""
+        audio_data = self._to_float(audio_data)
+        for start in range(0, len(audio_data) - self.frame_size + 1, self.frame_size):
+            yield self.is_speech_frame(audio_data[start:start + self.frame_size])
+
+    def contains_speech(self, audio_data):
+        """Return True if the buffer has at least min_speech_frames consecutive speech frames
+
+        Each buffer is judged on its own with a fresh copy of the detector, so
+        the running noise floor is neither used nor changed and concurrent
+        callers (e.g. uploads from different web sessions) can't affect each other.
+        """
+        if audio_data is None:
+            return False
+        detector = copy.copy(self)
+        detector.reset()
+        run = 0
+        for speech in detector.speech_frames(audio_data):
+            run = run + 1 if speech else 0
+            if run >= self.min_speech_frames:
+                return True
+        return False
+
+
+class SpeechGate:
+    """Ring-buffered onset/offset state machine over incoming audio blocks
+
+    Blocks are held in a short pre-roll ring buffer until speech starts, so the
+    first syllable is not clipped. After onset every block is passed through
+    until ``trailing_silence_ms`` of continuous silence has been seen.
+    """
+
+    def __init__(self, detector=None, sample_rate=16000, pre_roll_ms=300, trailing_silence_ms=700):
+        """Initialize the gate"""
+        self.detector = detector or VoiceActivityDetector(sample_rate=sample_rate)
+        self.sample_rate = sample_rate
+        self.pre_roll_samples = int(sample_rate * pre_roll_ms / 1000)
+        self.trailing_silence_samples = int(sample_rate * trailing_silence_ms / 1000)
+        self.reset()
+
+    def reset(self):
+        """Return to the idle state"""
+        self.ring = collections.deque()
+        self.ring_samples = 0
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.speech_run = 0
+        self.silence_samples = 0
+        self.triggered = False
+        self.finished = False
+
+    def _classify(self, block):
+        """Update onset/offset counters with the frames in a block"""
+        audio = np.concatenate([self.pending, self.detector._to_float(block).reshape(-1)])
+        frame_size = self.detector.frame_size
+        usable = len(audio) - len(audio) % frame_size
+        self.pending = audio[usable:]
+
+        for start in range(0, usable, frame_size):
+            if self.detector.is_speech_frame(audio[start:start + frame_size]):
+                self.speech_run += 1
+                self.silence_samples = 0
+                if self.speech_run >= self.detector.min_speech_frames:
+                    self.triggered = True
+            else:
+                self.speech_run = 0
+                if self.triggered:
+                    self.silence_samples += frame_size
+                    if self.silence_samples >= self.trailing_silence_samples:
+                        self.finished = True
+
+    def push(self, block):
+        """Feed one block and return the list of blocks that belong to the utterance"""
+        if self.finished:
+            return []
+
+        was_triggered = self.triggered
+        self._classify(block)
+
+        if was_triggered:
+            return [block]
+
+        if self.triggered:
+            # Speech just started - flush the pre-roll along with this block
+            emitted = list(self.ring) + [block]
+            self.ring.clear()
+            self.ring_samples = 0
+            return emitted
+
+        self.ring.append(block)
+        self.ring_samples += len(block)
+        while self.ring and self.ring_samples - len(self.ring[0]) >= self.pre_roll_samples:
+            self.ring_samples -= len(self.ring.popleft())
+        return []
+
+
+class VADRecorder:
+    """Microphone recorder that captures a single utterance instead of a fixed window"""
+
+    def __init__(self, sample_rate=16000, channels=1, block_ms=30, pre_roll_ms=300,
+                 trailing_silence_ms=700, detector=None):
+        """Initialize the recorder"""
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.blocksize = int(sample_rate * block_ms / 1000)
+        self.detector = detector or VoiceActivityDetector(sample_rate=sample_rate)
+        self.pre_roll_ms = pre_roll_ms
+        self.trailing_silence_ms = trailing_silence_ms
+
+    def new_gate(self):
+        """Create a speech gate sharing this recorder's detector"""
+        return SpeechGate(self.detector, self.sample_rate, self.pre_roll_ms, self.trailing_silence_ms)
+
+    def record(self, max_duration=6, dtype='float32', on_speech_start=None):
+        """Record until trailing silence, or return None if nobody spoke within max_duration
+
+        ``on_speech_start`` is called (from this thread) as soon as speech
+        onset is detected, before the utterance is complete.
+        """
+        # Imported here so the detector can be used without an audio device
+        import sounddevice as sd
+
+        audio_queue = queue.Queue()
+        gate = self.new_gate()
+        captured = []
+
+        def callback(indata, frames, time_info, status):
+            audio_queue.put(indata.copy())
+
+        deadline = time.time() + max_duration
+        with sd.InputStream(samplerate=self.sample_rate, channels=self.channels, dtype=dtype,
+                            blocksize=self.blocksize, callback=callback):
+            while not gate.finished and time.time() < deadline:
+                try:
+                    block = audio_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                was_triggered = gate.triggered
+                captured.extend(gate.push(block))
+                if gate.triggered and not was_triggered and on_speech_start:
+                    on_speech_start()
+
+        if not gate.triggered or not captured:
+            return None
+        return np.concatenate(captured).reshape(-1)
@@ -0,0 +1,315 @@
+import asyncio
+import json
+import os
+import uuid
+
+import numpy as np
+import websockets
+
+from deepgram_streaming import DeepgramStreamingTranscriber
+from pipelined_speaker import split_sentences
+from voice_activity import SpeechGate, VoiceActivityDetector
+
+# Port the voice WebSocket server listens on (the Flask app keeps its own port)
+VOICE_WS_PORT = int(os.environ.get('VOICE_WS_PORT', 8765))
+
+# Longest utterance accepted before it is cut off and transcribed
+MAX_UTTERANCE_SECONDS = 15
+
+# Size of the binary frames TTS audio is streamed back in
+AUDIO_CHUNK_BYTES = 16 * 1024
+
+
+class VoiceSession:
+    """One browser connection: its audio, its transcription and its replies
+
+    The receive loop only routes messages, so microphone audio keeps flowing
+    while the previous turn is still being answered and spoken (full duplex).
+    The page streams the microphone continuously, so frames go through a
+    speech gate first: an utterance (and its Deepgram stream) starts only at
+    speech onset and ends when the gate hears trailing silence.
+    """
+
+    def __init__(self, gateway, ws):
+        self.gateway = gateway
+        self.ws = ws
+        # Private to this connection unless the page proves (with a signed token) which
+        # browser it belongs to; then HTTP and WebSocket turns share that history
+        self.session_id = uuid.uuid4().hex
+        self.sample_rate = 16000
+        self.gate = self._new_gate()
+        self.outbox = asyncio.Queue()
+        self.audio_queue = None
+        self.pcm = bytearray()
+        self.listen_task = None
+        self.reply_task = None
+
+    def send_json(self, message_type, **fields):
+        """Queue a JSON event for the browser"""
+        self.outbox.put_nowait(json.dumps({'type': message_type, **fields}))
+
+    def send_bytes(self, data):
+        """Queue a binary frame for the browser"""
+        self.outbox.put_nowait(bytes(data))
+
+    async def _writer(self):
+        """Single writer, so events from concurrent tasks never interleave mid-frame"""
+        while True:
+            message = await self.outbox.get()
+            await self.ws.send(message)
+
+    async def _utterance_audio(self, audio_queue):
+        while True:
+            chunk = await audio_queue.get()
+            if chunk is None:
+                return
+            yield chunk
+
+    def _new_gate(self):
+        return SpeechGate(VoiceActivityDetector(sample_rate=self.sample_rate), sample_rate=self.sample_rate)
+
+    def _start_utterance(self):
+        self.audio_queue = asyncio.Queue()
+        self.pcm = bytearray()
+        self.listen_task = asyncio.create_task(self._listen(self.audio_queue, self.pcm))
+
+    def _end_utterance(self):
+        if self.audio_queue is not None:
+            self.audio_queue.put_nowait(None)
+            self.audio_queue = None
+        # The next utterance needs a fresh speech onset
+        self.gate.reset()
+
+    def on_audio(self, chunk):
+        """Feed a PCM16 frame to the speech gate; speech goes to the current utterance"""
+        samples = np.frombuffer(chunk, dtype='<i2')
+        for block in self.gate.push(samples):
+            if self.audio_queue is None:
+                self._start_utterance()
+            data = block.tobytes()
+            self.pcm.extend(data)
+            self.audio_queue.put_nowait(data)
+        if self.gate.finished or len(self.pcm) >= MAX_UTTERANCE_SECONDS * self.sample_rate * 2:
+            self._end_utterance()
+
+    async def _listen(self, audio_queue, pcm):
+        """Transcribe one utterance, pushing interim text as it arrives"""
+        transcriber = self.gateway.transcriber_factory(self.sample_rate)
+        try:
+            text = await transcriber.transcribe_stream(
+                self._utterance_audio(audio_queue),
+                on_interim=lambda interim: self.send_json('interim', text=interim))
+        except Exception as e:
+            print(f"❌ Voice gateway transcription error: {str(e)}")
+            self.send_json('error', message='Transcription failed')
+            text = None
+        finally:
+            # Deepgram ended it first: audio from now on belongs to the next utterance
+            if self.audio_queue is audio_queue:
+                self.audio_queue = None
+                self.gate.reset()
+
+        if not text:
+            self.send_json('no_speech')
+            return
+        samples = np.frombuffer(bytes(pcm), dtype='<i2').astype(np.float32) / 32768.0
+        self._start_reply(text, samples)
+
+    def _start_reply(self, text, samples=None):
+        """Answer a finished utterance, cutting off any reply still being spoken"""
+        self.interrupt()
+        self.reply_task = asyncio.create_task(self._reply(text, samples))
+
+    def interrupt(self):
+        """Barge-in: stop streaming the current reply"""
+        if self.reply_task is not None and not self.reply_task.done():
+            self.reply_task.cancel()
+            self.send_json('interrupted')
+
+    async def _reply(self, text, samples=None, emotion='neutral'):
+        """Run one turn and push its results to the browser as each becomes ready"""
+        loop = asyncio.get_running_loop()
+        gateway = self.gateway
+        self.send_json('transcript', text=text)
+
+        confidence = 0.0
+        if samples is not None and len(samples) and gateway.detect_emotion is not None:
+            try:
+                emotion, confidence = await loop.run_in_executor(None, gateway.detect_emotion, samples)
+            except Exception as e:
+                print(f"❌ Voice gateway emotion error: {str(e)}")
+        self.send_json('emotion', emotion=emotion, confidence=float(confidence))
+
+        try:
+            cards, response = await loop.run_in_executor(
+                None, gateway.respond, self.session_id, text, emotion, confidence)
+        except Exception as e:
+            print(f"❌ Voice gateway turn error: {str(e)}")
+            self.send_json('error', message='Error processing your request. Please try again.')
+            return
+        self.send_json('recommendations', recommendations=cards)
+        self.send_json('response', text=response)
+
+        if gateway.tts_cache is not None:
+            await self._stream_speech(response)
+        self.send_json('turn_end')
+
+    def _clip_path(self, sentence):
+        if self.gateway.phrase_bank is not None:
+            path = self.gateway.phrase_bank.lookup(sentence)
+            if path:
+                return path
+        return self.gateway.tts_cache.synthesize_path(sentence)
+
+    async def _stream_speech(self, text):
+        """Stream the reply's audio sentence by sentence, synthesising one sentence ahead"""
+        loop = asyncio.get_running_loop()
+        sentences = split_sentences(text)
+        if not sentences:
+            return
+        next_clip = loop.run_in_executor(None, self._clip_path, sentences[0])
+        for index in range(len(sentences)):
+            try:
+                path = await next_clip
+            except Exception as e:
+                print(f"❌ Voice gateway speech error: {str(e)}")
+                return
+            if index + 1 < len(sentences):
+                next_clip = loop.run_in_executor(None, self._clip_path, sentences[index + 1])
+            with open(path, 'rb') as f:
+                clip = f.read()
+            self.send_json('audio_start', index=index, text=sentences[index], mimetype='audio/mpeg')
+            for start in range(0, len(clip), AUDIO_CHUNK_BYTES):
+                self.send_bytes(clip[start:start + AUDIO_CHUNK_BYTES])
+            self.send_json('audio_end', index=index)
+            # Let the writer drain so a barge-in can cancel between sentences
+            await asyncio.sleep(0)
+
+    def on_control(self, message):
+        """Handle a JSON control message from the browser"""
+        message_type = message.get('type')
+        if message_type == 'start':
+            token = message.get('token')
+            if token:
+                # Never trust a session id from the client: only one the app signed for this browser
+                resolve = self.gateway.resolve_session
+                session_id = resolve(token) if resolve is not None else None
+                if session_id is None:
+                    self.send_json('error', message='Invalid voice session token')
+                    return
+                self.session_id = session_id
+            self.sample_rate = int(message.get('sample_rate') or self.sample_rate)
+            self.gate = self._new_gate()
+            self.send_json('ready', sample_rate=self.sample_rate)
+        elif message_type == 'stop':
+            self._end_utterance()
+        elif message_type == 'interrupt':
+            self.interrupt()
+        elif message_type == 'text':
+            text = (message.get('text') or '').strip()
+            if text:
+                self._start_reply(text)
+        else:
+            self.send_json('error', message=f'Unknown message type: {message_type}')
+
+    async def run(self):
+        """Serve the connection until the browser goes away"""
+        writer = asyncio.create_task(self._writer())
+        try:
+            async for message in self.ws:
+                if isinstance(message, bytes):
+                    self.on_audio(message)
+                    continue
+                try:
+                    self.on_control(json.loads(message))
+                except ValueError:
+                    self.send_json('error', message='Invalid JSON message')
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._end_utterance()
+            for task in (self.listen_task, self.reply_task):
+                if task is not None and not task.done():
+                    task.cancel()
+            await self._drain(writer)
+
+    async def _drain(self, writer):
+        try:
+            while not self.outbox.empty() and not writer.done():
+                await asyncio.sleep(0.01)
+        finally:
+            writer.cancel()
+            await asyncio.gather(writer, return_exceptions=True)
+
+
+class VoiceGateway:
+    """WebSocket server for full-duplex browser voice sessions
+
+    The browser streams microphone PCM (16-bit mono) and gets back interim
+    transcripts, the detected emotion, recommendation cards, the response
+    text and the spoken reply as binary MP3 chunks, each as soon as it is
+    ready. It runs on its own asyncio loop next to the Flask app and shares
+    the app's assistant, conversation store and TTS cache through the
+    callables passed in:
+
+    - ``respond(session_id, text, emotion, confidence)`` returns ``(cards, response)``
+    - ``detect_emotion(samples)`` returns ``(emotion, confidence)`` for float audio
+    - ``resolve_session(token)`` returns the session id a signed token was
+      issued for, or None if the token isn't valid
+
+    Protocol (JSON text frames unless noted)::
+
+        client: {"type": "start", "token": ..., "sample_rate": 16000}
+        client: <binary PCM16 frames>         microphone audio, silence included; an utterance
+                                              starts at speech onset and ends on trailing
+                                              silence or Deepgram endpointing
+        client: {"type": "stop"}              end the utterance now
+        client: {"type": "text", "text": ...} typed message
+        client: {"type": "interrupt"}         stop the reply being streamed
+        server: ready, interim, transcript, emotion, recommendations, response,
+                audio_start, <binary MP3 chunks>, audio_end, turn_end, interrupted,
+                no_speech, error
+    """
+
+    def __init__(self, respond, detect_emotion=None, tts_cache=None, phrase_bank=None,
+                 transcriber_factory=None, resolve_session=None, host='0.0.0.0', port=VOICE_WS_PORT,
+                 reuse_port=False):
+        """Initialize the gateway with the app's turn handler and shared services
+
+        With ``reuse_port`` several processes (gunicorn workers) can each run
+        a gateway on the same port and the kernel spreads connections across them.
+        """
+        self.respond = respond
+        self.resolve_session = resolve_session
+        self.reuse_port = reuse_port
+        self.detect_emotion = detect_emotion
+        self.tts_cache = tts_cache
+        self.phrase_bank = phrase_bank
+        self.transcriber_factory = transcriber_factory or (
+            lambda sample_rate: DeepgramStreamingTranscriber(sample_rate=sample_rate))
+        self.host = host
+        self.port = port
+
+    async def handler(self, ws):
+        """Serve one browser connection"""
+        await VoiceSession(self, ws).run()
+
+    async def serve(self, ready=None):
+        """Run the server forever (``ready`` is set once it is listening)"""
+        options = {'reuse_port': True} if self.reuse_port else {}
+        async with websockets.serve(self.handler, self.host, self.port, max_size=2 ** 20, **options) as server:
+            self.port = server.sockets[0].getsockname()[1]
+            print(f"🎙️ Voice gateway listening on ws://{self.host}:{self.port}")
+            if ready is not None:
+                ready.set()
+            await asyncio.Future()
+
+    def start_in_thread(self):
+        """Run the gateway on its own event loop in a daemon thread"""
+        import threading
+
+        ready = threading.Event()
+        thread = threading.Thread(target=lambda: asyncio.run(self.serve(ready)), daemon=True)
+        thread.start()
+        ready.wait(5)
+        return thread
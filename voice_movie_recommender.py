@@ -17,6 +17,10 @@ import csv
 import pyttsx3
 from gtts import gTTS
 import pygame
+from deepgram_streaming import DeepgramStreamingTranscriber
+from voice_activity import VADRecorder
+from audio_buffer import AudioBuffer
+from tts_cache import TTSCache
 warnings.filterwarnings('ignore')
 
 # Check if required packages are installed, if not install them
@@ -101,6 +105,15 @@ class VoiceMovieRecommender:
         # Store conversation history
         self.conversation_history = []
         
+        # Voice activity detection - capture starts on speech and stops on silence
+        self.vad_recorder = VADRecorder()
+        
+        # Spoken phrases are synthesised once and replayed from disk
+        self.tts_cache = TTSCache()
+        
+        # Streaming speech-to-text with endpointing
+        self.streaming_transcriber = DeepgramStreamingTranscriber(api_key=DEEPGRAM_API_KEY)
+        
     def load_movie_database(self):
         """Load movie data from CSV file"""
         try:
@@ -398,26 +411,28 @@ class VoiceMovieRecommender:
     
     def record_audio(self, duration=5):
         """Record audio from the microphone"""
-        print(f"\n🎤 Recording for {duration} seconds... Speak now!")
+        print(f"\n🎤 Recording for up to {duration} seconds... Speak now!")
         
-        # Record audio
+        # Record audio until trailing silence; None means nobody spoke
         fs = 16000  # Sample rate
-        recording = sd.rec(int(duration * fs), samplerate=fs, channels=1)
-        sd.wait()  # Wait until recording is finished
-        
-        # Save recording to temporary file
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            temp_filename = temp_file.name
-            wav.write(temp_filename, fs, recording)
+        recording = self.vad_recorder.record(duration)
+        if recording is None:
+            return None
         
         print("✅ Recording finished.")
-        return temp_filename
+        return AudioBuffer.from_array(recording, fs)
     
-    def transcribe_audio(self, file_path):
-        """Transcribe audio using Deepgram"""
+    def transcribe_audio(self, audio):
+        """Transcribe an in-memory AudioBuffer (or a WAV file path) using Deepgram"""
         print("🔍 Transcribing...")
         
         try:
+            if isinstance(audio, AudioBuffer):
+                audio_data = audio.to_wav_bytes()
+            else:
+                with open(audio, "rb") as audio_file:
+                    audio_data = audio_file.read()
+            
             url = "https://api.deepgram.com/v1/listen"
             
             headers = {
@@ -431,9 +446,7 @@ class VoiceMovieRecommender:
                 "punctuate": "true"
             }
             
-            with open(file_path, "rb") as audio:
-                audio_data = audio.read()
-                response = requests.post(url, headers=headers, params=params, data=audio_data)
+            response = requests.post(url, headers=headers, params=params, data=audio_data)
             
             if response.status_code != 200:
                 print(f"Error: API returned status {response.status_code}")
@@ -443,16 +456,26 @@ class VoiceMovieRecommender:
             data = response.json()
             transcript = data["results"]["channels"][0]["alternatives"][0]["transcript"]
             
-            # Clean up the temporary file
-            if os.path.exists(file_path):
-                os.unlink(file_path)
-            
             return transcript
             
         except Exception as e:
             print(f"Error during transcription: {str(e)}")
             return None
     
+    def listen_and_transcribe(self, max_duration=7):
+        """Stream microphone audio to Deepgram and return once speech ends"""
+        print(f"\n🎤 Listening for up to {max_duration} seconds... Speak now!")
+        transcript, audio_data = self.streaming_transcriber.listen(max_duration)
+        
+        if audio_data is None:
+            # Streaming unavailable - fall back to local recording + REST call
+            audio_buffer = self.record_audio(duration=max_duration)
+            if audio_buffer is None:
+                return None
+            return self.transcribe_audio(audio_buffer)
+        
+        return transcript
+    
     def extract_preferences(self, user_input):
         """Extract user preferences from input text with enhanced natural language understanding"""
         preferences = {
@@ -865,11 +888,8 @@ class VoiceMovieRecommender:
         
         try:
             while True:
-                # Record audio
-                audio_file = self.record_audio(duration=7)
-                
-                # Transcribe audio
-                transcript = self.transcribe_audio(audio_file)
+                # Record and transcribe while the user is speaking
+                transcript = self.listen_and_transcribe(max_duration=7)
                 
                 if transcript:
                     print(f"\nYou said: {transcript}")
@@ -893,10 +913,6 @@ class VoiceMovieRecommender:
     def speak(self, text):
         """Convert text to speech with minimal terminal output"""
         try:
-            # Create a temporary file for the audio
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as fp:
-                temp_filename = fp.name
-                
             # Clean up the text
             text = text.replace('\n', ' ').strip()
             text = re.sub(r'\s+', ' ', text)
@@ -904,20 +920,18 @@ class VoiceMovieRecommender:
             # Remove emojis and special characters
             text = re.sub(r'[^\x00-\x7F]+', '', text)
             
-            # Generate and play speech
-            tts = gTTS(text=text, lang='en', slow=False)
-            tts.save(temp_filename)
+            # Generate (or reuse cached) speech and play it
+            audio_path = self.tts_cache.synthesize_path(text, lang='en', slow=False)
             
-            pygame.mixer.music.load(temp_filename)
+            pygame.mixer.music.load(audio_path)
             pygame.mixer.music.set_volume(0.9)
             pygame.mixer.music.play()
             
             while pygame.mixer.music.get_busy():
                 time.sleep(0.1)
             
-            # Clean up
+            # Release the cached file
             pygame.mixer.music.unload()
-            os.unlink(temp_filename)
             
         except Exception:
             # Fallback to pyttsx3 without output
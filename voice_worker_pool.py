@@ -0,0 +1,307 @@
+import collections
+import multiprocessing
+import multiprocessing.connection
+import os
+import threading
+import time
+import uuid
+
+# Warm voice workers kept running (each handles one conversation at a time)
+VOICE_WORKERS = int(os.environ.get('VOICE_WORKERS', 1))
+
+# Conversations allowed to wait for a free worker before new ones are refused
+VOICE_QUEUE_LIMIT = int(os.environ.get('VOICE_QUEUE_LIMIT', 4))
+
+# Workers report in this often; one that stays silent for HEALTH_TIMEOUT is replaced
+HEARTBEAT_INTERVAL = 2.0
+HEALTH_TIMEOUT = 15.0
+
+# A conversation running longer than this is assumed stuck and its worker replaced
+JOB_TIMEOUT = 30 * 60
+
+# Finished jobs remembered for status lookups
+MAX_FINISHED_JOBS = 100
+
+
+class VoicePoolFull(Exception):
+    """Raised when every worker is busy and the job queue is at its limit"""
+
+
+def realtime_conversation_handler():
+    """Load the real-time assistant once; each job then runs one conversation"""
+    from realtime_voice_recommender import RealTimeVoiceRecommender
+
+    recommender = RealTimeVoiceRecommender()
+
+    def run_conversation(payload):
+        recommender.start_conversation()
+
+    return run_conversation
+
+
+def _heartbeat(beat, interval, stopped):
+    while not stopped.wait(interval):
+        beat.value = time.time()
+
+
+def _worker_main(worker_id, handler_factory, conn, beat, heartbeat_interval):
+    """Worker process: warm up once, then run the jobs the supervisor sends
+
+    Each worker talks to the supervisor over its own pipe, so a worker
+    that is killed mid-message can only break that pipe - which is thrown
+    away with it - never a channel the other workers share. The heartbeat
+    lives in shared memory so it needs no message at all.
+    """
+    beat.value = time.time()
+    stopped = threading.Event()
+    threading.Thread(target=_heartbeat, args=(beat, heartbeat_interval, stopped), daemon=True).start()
+    try:
+        try:
+            handler = handler_factory()
+        except Exception as e:
+            conn.send(('init_failed', None, str(e)))
+            return
+        conn.send(('ready', None, None))
+
+        while True:
+            try:
+                job = conn.recv()
+            except EOFError:
+                break
+            if job is None:
+                break
+            try:
+                handler(job['payload'])
+                conn.send(('done', job['id'], None))
+            except Exception as e:
+                conn.send(('failed', job['id'], str(e)))
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    finally:
+        stopped.set()
+        conn.close()
+
+
+class VoiceWorkerPool:
+    """Supervised pool of pre-started voice worker processes
+
+    Each worker loads its assistant (catalog, audio stack, models) once at
+    start-up and then runs the conversations the pool hands it, so a
+    launch request goes to a warm process instead of starting a new
+    interpreter. Jobs wait in the pool (not in a queue shared with the
+    workers) and are sent to an idle worker over that worker's own pipe.
+    At most ``size`` conversations run at once and at most ``max_queue``
+    wait; beyond that submit() raises VoicePoolFull. A supervisor thread
+    replaces workers that exit, stop sending heartbeats or run a job past
+    ``job_timeout``, failing the job they were running; a replacement gets
+    a fresh pipe.
+    """
+
+    def __init__(self, size=VOICE_WORKERS, max_queue=VOICE_QUEUE_LIMIT,
+                 handler_factory=realtime_conversation_handler, heartbeat_interval=HEARTBEAT_INTERVAL,
+                 health_timeout=HEALTH_TIMEOUT, job_timeout=JOB_TIMEOUT, context=None):
+        """Initialize the pool (call start() to launch the workers)"""
+        self.size = size
+        self.max_queue = max_queue
+        self.handler_factory = handler_factory
+        self.heartbeat_interval = heartbeat_interval
+        self.health_timeout = health_timeout
+        self.job_timeout = job_timeout
+        self.ctx = context or multiprocessing.get_context()
+        self.pending = collections.deque()
+        self.workers = {}
+        self.job_status = {}
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._threads = []
+
+    def _spawn(self, worker_id):
+        # Lock-free shared value: a worker killed mid-write can't leave a lock held
+        beat = self.ctx.Value('d', time.time(), lock=False)
+        conn, child_conn = self.ctx.Pipe()
+        process = self.ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self.handler_factory, child_conn, beat, self.heartbeat_interval),
+            name=f'voice-worker-{worker_id}',
+            daemon=True)
+        process.start()
+        child_conn.close()
+        self.workers[worker_id] = {
+            'process': process,
+            'conn': conn,
+            'beat': beat,
+            'state': 'starting',
+            'job': None,
+            'job_started': None,
+        }
+
+    def start(self):
+        """Launch the workers and the supervisor"""
+        with self._lock:
+            for worker_id in range(self.size):
+                self._spawn(worker_id)
+        for target in (self._collect_events, self._supervise):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"🎙️ Voice worker pool started ({self.size} workers)")
+        return self
+
+    def _pending(self):
+        return len(self.pending)
+
+    def _dispatch(self):
+        """Hand waiting jobs to idle workers (called with the lock held)"""
+        for worker_id, worker in self.workers.items():
+            if not self.pending:
+                return
+            if worker['state'] != 'idle':
+                continue
+            job = self.pending.popleft()
+            try:
+                worker['conn'].send(job)
+            except (OSError, ValueError):
+                # The worker is gone; the supervisor will replace it
+                self.pending.appendleft(job)
+                worker['state'] = 'starting'
+                continue
+            worker.update(state='busy', job=job['id'], job_started=time.time())
+            status = self.job_status.get(job['id'])
+            if status is not None:
+                status.update(status='running', worker=worker_id)
+
+    def submit(self, payload=None):
+        """Queue a job for the next free worker and return its id"""
+        with self._lock:
+            if self._pending() >= self.max_queue:
+                raise VoicePoolFull('All voice workers are busy - please try again shortly')
+            job_id = uuid.uuid4().hex
+            self.job_status[job_id] = {'status': 'queued', 'worker': None,
+                                       'submitted': time.time(), 'error': None}
+            self.pending.append({'id': job_id, 'payload': payload})
+            self._dispatch()
+        return job_id
+
+    def job(self, job_id):
+        """Return a job's status dict, or None if it is unknown"""
+        with self._lock:
+            job = self.job_status.get(job_id)
+            return dict(job) if job else None
+
+    def _finish_job(self, job_id, status, error=None):
+        job = self.job_status.get(job_id)
+        if job is None or job['status'] in ('done', 'failed'):
+            return
+        job['status'] = status
+        job['error'] = error
+        finished = [key for key, value in self.job_status.items() if value['status'] in ('done', 'failed')]
+        for key in finished[:-MAX_FINISHED_JOBS]:
+            del self.job_status[key]
+
+    def _collect_events(self):
+        """Apply worker reports (start-up and job results) to the pool state"""
+        while not self._stopped.is_set():
+            with self._lock:
+                conns = {worker['conn']: worker_id for worker_id, worker in self.workers.items()
+                         if not worker['conn'].closed}
+            if not conns:
+                self._stopped.wait(0.1)
+                continue
+            try:
+                ready = multiprocessing.connection.wait(list(conns), timeout=0.5)
+            except (OSError, ValueError):
+                continue  # A pipe was closed by a restart while we waited
+            for conn in ready:
+                try:
+                    event, job_id, error = conn.recv()
+                except (EOFError, OSError):
+                    # The worker exited; stop polling its pipe until it's replaced
+                    with self._lock:
+                        conn.close()
+                    continue
+                with self._lock:
+                    worker_id = conns[conn]
+                    worker = self.workers.get(worker_id)
+                    if worker is None or worker['conn'] is not conn:
+                        continue
+                    if event == 'ready':
+                        worker['state'] = 'idle'
+                    elif event == 'init_failed':
+                        worker['state'] = 'failed'
+                        print(f"❌ Voice worker {worker_id} failed to start: {error}")
+                    elif event in ('done', 'failed'):
+                        self._finish_job(job_id, event, error)
+                        worker.update(state='idle', job=None, job_started=None)
+                    self._dispatch()
+
+    def _unhealthy(self, worker, now):
+        if worker['state'] == 'failed':
+            return None
+        if not worker['process'].is_alive():
+            return 'exited'
+        if now - worker['beat'].value > self.health_timeout:
+            return 'stopped responding'
+        if worker['job_started'] is not None and now - worker['job_started'] > self.job_timeout:
+            return 'job timed out'
+        return None
+
+    def _supervise(self):
+        """Replace workers that died, hung or overran a job"""
+        while not self._stopped.wait(self.heartbeat_interval / 2):
+            self.check_health()
+
+    def check_health(self):
+        """Run one health check pass and restart unhealthy workers"""
+        now = time.time()
+        with self._lock:
+            if self._stopped.is_set():
+                return  # Workers exiting on stop() aren't failures to replace
+            for worker_id, worker in list(self.workers.items()):
+                reason = self._unhealthy(worker, now)
+                if reason is None:
+                    continue
+                print(f"⚠️ Voice worker {worker_id} {reason} - restarting")
+                if worker['process'].is_alive():
+                    worker['process'].terminate()
+                worker['process'].join(1)
+                worker['conn'].close()
+                if worker['job']:
+                    self._finish_job(worker['job'], 'failed', f'Voice worker {reason}')
+                self.restarts += 1
+                self._spawn(worker_id)
+
+    def status(self):
+        """Summary of workers and queued jobs for the status endpoint"""
+        with self._lock:
+            states = [worker['state'] for worker in self.workers.values()]
+            return {
+                'workers': len(states),
+                'idle': states.count('idle'),
+                'busy': states.count('busy'),
+                'starting': states.count('starting'),
+                'failed': states.count('failed'),
+                'queued': self._pending(),
+                'queue_limit': self.max_queue,
+                'restarts': self.restarts,
+            }
+
+    def stop(self, timeout=5):
+        """Ask workers to finish and shut the pool down"""
+        self._stopped.set()
+        with self._lock:
+            workers = list(self.workers.values())
+            for worker in workers:
+                try:
+                    worker['conn'].send(None)
+                except (OSError, ValueError):
+                    pass
+        for worker in workers:
+            worker['process'].join(timeout)
+            if worker['process'].is_alive():
+                worker['process'].terminate()
+                worker['process'].join(1)
+        for thread in self._threads:
+            thread.join(1)
+        for worker in workers:
+            worker['conn'].close()
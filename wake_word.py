@@ -0,0 +1,227 @@
+import os
+
+import numpy as np
+
+# Enrolled wake phrase recordings (MFCC templates) live next to the app
+WAKE_TEMPLATES_PATH = 'wake_word_templates.npz'
+
+
+def mel_filterbank(n_filters, n_fft, sample_rate, fmin=0.0, fmax=None):
+    """Build a triangular mel filterbank matrix of shape (n_filters, n_fft // 2 + 1)"""
+    fmax = fmax or sample_rate / 2
+
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+    mel_points = np.linspace(hz_to_mel(fmin), hz_to_mel(fmax), n_filters + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mel_points) / sample_rate).astype(int)
+
+    filters = np.zeros((n_filters, n_fft // 2 + 1))
+    for m in range(1, n_filters + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        for k in range(left, center):
+            filters[m - 1, k] = (k - left) / max(center - left, 1)
+        for k in range(center, right):
+            filters[m - 1, k] = (right - k) / max(right - center, 1)
+    return filters
+
+
+class WakeWordSpotter:
+    """On-device wake phrase spotter using MFCC templates and DTW matching
+
+    Each wake phrase is enrolled from a few short recordings. A new utterance
+    is compared against the templates with open-ended dynamic time warping,
+    so "hey movie buddy, something funny" still matches the "hey movie buddy"
+    template at its start. Nothing leaves the machine until a match is found.
+    """
+
+    def __init__(self, phrases, sample_rate=16000, templates_path=WAKE_TEMPLATES_PATH,
+                 n_mfcc=13, n_filters=26, frame_ms=25, hop_ms=10, threshold_margin=1.25):
+        """Initialize the spotter and load any enrolled templates"""
+        self.phrases = list(phrases)
+        self.sample_rate = sample_rate
+        self.templates_path = templates_path
+        self.n_mfcc = n_mfcc
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.hop_size = int(sample_rate * hop_ms / 1000)
+        self.n_fft = 1 << (self.frame_size - 1).bit_length()
+        self.threshold_margin = threshold_margin
+
+        self.filterbank = mel_filterbank(n_filters, self.n_fft, sample_rate)
+        self.window = np.hamming(self.frame_size)
+        # DCT-II basis, skipping c0 (overall loudness)
+        n = np.arange(n_filters)
+        self.dct_basis = np.cos(np.pi / n_filters * (n + 0.5)[None, :] * np.arange(1, n_mfcc + 1)[:, None])
+
+        self.templates = {phrase: [] for phrase in self.phrases}
+        self.thresholds = {}
+        self.load()
+
+    def extract_features(self, audio_data, normalise=True):
+        """Return MFCC frames for the voiced part of a clip, cepstral-mean-normalised by default"""
+        audio = np.asarray(audio_data)
+        if audio.ndim > 1:
+            audio = audio[:, 0]
+        if audio.dtype == np.int16:
+            audio = audio.astype(np.float32) / 32768.0
+        audio = audio.astype(np.float32, copy=False)
+
+        if len(audio) < self.frame_size:
+            return np.zeros((0, self.n_mfcc))
+
+        # Pre-emphasis boosts the high frequencies that carry consonants
+        audio = np.append(audio[0], audio[1:] - 0.97 * audio[:-1])
+
+        n_frames = 1 + (len(audio) - self.frame_size) // self.hop_size
+        index = np.arange(self.frame_size)[None, :] + self.hop_size * np.arange(n_frames)[:, None]
+        frames = audio[index]
+
+        # Trim leading/trailing frames that are much quieter than the loudest one
+        rms = np.sqrt(np.mean(frames ** 2, axis=1))
+        voiced = np.where(rms >= 0.1 * rms.max())[0] if rms.max() > 0 else []
+        if len(voiced) == 0:
+            return np.zeros((0, self.n_mfcc))
+        frames = frames[voiced[0]:voiced[-1] + 1]
+
+        spectrum = np.abs(np.fft.rfft(frames * self.window, n=self.n_fft)) ** 2 / self.n_fft
+        log_mel = np.log(spectrum @ self.filterbank.T + 1e-10)
+        mfcc = log_mel @ self.dct_basis.T
+        return mfcc - mfcc.mean(axis=0) if normalise else mfcc
+
+    def dtw_distance(self, template, features):
+        """Open-ended DTW distance between a template and the start of an utterance"""
+        n, m = len(template), len(features)
+        if n == 0 or m == 0:
+            return np.inf
+
+        # The wake phrase must take between half and twice the template length
+        max_len = min(m, 2 * n)
+        features = features[:max_len]
+        cost = np.sqrt(((template[:, None, :] - features[None, :, :]) ** 2).sum(axis=2))
+
+        acc = np.full((n + 1, max_len + 1), np.inf)
+        acc[0, 0] = 0.0
+        for i in range(1, n + 1):
+            diagonal_or_up = np.minimum(acc[i - 1, :-1], acc[i - 1, 1:])
+            row = acc[i]
+            for j in range(1, max_len + 1):
+                row[j] = cost[i - 1, j - 1] + min(diagonal_or_up[j - 1], row[j - 1])
+
+        ends = np.arange(max(1, n // 2), max_len + 1)
+        if len(ends) == 0:
+            return np.inf
+        normalised = acc[n, ends] / (n + ends)
+        return float(normalised.min())
+
+    def enroll(self, phrase, audio_data):
+        """Add one recording of a wake phrase as a template"""
+        features = self.extract_features(audio_data)
+        if len(features) == 0:
+            return False
+        self.templates.setdefault(phrase, []).append(features)
+        self.calibrate(phrase)
+        return True
+
+    def calibrate(self, phrase):
+        """Set a phrase's match threshold from the spread between its own templates"""
+        templates = self.templates.get(phrase, [])
+        if len(templates) < 2:
+            self.thresholds.pop(phrase, None)
+            return
+        distances = [self.dtw_distance(a, b) for i, a in enumerate(templates)
+                     for j, b in enumerate(templates) if i != j]
+        self.thresholds[phrase] = max(distances) * self.threshold_margin
+
+    def is_ready(self):
+        """Return True once at least one phrase has a calibrated threshold"""
+        return bool(self.thresholds)
+
+    def _normalise_prefix(self, features, length):
+        """Mean-normalise an utterance over the span a template would cover
+
+        Templates are normalised over the wake phrase alone, so the utterance
+        is normalised over its first ``length`` frames rather than the whole
+        request that follows the wake phrase.
+        """
+        if len(features) == 0:
+            return features
+        return features - features[:length].mean(axis=0)
+
+    def detect(self, audio_data):
+        """Return (phrase, distance) for the best matching wake phrase, or (None, distance)"""
+        features = self.extract_features(audio_data, normalise=False)
+        best_phrase, best_distance = None, np.inf
+
+        for phrase, threshold in self.thresholds.items():
+            distance = min(self.dtw_distance(template, self._normalise_prefix(features, len(template)))
+                           for template in self.templates[phrase])
+            # Compare relative to each phrase's own threshold so short phrases aren't favoured
+            if distance <= threshold and (best_phrase is None or
+                                          distance / threshold < best_distance / self.thresholds[best_phrase]):
+                best_phrase, best_distance = phrase, distance
+            elif best_phrase is None:
+                best_distance = min(best_distance, distance)
+
+        return best_phrase, best_distance
+
+    def save(self):
+        """Save templates to templates_path as a compressed .npz"""
+        arrays = {}
+        for p_index, phrase in enumerate(self.phrases):
+            arrays[f'phrase_{p_index}'] = np.array(phrase)
+            for t_index, template in enumerate(self.templates.get(phrase, [])):
+                arrays[f'template_{p_index}_{t_index}'] = template
+        np.savez_compressed(self.templates_path, **arrays)
+
+    def load(self):
+        """Load templates for our phrases from templates_path if it exists"""
+        if not self.templates_path or not os.path.exists(self.templates_path):
+            return
+        try:
+            with np.load(self.templates_path) as data:
+                stored = {}
+                for key in data.files:
+                    if key.startswith('phrase_'):
+                        stored[key.split('_', 1)[1]] = str(data[key])
+                for p_index, phrase in stored.items():
+                    if phrase not in self.templates:
+                        continue
+                    prefix = f'template_{p_index}_'
+                    keys = sorted((k for k in data.files if k.startswith(prefix)),
+                                  key=lambda k: int(k[len(prefix):]))
+                    self.templates[phrase] = [data[k] for k in keys]
+                    self.calibrate(phrase)
+        except Exception as e:
+            print(f"❌ Error loading wake word templates: {str(e)}")
+
+    def enroll_from_microphone(self, recorder, repetitions=3):
+        """Interactively record each wake phrase a few times and save the templates"""
+        for phrase in self.phrases:
+            for attempt in range(1, repetitions + 1):
+                print(f"🎤 Say '{phrase}' ({attempt}/{repetitions})...")
+                audio = recorder.record(3)
+                if audio is None or not self.enroll(phrase, audio):
+                    print("🔇 Didn't hear anything, skipping")
+        self.save()
+        print(f"✅ Saved wake word templates to {self.templates_path}")
+
+
+# Phrases enrolled by default (the assistants' spoken wake words)
+DEFAULT_WAKE_PHRASES = ["hey movie buddy", "movie buddy", "hey buddy"]
+
+
+def main():
+    """Enroll wake phrases from the microphone (defaults to DEFAULT_WAKE_PHRASES)"""
+    import sys
+    from voice_activity import VADRecorder
+
+    phrases = sys.argv[1:] or DEFAULT_WAKE_PHRASES
+    spotter = WakeWordSpotter(phrases)
+    spotter.enroll_from_microphone(VADRecorder())
+
+
+if __name__ == "__main__":
+    main()